@@ -0,0 +1,345 @@
+# async_scraper_manager.py
+import asyncio
+import collections
+import contextlib
+import functools
+import itertools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+from data_extractor import DataExtractor
+from scraper_manager import ScraperManager
+
+
+class AsyncScraperManager(ScraperManager):
+    """
+    Variante asynchrone de ScraperManager qui télécharge les pages de catégories et les pages des livres
+    de manière concurrente (les images de couverture sont confiées à l'ImageDownloader, comme en mode
+    séquentiel).
+
+    Les requêtes HTTP restent effectuées avec `requests` dans un pool de threads ; asyncio se charge
+    d'ordonnancer les téléchargements et de limiter le nombre de requêtes simultanées par hôte.
+    Les fichiers CSV et les images produits sont identiques à ceux du mode séquentiel.
+
+    Attributes:
+        base_url (str): URL de base du site web à scraper.
+        data_extractor (DataExtractor): Instance utilisée pour extraire les URLs des catégories.
+        max_per_host (int): Nombre maximal de requêtes simultanées vers un même hôte.
+    """
+    def __init__(self, base_url, max_per_host=10, parser_backend=None, http_client=None,
+                 csv_directory='datas_csv', resume=False, image_workers=4, image_directory='book_images',
+                 parse_workers=0, parse_batch_size=16, page_workers=4, price_history=None,
+                 crawl_diff=None, exporters=(), journal=None, metrics=None, page_cache=None, categories=None,
+                 fields=None, download_images=True, reference_image_directory=None):
+        """
+        Initialise AsyncScraperManager avec une URL de base et une limite de concurrence par hôte.
+
+        Parameters:
+            base_url (str): L'URL de base du site web à scraper.
+            max_per_host (int): Nombre maximal de requêtes simultanées vers un même hôte.
+            parser_backend (str, optionnel): Backend de parsing des pages produit.
+            http_client (HttpClient, optionnel): Client HTTP à utiliser. Son pool doit contenir au moins
+            `max_per_host` connexions pour que chaque requête simultanée réutilise une connexion.
+            csv_directory (str): Répertoire des fichiers CSV.
+            resume (bool): Reprendre un crawl interrompu en complétant les fichiers CSV existants.
+            image_workers (int): Nombre de téléchargements d'images simultanés.
+            image_directory (str): Répertoire de base des images sauvegardées.
+            parse_workers (int): Nombre de processus dédiés au parsing des pages produit
+            (0 pour parser dans la boucle d'événements).
+            parse_batch_size (int): Nombre de pages envoyées à un processus de parsing en une fois.
+            page_workers (int): 1 pour suivre les liens de pagination un par un ; au-delà, les pages de liste
+            d'une catégorie sont téléchargées simultanément, dans la limite par hôte.
+            price_history (PriceHistory, optionnel): Historique des prix dans lequel chaque passage est enregistré.
+            crawl_diff (CrawlDiff, optionnel): Détection des livres ajoutés, retirés et modifiés depuis le
+            passage précédent.
+            exporters (iterable): Exports supplémentaires (voir exporters.Exporter) recevant chaque livre écrit.
+            journal (CrawlJournal, optionnel): Journal de progression du crawl complet.
+            metrics (Metrics, optionnel): Mesures du pipeline. Par défaut, de nouvelles mesures.
+            page_cache (PageCache, optionnel): Cache des pages parsées (page d'accueil, pages de liste et pages
+            produit hors ParsePool).
+            categories (iterable, optionnel): Noms des catégories à extraire. Par défaut, toutes.
+            fields (iterable, optionnel): Colonnes à écrire dans les fichiers CSV. Par défaut, toutes.
+            download_images (bool): Télécharger les images de couverture.
+            reference_image_directory (str, optionnel): Répertoire d'images déjà téléchargées, à ne pas
+            retélécharger.
+        """
+        super().__init__(base_url, parser_backend, http_client, csv_directory, resume, image_workers,
+                         image_directory, parse_workers, parse_batch_size, page_workers,
+                         price_history, crawl_diff, exporters, journal, metrics, page_cache, categories,
+                         fields, download_images, reference_image_directory)
+        if max_per_host < 1:
+            raise ValueError("max_per_host doit être supérieur ou égal à 1")
+        self.max_per_host = max_per_host
+        self._host_semaphores = {}
+        self._executor = None
+
+    def extract_all_books(self):
+        """
+        Lance l'extraction complète du site en mode asynchrone.
+
+        Cette méthode bloque jusqu'à la fin du crawl, comme la version séquentielle.
+        """
+        asyncio.run(self.extract_all_books_async())
+
+    def extract_categories(self, category_urls):
+        """
+        Extrait et sauvegarde les livres d'une liste de catégories en mode asynchrone.
+
+        Parameters:
+            category_urls (list): URLs des premières pages des catégories.
+        """
+        asyncio.run(self.extract_all_books_async(category_urls))
+
+    async def extract_all_books_async(self, category_urls=None):
+        """
+        Orchestre l'extraction concurrente de toutes les catégories du site.
+
+        Les catégories sont traitées en parallèle ; dans chaque catégorie, les pages des livres sont
+        téléchargées en parallèle et les livres sont écrits dans l'ordre de la liste de la catégorie.
+
+        Parameters:
+            category_urls (list, optionnel): URLs des catégories à extraire. Par défaut, toutes celles du site.
+        """
+        self._host_semaphores = {}
+        with ThreadPoolExecutor(max_workers=self.max_per_host) as executor, self.journal or contextlib.nullcontext(), \
+                self.image_downloader or contextlib.nullcontext(), self.parse_pool or contextlib.nullcontext(), \
+                self.recording_run():
+            self._executor = executor
+            try:
+                if category_urls is None:
+                    category_urls = await self._run_limited(self.base_url, self.extract_category_urls)
+                await asyncio.gather(*(self._extract_category(url) for url in category_urls
+                                       if self.journal is None or not self.journal.is_category_done(url)))
+            finally:
+                self._executor = None
+        self.log_run_stats()
+
+    async def _extract_category(self, category_url):
+        """
+        Extrait et sauvegarde tous les livres d'une catégorie.
+
+        Le premier livre est extrait seul, car il détermine le fichier CSV de la catégorie (et, en mode
+        reprise, les livres déjà écrits). Les autres livres sont ensuite téléchargés en parallèle, par une
+        fenêtre glissante (voir _parse_in_order), et écrits dans le CSV dans l'ordre de la catégorie dès que
+        tous les livres qui les précèdent sont écrits.
+        Si le journal connaît déjà la catégorie, son nom et ses URLs de livres sont repris du journal.
+
+        Parameters:
+            category_url (str): URL de la première page de la catégorie.
+        """
+        known = self.journal.category(category_url) if self.journal is not None else None
+        failed_pages = []
+        if known is not None:
+            category, book_urls = known
+            first_index, first_book = -1, None
+        else:
+            start = time.perf_counter()
+            book_urls, failed_pages = await self._extract_book_urls_from_category(category_url)
+            listing_seconds = time.perf_counter() - start
+            if failed_pages:
+                self.record_listing_failure(category_url, failed_pages)
+            first_index, first_book = None, None
+            for index, book_url in enumerate(book_urls):
+                book = await self._extract_book(book_url)
+                if book.category:
+                    first_index, first_book = index, book
+                    break
+                self.record_book_failure(book_url)
+            if first_book is None:
+                return  # Aucune page produit téléchargée
+            category = first_book.category
+            self.metrics.record('extract', listing_seconds, category)
+            if self.journal is not None and not failed_pages:
+                self.journal.record_category(category_url, category, book_urls)
+        with self.open_csv_writer(category) as writer:
+            self.resume_history(category)
+            if first_book is not None and not writer.has_book(first_book.product_book_url):
+                self.save_book(first_book, writer)
+            pending_urls = [book_url for book_url in book_urls[first_index + 1:] if not writer.has_book(book_url)]
+            async with contextlib.aclosing(self._parse_in_order(pending_urls, category)) as books:
+                async for book in books:
+                    self.save_book(book, writer)
+            self.finish_category(category_url, book_urls, writer, listing_complete=not failed_pages)
+
+    async def _parse_in_order(self, book_urls, category):
+        """
+        Télécharge et parse les pages des livres en parallèle, et les restitue dans l'ordre de la catégorie.
+
+        Seules les `_book_window()` pages qui suivent le prochain livre à écrire sont téléchargées en même
+        temps : un nouveau téléchargement est lancé chaque fois qu'un livre est restitué, si bien que la
+        mémoire utilisée ne dépend pas du nombre de livres de la catégorie. Sans ParsePool, chaque tâche
+        extrait déjà son livre (voir _extract_book). Avec un ParsePool, les pages sont envoyées par lots aux
+        processus workers (au plus un lot de plus que de workers en attente), et les pages suivantes
+        continuent d'être téléchargées pendant le parsing.
+
+        Parameters:
+            book_urls (list): URLs des pages des livres.
+            category (str): Nom de la catégorie des livres.
+
+        Yields:
+            Book: Les livres extraits, dans l'ordre des URLs.
+        """
+        fetch = self._fetch_book_page if self.parse_pool is not None else self._extract_book
+        window = self._book_window()
+        remaining_urls = iter(book_urls)
+        tasks = collections.deque()  # Couples (URL, tâche) lancés et pas encore restitués, dans l'ordre
+
+        def fill_window():
+            for book_url in itertools.islice(remaining_urls, window - len(tasks)):
+                tasks.append((book_url, asyncio.ensure_future(fetch(book_url, category))))
+
+        try:
+            fill_window()
+            if self.parse_pool is None:
+                while tasks:
+                    book = await tasks[0][1]
+                    tasks.popleft()
+                    fill_window()
+                    yield book
+                return
+
+            max_pending = (self.parse_pool.workers or os.cpu_count() or 1) + 1
+            pending = collections.deque()  # Lots envoyés aux workers, dans l'ordre
+            batch = []
+            while tasks:
+                book_url, task = tasks[0]
+                batch.append((book_url, await task))
+                tasks.popleft()
+                fill_window()
+                if len(batch) == self.parse_pool.batch_size or not tasks:
+                    if len(pending) == max_pending:
+                        for book in self.parse_pool.books_from_result(await pending.popleft()):
+                            yield book
+                    pending.append(asyncio.wrap_future(self.parse_pool.submit_batch(batch)))
+                    batch = []
+                while pending and pending[0].done():
+                    for book in self.parse_pool.books_from_result(pending.popleft().result()):
+                        yield book
+            while pending:
+                for book in self.parse_pool.books_from_result(await pending.popleft()):
+                    yield book
+        finally:
+            for _, task in tasks:
+                task.cancel()  # Téléchargements lancés mais dont le livre ne sera pas écrit
+
+    def _book_window(self):
+        """
+        Retourne le nombre maximal de pages produit téléchargées en avance sur l'écriture d'une catégorie.
+
+        Returns:
+            int: Deux fois la limite par hôte, pour que les requêtes suivantes attendent déjà leur tour, et
+            au moins deux lots du ParsePool.
+        """
+        window = 2 * self.max_per_host
+        if self.parse_pool is not None:
+            window = max(window, 2 * self.parse_pool.batch_size)
+        return window
+
+    async def _extract_book_urls_from_category(self, category_url):
+        """
+        Parcourt les pages d'une catégorie.
+
+        Si le nombre de pages est lisible sur la première page ("Page 1 of N"), les pages suivantes sont
+        toutes téléchargées simultanément ; sinon, les liens de pagination sont suivis un par un.
+
+        Parameters:
+            category_url (str): URL de la première page de la catégorie.
+
+        Returns:
+            tuple: Les URLs des livres des pages téléchargées et les URLs des pages qui n'ont pas pu l'être.
+        """
+        first_page = await self._fetch_page(category_url)
+        if not first_page.soup:
+            return [], [category_url]
+        pages = [first_page]
+        page_count = first_page.extract_page_count() if self.page_workers > 1 else None
+        if page_count is not None:
+            page_urls = [urljoin(category_url, f"page-{number}.html") for number in range(2, page_count + 1)]
+            pages.extend(await asyncio.gather(*(self._fetch_page(page_url) for page_url in page_urls)))
+        else:
+            page_url = first_page.extract_next_page_url()
+            while page_url:
+                page = await self._fetch_page(page_url)
+                pages.append(page)
+                if not page.soup:
+                    break  # Sortie de la boucle en cas d'erreur lors du fetching
+                page_url = page.extract_next_page_url()
+        book_urls = [book_url for page in pages if page.soup for book_url in page.extract_book_urls_from_page()]
+        return book_urls, [page.url for page in pages if not page.soup]
+
+    async def _extract_book(self, book_url, category=None):
+        """
+        Télécharge et extrait un livre. La page est parsée dans la boucle d'événements (dans le thread, avec
+        un PageCache, qui ne la reparse que si elle a changé).
+
+        Parameters:
+            book_url (str): URL de la page du livre.
+            category (str, optionnel): Catégorie du livre si elle est déjà connue, pour les mesures par catégorie.
+
+        Returns:
+            Book: Le livre extrait (seule l'URL est renseignée si la page n'a pas pu être téléchargée).
+        """
+        if self.page_cache is not None:
+            return await self._run_limited(book_url, self.extract_cached_book, book_url,
+                                           functools.partial(self._fetch_content, book_url, category))
+        return self.parse_book(await self._fetch_book_page(book_url, category), book_url)
+
+    async def _fetch_book_page(self, book_url, category=None):
+        """
+        Télécharge le contenu brut de la page d'un livre dans le pool de threads.
+
+        Parameters:
+            book_url (str): URL de la page du livre.
+            category (str, optionnel): Catégorie du livre si elle est déjà connue, pour les mesures par catégorie.
+
+        Returns:
+            bytes: Le contenu HTML de la page, ou None en cas d'erreur.
+        """
+        return await self._run_limited(book_url, self._fetch_content, book_url, category)
+
+    def _fetch_content(self, book_url, category):
+        """Télécharge une page produit (dans un thread du pool) en mesurant la durée du téléchargement."""
+        with self.metrics.timer('fetch', category):
+            return DataExtractor(book_url, client=self.http_client).fetch_content()
+
+    async def _fetch_page(self, url):
+        """
+        Télécharge une page dans le pool de threads et la parse dans la boucle d'événements (dans le thread,
+        avec un PageCache, qui ne la reparse que si elle a changé).
+
+        Parameters:
+            url (str): URL de la page à télécharger.
+
+        Returns:
+            DataExtractor: Un extracteur dont la page est déjà chargée (soup à None en cas d'échec).
+        """
+        extractor = DataExtractor(url, client=self.http_client, page_cache=self.page_cache)
+        if self.page_cache is not None:
+            await self._run_limited(url, extractor.fetch_soup)
+        else:
+            extractor.load_soup(await self._run_limited(url, extractor.fetch_content))
+        return extractor
+
+    async def _run_limited(self, url, func, *args):
+        """
+        Exécute une fonction bloquante dans le pool de threads en respectant la limite par hôte.
+
+        Parameters:
+            url (str): URL ciblée par la fonction, utilisée pour déterminer l'hôte.
+            func (callable): Fonction bloquante à exécuter.
+            *args: Arguments passés à la fonction.
+
+        Returns:
+            Le résultat de la fonction.
+        """
+        async with self._semaphore_for(url):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+
+    def _semaphore_for(self, url):
+        """Retourne le sémaphore limitant les requêtes simultanées vers l'hôte de l'URL."""
+        host = urlparse(url).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.max_per_host)
+        return self._host_semaphores[host]
@@ -0,0 +1,132 @@
+"""
+Micro-benchmark comparant l'extraction champ par champ de DataExtractor au parser en une passe.
+
+Utilisation :
+    python bench_parser.py pages/ --fetch 20     # sauvegarde 20 pages produit puis lance le benchmark
+    python bench_parser.py pages/ --repeat 10    # benchmark sur les pages déjà sauvegardées
+"""
+import argparse
+import glob
+import os
+import time
+from bs4 import BeautifulSoup
+from data_extractor import DataExtractor
+from book_parser import BookPageParser, default_backend
+from books import Book
+
+
+def extract_book_per_field(content, book_url):
+    """
+    Extrait un livre avec les méthodes extract_* de DataExtractor (une recherche par champ).
+
+    Args:
+        content (bytes): Contenu HTML de la page produit.
+        book_url (str): URL de la page du livre.
+
+    Returns:
+        Book: Le livre extrait.
+    """
+    extractor = DataExtractor(book_url)
+    extractor.load_soup(content)
+    return _extract_fields(extractor, book_url)
+
+
+def _extract_fields(extractor, book_url):
+    """Appelle successivement chaque méthode extract_* sur la page chargée par l'extracteur."""
+    return Book(
+        product_book_url=book_url,
+        title=extractor.extract_title(),
+        upc=extractor.extract_upc(),
+        price_incl_tax=extractor.extract_price_including_tax(),
+        price_excl_tax=extractor.extract_price_excluding_tax(),
+        availability=extractor.extract_availability(),
+        review_rating=extractor.extract_review_rating(),
+        category=extractor.extract_category(),
+        image_url=extractor.extract_image_url(),
+        product_description=extractor.extrac_product_description(),
+    )
+
+
+def save_product_pages(directory, count, base_url="https://books.toscrape.com/"):
+    """
+    Télécharge des pages produit depuis le site et les sauvegarde dans un répertoire.
+
+    Args:
+        directory (str): Répertoire de destination des pages.
+        count (int): Nombre de pages à sauvegarder.
+        base_url (str): URL de base du site à scraper.
+    """
+    os.makedirs(directory, exist_ok=True)
+    extractor = DataExtractor(base_url)
+    saved = 0
+    for category_url in extractor.extract_category_urls():
+        extractor.set_url(category_url)
+        for book_url in extractor.extract_book_urls_from_category():
+            extractor.set_url(book_url)
+            content = extractor.fetch_content()
+            if content is None:
+                continue
+            with open(os.path.join(directory, f"page_{saved:04d}.html"), 'wb') as file:
+                file.write(content)
+            saved += 1
+            if saved >= count:
+                return
+
+
+def time_it(func, pages, repeat):
+    """Retourne le meilleur temps moyen par page (en millisecondes) sur `repeat` passes."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path, content in pages:
+            func(content, path)
+        best = min(best, time.perf_counter() - start)
+    return best / len(pages) * 1000
+
+
+def main():
+    """Lance le benchmark et affiche le temps par page de chaque approche."""
+    parser = argparse.ArgumentParser(description="Benchmark du parsing des pages produit.")
+    parser.add_argument('pages_dir', help="Répertoire contenant des pages produit sauvegardées (*.html).")
+    parser.add_argument('--fetch', type=int, default=0, help="Nombre de pages à télécharger avant le benchmark.")
+    parser.add_argument('--repeat', type=int, default=5, help="Nombre de passes (le meilleur temps est retenu).")
+    parser.add_argument('--backend', default=default_backend(), help="Backend du parser en une passe.")
+    args = parser.parse_args()
+
+    if args.fetch:
+        save_product_pages(args.pages_dir, args.fetch)
+    pages = []
+    for path in sorted(glob.glob(os.path.join(args.pages_dir, '*.html'))):
+        with open(path, 'rb') as file:
+            pages.append((path, file.read()))
+    if not pages:
+        parser.error(f"aucune page .html trouvée dans {args.pages_dir}")
+
+    book_parser = BookPageParser(args.backend)
+    mismatches = [path for path, content in pages
+                  if extract_book_per_field(content, path).to_dict() != book_parser.parse(content, path).to_dict()]
+
+    soups = [(path, BeautifulSoup(content, 'html.parser')) for path, content in pages]
+    results = {
+        'champ par champ (parse + extraction)': time_it(extract_book_per_field, pages, args.repeat),
+        f'une passe, {args.backend} (parse + extraction)': time_it(book_parser.parse, pages, args.repeat),
+        'champ par champ (extraction seule)': time_it(_extract_from_soup_per_field, soups, args.repeat),
+        'une passe (extraction seule)': time_it(book_parser.parse_soup, soups, args.repeat),
+    }
+
+    print(f"{len(pages)} pages, meilleur temps sur {args.repeat} passes")
+    for label, ms_per_page in results.items():
+        print(f"  {label:<45} {ms_per_page:8.3f} ms/page")
+    if mismatches:
+        print(f"ATTENTION : {len(mismatches)} page(s) donnent un résultat différent, ex. {mismatches[0]}")
+
+
+def _extract_from_soup_per_field(soup, book_url):
+    """Extraction champ par champ depuis une page déjà parsée (sans coût de parsing)."""
+    extractor = DataExtractor(book_url)
+    extractor.soup = soup
+    return _extract_fields(extractor, book_url)
+
+
+if __name__ == "__main__":
+    main()
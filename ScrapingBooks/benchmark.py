@@ -0,0 +1,257 @@
+"""
+Benchmark du pipeline complet de ScraperManager sur un catalogue local (voir mock_server.py).
+
+Le serveur tourne dans un processus séparé, afin que son coût ne soit compté ni dans le temps CPU ni
+dans la mémoire du scraper. Le benchmark mesure les pages et images traitées par seconde, le temps de
+parsing par page produit et le pic de mémoire (RSS), et peut les comparer à une référence enregistrée.
+
+Utilisation :
+    python benchmark.py --categories 5 --books 40 --save-baseline bench_baseline.json
+    python benchmark.py --categories 5 --books 40 --baseline bench_baseline.json --tolerance 0.1
+    python benchmark.py --engine async --latency 0.02 --error-rate 0.01
+"""
+import argparse
+import contextlib
+import csv
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from http_client import HttpClient
+from logging_config import configure_logging
+from mock_server import MockCatalogue, MockServer, STATS_PATH
+from scraper_manager import ScraperManager
+from async_scraper_manager import AsyncScraperManager
+
+try:
+    import resource
+except ImportError:  # Module indisponible sous Windows
+    resource = None
+
+# Sens d'évolution souhaité de chaque métrique : une évolution inverse au-delà de la tolérance est une régression
+METRICS = {
+    'pages_per_sec': 'higher',
+    'images_per_sec': 'higher',
+    'parse_ms_per_page': 'lower',
+    'peak_rss_mb': 'lower',
+}
+
+
+def _serve(catalogue_options, latency, error_rate, seed, port_queue, stop_event):
+    """Processus serveur : sert le catalogue jusqu'à ce que `stop_event` soit positionné."""
+    catalogue = MockCatalogue(seed=seed, **catalogue_options)
+    with MockServer(catalogue, latency, error_rate, seed=seed) as server:
+        port_queue.put(server.port)
+        stop_event.wait()
+
+
+@contextlib.contextmanager
+def mock_server_process(catalogue_options, latency=0.0, error_rate=0.0, seed=0):
+    """
+    Lance un MockServer dans un processus séparé, le temps d'un bloc `with`.
+
+    Args:
+        catalogue_options (dict): Paramètres du MockCatalogue (categories, books_per_category, etc.).
+        latency (float): Délai ajouté à chaque requête, en secondes.
+        error_rate (float): Proportion de requêtes répondant par une erreur 503.
+        seed (int): Graine du catalogue et des erreurs injectées.
+
+    Yields:
+        str: URL de base du site servi.
+    """
+    port_queue = multiprocessing.Queue()
+    stop_event = multiprocessing.Event()
+    process = multiprocessing.Process(target=_serve, daemon=True,
+                                      args=(catalogue_options, latency, error_rate, seed, port_queue, stop_event))
+    process.start()
+    try:
+        yield f"http://127.0.0.1:{port_queue.get(timeout=60)}/"
+    finally:
+        stop_event.set()
+        process.join(timeout=10)
+
+
+def peak_rss_mb():
+    """Retourne le pic de mémoire résidente du processus, en Mo (None si la mesure est indisponible)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024  # Octets sous macOS, Ko ailleurs
+
+
+def count_csv_rows(directory):
+    """Compte les livres écrits dans les fichiers CSV d'un répertoire."""
+    rows = 0
+    for filename in glob.glob(os.path.join(directory, '*.csv')):
+        with open(filename, newline='', encoding='utf-8') as file:
+            rows += max(0, sum(1 for _ in csv.reader(file)) - 1)  # Sans l'en-tête
+    return rows
+
+
+def run_benchmark(config):
+    """
+    Lance le scraper complet sur un catalogue local et mesure ses performances.
+
+    Args:
+        config (dict): Scénario du benchmark (taille du catalogue, latence, erreurs, moteur, concurrence).
+
+    Returns:
+        dict: Le scénario ('config'), les métriques ('metrics') et les compteurs du run ('counts').
+    """
+    catalogue_options = {
+        'categories': config['categories'],
+        'books_per_category': config['books'],
+        'books_per_page': config['per_page'],
+        'image_size': config['image_size'],
+    }
+    with mock_server_process(catalogue_options, config['latency'], config['error_rate'], config['seed']) as url, \
+            tempfile.TemporaryDirectory() as directory:
+        client = HttpClient(pool_maxsize=config['max_per_host'] + config['image_workers'])
+        options = {
+            'http_client': client,
+            'csv_directory': os.path.join(directory, 'datas_csv'),
+            'image_directory': os.path.join(directory, 'book_images'),
+            'image_workers': config['image_workers'],
+            'page_workers': config['page_workers'],
+            'parser_backend': config['parser'],
+            'parse_workers': config['parse_workers'],
+            'parse_batch_size': config['parse_batch_size'],
+        }
+        if config['engine'] == 'async':
+            manager = AsyncScraperManager(url, max_per_host=config['max_per_host'], **options)
+        else:
+            manager = ScraperManager(url, **options)
+
+        start = time.perf_counter()
+        manager.extract_all_books()
+        duration = time.perf_counter() - start
+
+        server_stats = client.get(url + STATS_PATH.lstrip('/'), timeout=10).json()
+        books = count_csv_rows(options['csv_directory'])
+        client.close()
+
+    parse = manager.metrics.report()['stages'].get('parse', {})
+    return {
+        'config': config,
+        'metrics': {
+            'pages_per_sec': server_stats['pages'] / duration,
+            'images_per_sec': server_stats['images'] / duration,
+            'parse_ms_per_page': parse['mean'] * 1000 if parse.get('count') else None,
+            'peak_rss_mb': peak_rss_mb(),
+        },
+        'counts': {
+            'duration_sec': duration,
+            'books': books,
+            'pages': server_stats['pages'],
+            'images': server_stats['images'],
+            'errors': server_stats['errors'],
+        },
+    }
+
+
+def compare_with_baseline(metrics, baseline_metrics, tolerance):
+    """
+    Compare des métriques à une référence.
+
+    Args:
+        metrics (dict): Métriques du run courant.
+        baseline_metrics (dict): Métriques de référence.
+        tolerance (float): Dégradation relative tolérée (0.1 pour 10 %).
+
+    Returns:
+        list: Pour chaque métrique comparable, un tuple (nom, valeur, référence, variation relative, régression).
+    """
+    comparisons = []
+    for name, direction in METRICS.items():
+        value, reference = metrics.get(name), baseline_metrics.get(name)
+        if value is None or not reference:
+            continue
+        change = (value - reference) / reference
+        regression = change < -tolerance if direction == 'higher' else change > tolerance
+        comparisons.append((name, value, reference, change, regression))
+    return comparisons
+
+
+def print_report(result, comparisons=None):
+    """Affiche les métriques d'un run et, le cas échéant, leur comparaison avec la référence."""
+    counts = result['counts']
+    print(f"{counts['books']} livres, {counts['pages']} pages, {counts['images']} images, "
+          f"{counts['errors']} erreurs injectées en {counts['duration_sec']:.2f} s")
+    if comparisons is None:
+        for name, value in result['metrics'].items():
+            print(f"  {name:<20} {_format(value)}")
+        return
+    for name, value, reference, change, regression in comparisons:
+        flag = '  RÉGRESSION' if regression else ''
+        print(f"  {name:<20} {_format(value)}  (référence {_format(reference)}, {change:+.1%}){flag}")
+
+
+def _format(value):
+    """Formate une valeur de métrique pour l'affichage."""
+    return 'n/d' if value is None else f"{value:10.2f}"
+
+
+def parse_args(argv=None):
+    """Analyse les arguments de la ligne de commande du benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark du scraper sur un catalogue local.")
+    parser.add_argument('--categories', type=int, default=5, help="Nombre de catégories du catalogue.")
+    parser.add_argument('--books', type=int, default=40, help="Nombre de livres par catégorie.")
+    parser.add_argument('--per-page', type=int, default=20, help="Nombre de livres par page de liste.")
+    parser.add_argument('--image-size', type=int, default=8192, help="Taille des images, en octets.")
+    parser.add_argument('--latency', type=float, default=0.0, help="Délai ajouté à chaque requête, en secondes.")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Proportion de requêtes en erreur 503.")
+    parser.add_argument('--seed', type=int, default=0, help="Graine du catalogue et des erreurs injectées.")
+    parser.add_argument('--engine', choices=['sync', 'async'], default='sync', help="Moteur de crawl.")
+    parser.add_argument('--max-per-host', type=int, default=10,
+                        help="Nombre maximal de requêtes simultanées par hôte en mode async.")
+    parser.add_argument('--image-workers', type=int, default=4, help="Nombre de téléchargements d'images simultanés.")
+    parser.add_argument('--page-workers', type=int, default=4,
+                        help="Nombre de pages de liste d'une catégorie téléchargées simultanément.")
+    parser.add_argument('--parser', choices=['lxml', 'html.parser'], default=None,
+                        help="Backend de parsing des pages produit.")
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help="Nombre de processus de parsing des pages produit (0 : parsing dans le crawler).")
+    parser.add_argument('--parse-batch-size', type=int, default=16,
+                        help="Nombre de pages envoyées à un processus de parsing en une fois.")
+    parser.add_argument('--baseline', help="Fichier JSON de référence auquel comparer les résultats.")
+    parser.add_argument('--save-baseline', help="Enregistre les résultats comme nouvelle référence dans ce fichier.")
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help="Dégradation relative tolérée avant de signaler une régression (0.1 = 10 %%).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Lance le benchmark et affiche ses résultats.
+
+    Returns:
+        int: 1 si une régression a été détectée par rapport à la référence, sinon 0.
+    """
+    args = parse_args(argv)
+    configure_logging('ERROR')  # Seules les erreurs du scraper s'affichent
+    config = {name: getattr(args, name) for name in (
+        'categories', 'books', 'per_page', 'image_size', 'latency', 'error_rate', 'seed',
+        'engine', 'max_per_host', 'image_workers', 'page_workers', 'parser', 'parse_workers', 'parse_batch_size')}
+    result = run_benchmark(config)
+
+    comparisons = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        if baseline['config'] != config:
+            print("ATTENTION : le scénario diffère de celui de la référence, la comparaison est indicative.")
+        comparisons = compare_with_baseline(result['metrics'], baseline['metrics'], args.tolerance)
+    print_report(result, comparisons)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as file:
+            json.dump(result, file, indent=2)
+        print(f"Référence enregistrée dans {args.save_baseline}")
+    return 1 if comparisons and any(comparison[-1] for comparison in comparisons) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
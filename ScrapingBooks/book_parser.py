@@ -0,0 +1,198 @@
+import re
+from urllib.parse import urljoin
+from books import Book
+
+RATING_WORDS = {'One': 1, 'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5}  # Conversion texte à chiffre
+PARSED_TAGS = frozenset(('h1', 'tr', 'p', 'ul', 'img', 'div'))  # Balises utiles d'une page produit
+# Champs toujours extraits, même s'ils ne sont pas demandés : ils déterminent le fichier CSV et l'image du livre
+REQUIRED_FIELDS = frozenset(('product_book_url', 'upc', 'category'))
+ALL_FIELDS = frozenset(Book.CSV_FIELDNAMES)
+
+
+def parse_html(content, backend='html.parser'):
+    """
+    Parse un contenu HTML avec BeautifulSoup.
+
+    bs4 n'est importé qu'à la première page parsée : les commandes qui ne parsent aucune page (aide,
+    coordinateur d'un crawl réparti, etc.) démarrent plus vite.
+
+    Args:
+        content (bytes): Contenu HTML.
+        backend (str): Backend de parsing ('lxml' ou 'html.parser').
+
+    Returns:
+        BeautifulSoup: La page parsée.
+    """
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(content, backend)
+
+
+def default_backend():
+    """
+    Retourne le meilleur backend de parsing disponible pour BeautifulSoup.
+
+    Returns:
+        str: 'lxml' si la bibliothèque est installée, sinon 'html.parser' (inclus dans Python).
+    """
+    try:
+        import lxml  # noqa: F401
+        return 'lxml'
+    except ImportError:
+        return 'html.parser'
+
+
+class BookPageParser:
+    """
+    Extrait en une seule passe toutes les données d'une page produit pour construire un objet Book.
+
+    Contrairement aux méthodes extract_* de DataExtractor, qui parcourent chacune l'arbre HTML,
+    le parser repère en un seul parcours les balises utiles (titre, tableau produit, notation,
+    disponibilité, fil d'Ariane, image et description) puis en déduit tous les champs.
+
+    Attributs :
+        backend (str): Backend de parsing utilisé par BeautifulSoup ('lxml' ou 'html.parser').
+        fields (frozenset): Champs extraits (colonnes de Book.CSV_FIELDNAMES), ou None pour tous. Les autres
+        valent None : sans la description, par exemple, ni son nettoyage ni unidecode ne sont exécutés.
+    """
+    def __init__(self, backend=None, fields=None):
+        """
+        Initialise le parser avec un backend de parsing.
+
+        Paramètres :
+            backend (str, optionnel): Backend BeautifulSoup à utiliser. Par défaut, lxml s'il est
+            installé, sinon html.parser.
+            fields (iterable, optionnel): Champs à extraire (colonnes de Book.CSV_FIELDNAMES), en plus de
+            REQUIRED_FIELDS. Par défaut, tous les champs.
+        """
+        self.backend = backend if backend else default_backend()
+        self.fields = REQUIRED_FIELDS.union(fields) if fields is not None else None
+
+    def parse(self, content, book_url):
+        """
+        Parse le contenu HTML d'une page produit et retourne le livre correspondant.
+
+        Args:
+            content (bytes): Contenu HTML de la page, ou None si le téléchargement a échoué.
+            book_url (str): URL de la page du livre.
+
+        Returns:
+            Book: Le livre extrait. Seule l'URL est renseignée si le contenu est absent.
+        """
+        if content is None:
+            return Book(product_book_url=book_url)
+        return self.parse_soup(parse_html(content, self.backend), book_url)
+
+    def parse_soup(self, soup, book_url):
+        """
+        Extrait les données d'un livre (tous les champs, ou ceux demandés) depuis une page produit déjà parsée.
+
+        Args:
+            soup (BeautifulSoup): Page produit parsée.
+            book_url (str): URL de la page du livre.
+
+        Returns:
+            Book: Le livre extrait. Les champs introuvables ou non demandés valent None.
+        """
+        title_tag = rating_tag = availability_tag = breadcrumb_tag = image_tag = description_tag = None
+        rows = []
+        for tag in soup.descendants:  # Parcours unique du document
+            name = tag.name
+            if name not in PARSED_TAGS:
+                continue  # Texte, commentaires et balises sans intérêt
+            if name == 'tr':
+                rows.append(tag)
+            elif name == 'p':
+                classes = tag.get('class') or []
+                if rating_tag is None and 'star-rating' in classes:
+                    rating_tag = tag
+                if availability_tag is None and ' '.join(classes) == 'instock availability':
+                    availability_tag = tag
+            elif name == 'h1':
+                title_tag = title_tag or tag
+            elif name == 'ul':
+                if breadcrumb_tag is None and 'breadcrumb' in (tag.get('class') or []):
+                    breadcrumb_tag = tag
+            elif name == 'img':
+                image_tag = image_tag or tag
+            elif description_tag is None and tag.get('id') == 'product_description':
+                description_tag = tag
+
+        fields = self.fields if self.fields is not None else ALL_FIELDS
+        return Book(
+            product_book_url=book_url,
+            title=_safe_field(fields, 'title', _parse_title, title_tag),
+            upc=_safe_field(fields, 'upc', _parse_upc, rows),
+            price_incl_tax=_safe_field(fields, 'price_including_tax', _parse_price, rows, 3),
+            price_excl_tax=_safe_field(fields, 'price_excluding_tax', _parse_price, rows, 2),
+            availability=_safe_field(fields, 'availability', _parse_availability, availability_tag),
+            review_rating=_safe_field(fields, 'review_rating', _parse_rating, rating_tag),
+            category=_safe_field(fields, 'category', _parse_category, breadcrumb_tag),
+            image_url=_safe_field(fields, 'image_url', _parse_image_url, image_tag, book_url),
+            product_description=_safe_field(fields, 'product_description', _parse_description, description_tag),
+        )
+
+
+def _safe(parse_field, *args):
+    """Applique une fonction d'extraction et retourne None en cas d'erreur (élément absent, etc.)."""
+    try:
+        return parse_field(*args)
+    except Exception:
+        return None
+
+
+def _safe_field(fields, name, parse_field, *args):
+    """Comme _safe, mais seulement si le champ fait partie des champs demandés (sinon None)."""
+    return _safe(parse_field, *args) if name in fields else None
+
+
+def _parse_title(tag):
+    """Extrait et transforme la casse titre"""
+    return tag.text.strip().lower()
+
+
+def _parse_upc(rows):
+    """Extrait l'UPC depuis la première ligne du tableau produit."""
+    return rows[0].td.text
+
+
+def _parse_price(rows, index):
+    """Extrait un prix du tableau produit en enlevant le sigle Livre."""
+    return float(rows[index].td.text.strip()[1:])
+
+
+def _parse_availability(tag):
+    """Extrait le nombre d'exemplaires disponibles depuis le texte 'In stock (N available)'."""
+    num_available = tag.text.replace('In stock', '') \
+                            .replace('(', '') \
+                            .replace(')', '') \
+                            .replace('available', '') \
+                            .strip()
+    return int(num_available)
+
+
+def _parse_rating(tag):
+    """Convertit la classe CSS de notation en nombre d'étoiles (0 si le mot est inconnu)."""
+    return RATING_WORDS.get(tag['class'][1], 0)
+
+
+def _parse_category(tag):
+    """Extrait le nom de la catégorie depuis le fil d'Ariane."""
+    return tag.find_all('a')[2].text.strip()
+
+
+def _parse_image_url(tag, book_url):
+    """Construit l'URL absolue de l'image de couverture, relative à l'URL de la page du livre."""
+    return urljoin(book_url, tag['src'])
+
+
+def _parse_description(tag):
+    """Extrait, nettoie et décode le texte de description du produit."""
+    if tag is None:
+        return None
+    from unidecode import unidecode  # Importé seulement si une description est extraite
+    description = tag.find_next_sibling('p').text
+    description = description.replace('/', '')
+    description = description.replace('&amp;', '&')
+    description = re.sub(' +', ' ', description)
+    description = description.strip()
+    return unidecode(description)
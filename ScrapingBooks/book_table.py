@@ -0,0 +1,245 @@
+import csv
+import math
+import sys
+from array import array
+from books import Book
+
+MISSING_INT = -1  # Valeur des colonnes entières lorsque la donnée est absente (None)
+
+
+class BookTable:
+    """
+    Stocke un grand nombre de livres en colonnes plutôt qu'en objets Book.
+
+    Les prix sont conservés dans des tableaux typés de flottants (NaN si absents), la disponibilité
+    et la notation dans des tableaux d'entiers (-1 si absentes), et la catégorie sous forme de code
+    entier renvoyant vers une liste de noms internés. Les colonnes texte restent des listes de str.
+    Cette représentation réduit fortement la mémoire nécessaire pour analyser des historiques de
+    plusieurs millions de livres, et les filtres et agrégats parcourent directement les colonnes.
+
+    Attributs :
+        categories (list): Noms des catégories, indexés par leur code.
+        category_codes (array): Code de la catégorie de chaque livre.
+        price_incl_tax (array): Prix taxes incluses de chaque livre.
+        price_excl_tax (array): Prix hors taxes de chaque livre.
+        availability (array): Nombre d'exemplaires disponibles de chaque livre.
+        review_rating (array): Notation (1 à 5) de chaque livre.
+        product_book_urls, titles, upcs, image_urls, product_descriptions (list): Colonnes texte.
+    """
+    def __init__(self):
+        """Initialise une table vide."""
+        self.categories = []
+        self._category_index = {}
+        self.category_codes = array('H')
+        self.price_incl_tax = array('d')
+        self.price_excl_tax = array('d')
+        self.availability = array('i')
+        self.review_rating = array('b')
+        self.product_book_urls = []
+        self.titles = []
+        self.upcs = []
+        self.image_urls = []
+        self.product_descriptions = []
+
+    @classmethod
+    def from_books(cls, books):
+        """
+        Construit une table à partir d'objets Book.
+
+        Args:
+            books (iterable): Les livres à stocker.
+
+        Returns:
+            BookTable: La table construite.
+        """
+        table = cls()
+        for book in books:
+            table.append(book)
+        return table
+
+    @classmethod
+    def from_csv(cls, filenames, with_descriptions=True):
+        """
+        Construit une table à partir de fichiers CSV produits par le scraper (un par catégorie).
+
+        Les colonnes sont repérées par l'en-tête de chaque fichier : celles qui en sont absentes (sélection
+        de colonnes) valent None.
+
+        Args:
+            filenames (iterable): Chemins des fichiers CSV à charger.
+            with_descriptions (bool): Charger la colonne des descriptions, de loin la plus volumineuse.
+
+        Returns:
+            BookTable: La table construite.
+        """
+        table = cls()
+        for filename in filenames:
+            with open(filename, mode='r', newline='', encoding='utf-8') as file:
+                reader = csv.reader(file)
+                header = next(reader, None) or []
+                positions = [header.index(name) if name in header else None for name in Book.CSV_FIELDNAMES]
+                if not with_descriptions:
+                    positions[-1] = None
+                for row in reader:
+                    values = [row[position] if position is not None else None for position in positions]
+                    table._append_values(
+                        values[0], values[1], values[2], _to_float(values[3]), _to_float(values[4]),
+                        _to_int(values[5]), _to_int(values[6]), values[7], values[8], values[9],
+                    )
+        return table
+
+    def append(self, book):
+        """
+        Ajoute un livre à la table.
+
+        Args:
+            book (Book): Le livre à ajouter.
+        """
+        self._append_values(*book.to_row())
+
+    def __len__(self):
+        return len(self.category_codes)
+
+    def __iter__(self):
+        return (self.book(index) for index in range(len(self)))
+
+    def book(self, index):
+        """
+        Reconstruit l'objet Book stocké à une position donnée.
+
+        Args:
+            index (int): Position du livre dans la table.
+
+        Returns:
+            Book: Le livre correspondant.
+        """
+        price_incl_tax = self.price_incl_tax[index]
+        price_excl_tax = self.price_excl_tax[index]
+        availability = self.availability[index]
+        review_rating = self.review_rating[index]
+        return Book(
+            product_book_url=self.product_book_urls[index],
+            title=self.titles[index],
+            upc=self.upcs[index],
+            price_incl_tax=None if math.isnan(price_incl_tax) else price_incl_tax,
+            price_excl_tax=None if math.isnan(price_excl_tax) else price_excl_tax,
+            availability=None if availability == MISSING_INT else availability,
+            review_rating=None if review_rating == MISSING_INT else review_rating,
+            category=self.categories[self.category_codes[index]],
+            image_url=self.image_urls[index],
+            product_description=self.product_descriptions[index],
+        )
+
+    def filter(self, mask):
+        """
+        Retourne une nouvelle table ne contenant que les livres sélectionnés par un masque.
+
+        Args:
+            mask (iterable): Un booléen par livre de la table.
+
+        Returns:
+            BookTable: La table filtrée (les codes de catégorie sont conservés).
+        """
+        indexes = [index for index, keep in enumerate(mask) if keep]
+        table = BookTable()
+        table.categories = list(self.categories)
+        table._category_index = dict(self._category_index)
+        table.category_codes = array('H', (self.category_codes[i] for i in indexes))
+        table.price_incl_tax = array('d', (self.price_incl_tax[i] for i in indexes))
+        table.price_excl_tax = array('d', (self.price_excl_tax[i] for i in indexes))
+        table.availability = array('i', (self.availability[i] for i in indexes))
+        table.review_rating = array('b', (self.review_rating[i] for i in indexes))
+        table.product_book_urls = [self.product_book_urls[i] for i in indexes]
+        table.titles = [self.titles[i] for i in indexes]
+        table.upcs = [self.upcs[i] for i in indexes]
+        table.image_urls = [self.image_urls[i] for i in indexes]
+        table.product_descriptions = [self.product_descriptions[i] for i in indexes]
+        return table
+
+    def category_mask(self, category):
+        """
+        Construit le masque des livres appartenant à une catégorie.
+
+        Args:
+            category (str): Nom de la catégorie.
+
+        Returns:
+            list: Un booléen par livre de la table.
+        """
+        code = self._category_index.get(category)
+        return [current == code for current in self.category_codes]
+
+    def low_stock(self, threshold=5):
+        """
+        Sélectionne les livres dont le stock connu est inférieur ou égal à un seuil.
+
+        Args:
+            threshold (int): Nombre d'exemplaires à partir duquel le stock est considéré comme faible.
+
+        Returns:
+            BookTable: Les livres en stock faible.
+        """
+        return self.filter(MISSING_INT < available <= threshold for available in self.availability)
+
+    def mean_price_by_category(self, column='price_incl_tax'):
+        """
+        Calcule le prix moyen de chaque catégorie (les prix absents sont ignorés).
+
+        Args:
+            column (str): Colonne de prix à utiliser ('price_incl_tax' ou 'price_excl_tax').
+
+        Returns:
+            dict: Prix moyen par nom de catégorie.
+        """
+        totals = [0.0] * len(self.categories)
+        counts = [0] * len(self.categories)
+        for code, price in zip(self.category_codes, getattr(self, column)):
+            if not math.isnan(price):
+                totals[code] += price
+                counts[code] += 1
+        return {name: totals[code] / counts[code] for code, name in enumerate(self.categories) if counts[code]}
+
+    def count_by_category(self):
+        """
+        Compte les livres de chaque catégorie.
+
+        Returns:
+            dict: Nombre de livres par nom de catégorie.
+        """
+        counts = [0] * len(self.categories)
+        for code in self.category_codes:
+            counts[code] += 1
+        return {name: counts[code] for code, name in enumerate(self.categories) if counts[code]}
+
+    def _append_values(self, product_book_url, title, upc, price_incl_tax, price_excl_tax, availability,
+                       review_rating, category, image_url, product_description):
+        """Ajoute les valeurs d'un livre à chaque colonne."""
+        self.category_codes.append(self._category_code(category))
+        self.price_incl_tax.append(math.nan if price_incl_tax is None else price_incl_tax)
+        self.price_excl_tax.append(math.nan if price_excl_tax is None else price_excl_tax)
+        self.availability.append(MISSING_INT if availability is None else availability)
+        self.review_rating.append(MISSING_INT if review_rating is None else review_rating)
+        self.product_book_urls.append(product_book_url)
+        self.titles.append(title)
+        self.upcs.append(upc)
+        self.image_urls.append(image_url)
+        self.product_descriptions.append(product_description)
+
+    def _category_code(self, category):
+        """Retourne le code d'une catégorie, en l'ajoutant à la liste des catégories si nécessaire."""
+        code = self._category_index.get(category)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(sys.intern(category) if category is not None else None)
+            self._category_index[category] = code
+        return code
+
+
+def _to_float(value):
+    """Convertit une cellule CSV en flottant (None si la cellule est vide)."""
+    return float(value) if value else None
+
+
+def _to_int(value):
+    """Convertit une cellule CSV en entier (None si la cellule est vide)."""
+    return int(value) if value else None
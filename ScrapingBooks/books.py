@@ -1,8 +1,10 @@
-from requests.exceptions import ConnectionError, Timeout
-import requests
-import time
+from requests.exceptions import ConnectionError
+import logging
 import os
 from utils import clean_filename
+from http_client import get_default_client
+
+logger = logging.getLogger(__name__)
 
 
 class Book:
@@ -22,6 +24,18 @@ class Book:
         product_description (str): Description du livre.
     """
 
+    # Pas de __dict__ par instance : un livre n'occupe que la place de ses dix attributs
+    __slots__ = (
+        'product_book_url', 'title', 'upc', 'price_incl_tax', 'price_excl_tax',
+        'availability', 'review_rating', 'category', 'image_url', 'product_description',
+    )
+
+    # Noms des colonnes des fichiers CSV, dans l'ordre des clés de to_dict()
+    CSV_FIELDNAMES = (
+        'product_book_url', 'title', 'upc', 'price_including_tax', 'price_excluding_tax',
+        'availability', 'review_rating', 'category', 'image_url', 'product_description',
+    )
+
     def __init__(self, product_book_url=None, title=None, upc=None, price_incl_tax=None,
                  price_excl_tax=None, availability=None, review_rating=None, category=None,
                  image_url=None, product_description=None):
@@ -56,56 +70,138 @@ class Book:
             'product_description': self.product_description,
         }
 
-    def fetch_image_with_retries(self, url, max_retries=3, timeout=10):
+    def to_row(self):
+        """
+        Convertit les attributs du livre en un tuple, dans l'ordre de CSV_FIELDNAMES.
+
+        Moins coûteux que to_dict() lorsque les noms des champs sont déjà connus (écriture CSV).
+
+        Returns:
+            tuple: Les valeurs des champs du livre.
+        """
+        return (
+            self.product_book_url, self.title, self.upc, self.price_incl_tax, self.price_excl_tax,
+            self.availability, self.review_rating, self.category, self.image_url, self.product_description,
+        )
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Reconstruit un livre à partir d'une ligne de fichier CSV (inverse de to_row).
+
+        Args:
+            row (list): Les valeurs de la ligne, sous forme de chaînes, dans l'ordre de CSV_FIELDNAMES.
+
+        Returns:
+            Book: Le livre, avec ses prix, sa disponibilité et sa notation convertis (None si la cellule est vide).
+        """
+        values = [value if value != '' else None for value in row]
+        for index, convert in ((3, float), (4, float), (5, int), (6, int)):
+            if values[index] is not None:
+                values[index] = convert(values[index])
+        return cls(*values)
+
+    def fetch_image_with_retries(self, url, client=None, revalidate=False):
         """
-        Télécharge une image en effectuant jusqu'à `max_retries` tentatives.
+        Télécharge une image avec la politique de nouvelles tentatives du client HTTP (voir FetchScheduler).
+
+        Les erreurs temporaires sont retentées avec une attente exponentielle tirée au hasard (jitter) ou
+        la durée indiquée par Retry-After, pour que des téléchargements en parallèle ne réessaient pas tous
+        au même instant. Le corps de la réponse n'est pas chargé en mémoire (stream) : il doit être lu avec
+        `iter_content` puis la réponse fermée.
 
         Args:
             url (str): URL de l'image à télécharger.
-            max_retries (int): Nombre maximal de tentatives de téléchargement.
-            timeout (int): Temps d'attente maximal pour chaque tentative, en secondes.
+            client (HttpClient, optionnel): Client HTTP à utiliser. Par défaut, le client partagé.
+            revalidate (bool): Envoyer une requête conditionnelle via le cache HTTP du client, si configuré.
 
         Returns:
-            response: L'objet Response contenant les données de l'image en cas de succès.
+            response: L'objet Response contenant les données de l'image en cas de succès,
+            ou une réponse 304 sans contenu si l'image n'a pas changé depuis le dernier téléchargement.
 
         Raises:
-            ConnectionError: En cas d'échec après `max_retries` tentatives.
+            ConnectionError: Si l'image a été abandonnée (erreur définitive ou tentatives épuisées).
+        """
+        client = client if client else get_default_client()
+        response = client.fetch(url, store_body=False, revalidate=revalidate, stream=True)
+        if response is None:
+            raise ConnectionError(f"Echec du téléchargement de {url}")
+        return response
+
+    def probe_image_size(self, client=None, timeout=10):
+        """
+        Demande au serveur la taille de l'image de couverture, sans la télécharger (requête HEAD).
+
+        Args:
+            client (HttpClient, optionnel): Client HTTP à utiliser. Par défaut, le client partagé.
+            timeout (int): Temps d'attente maximal, en secondes.
+
+        Returns:
+            int: La taille annoncée (Content-Length), ou None si elle n'est pas connue.
         """
-        retries = 0
-        while retries < max_retries:
-            try:
-                response = requests.get(url, timeout=timeout)
-                response.raise_for_status()
-                return response  # Succès, retourne la réponse
-            except (ConnectionError, Timeout) as e:
-                print(f"Tentative {retries + 1}/{max_retries} échouée pour {url}: {e}")
-                retries += 1
-                time.sleep(2)
-        raise ConnectionError(f"Echec après {max_retries} tentatives pour {url}")
-
-    def save_cover_image(self, base_directory='book_images'):
+        client = client if client else get_default_client()
+        try:
+            response = client.head(self.image_url, timeout=timeout)
+            response.raise_for_status()
+            return int(response.headers['Content-Length'])
+        except Exception:
+            return None
+
+    def save_cover_image(self, base_directory='book_images', client=None, store=None):
         """
         Sauvegarde l'image de couverture du livre dans le répertoire spécifié.
 
         L'image est sauvegardée dans un sous-répertoire correspondant à la catégorie du livre,
-        et le nom du fichier est basé sur l'UPC du livre.
+        et le nom du fichier est basé sur l'UPC du livre. Le contenu est écrit par blocs au fil
+        du téléchargement dans un fichier temporaire, renommé une fois l'image complète.
 
         Args:
             base_directory (str): Chemin du répertoire de base pour les images sauvegardées.
+            client (HttpClient, optionnel): Client HTTP à utiliser. Par défaut, le client partagé.
+            store (ImageStore, optionnel): Stockage adressé par contenu. S'il est fourni, une image déjà
+            présente dont la taille annoncée par le serveur n'a pas changé n'est pas retéléchargée, et
+            les contenus identiques ne sont enregistrés qu'une fois.
+
+        Returns:
+            bool: True si l'image est sauvegardée ou inchangée, False en cas d'échec.
 
         Note:
-            Si le téléchargement de l'image échoue après plusieurs tentatives, un message d'erreur est affiché.
+            Si le téléchargement de l'image échoue après plusieurs tentatives, une erreur est journalisée.
+            Si l'image existe déjà et que le cache HTTP indique qu'elle n'a pas changé, elle n'est pas réécrite.
         """
+        if not (self.image_url and self.category and self.upc):
+            logger.warning("Image non sauvegardée, page du livre incomplète : %s", self.product_book_url)
+            return False
         category_cleaned = clean_filename(self.category)
         image_save_path = os.path.join(base_directory, category_cleaned, f"{self.upc}.jpg")
 
         try:
-            response = self.fetch_image_with_retries(self.image_url)  # Utilise la méthode avec tentatives de connexions
-            os.makedirs(os.path.dirname(image_save_path), exist_ok=True)
-            with open(image_save_path, 'wb') as file:
-                file.write(response.content)
-            print(f"Image sauvegardée : {image_save_path}")
+            known_size = store.known_size(self.upc, image_save_path) if store is not None else None
+            if known_size is not None and self.probe_image_size(client) == known_size:
+                logger.debug("Image déjà présente : %s", image_save_path)
+                return True
+            # Utilise la méthode avec tentatives de connexions
+            response = self.fetch_image_with_retries(self.image_url, client=client,
+                                                     revalidate=os.path.exists(image_save_path))
+            with response:
+                if response.status_code == 304:
+                    logger.debug("Image inchangée : %s", image_save_path)
+                    return True
+                chunks = response.iter_content(chunk_size=64 * 1024)
+                if store is not None:
+                    store.save(self.upc, chunks, image_save_path)
+                else:
+                    os.makedirs(os.path.dirname(image_save_path), exist_ok=True)
+                    temp_path = f"{image_save_path}.part"
+                    with open(temp_path, 'wb') as file:
+                        for chunk in chunks:
+                            file.write(chunk)
+                    os.replace(temp_path, image_save_path)
+            logger.debug("Image sauvegardée : %s", image_save_path, extra={'upc': self.upc})
+            return True
         except ConnectionError as e:
-            print(f"Erreur de du téléchargement de l'image pour {self.upc} après plusieurs tentatives : {e}")
+            logger.error("Échec du téléchargement de l'image pour %s : %s", self.upc, e, extra={'upc': self.upc})
         except Exception as e:
-            print(f"Erreur lors du téléchargement de l'image pour {self.upc} : {e}")
+            logger.exception("Erreur lors de la sauvegarde de l'image pour %s : %s", self.upc, e,
+                             extra={'upc': self.upc})
+        return False
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+def fingerprint(book):
+    """
+    Calcule l'empreinte compacte d'un livre (hash de tous les champs de to_dict()).
+
+    Args:
+        book (Book): Le livre.
+
+    Returns:
+        str: L'empreinte, 16 caractères hexadécimaux.
+    """
+    fields = json.dumps(book.to_dict(), sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(fields.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class CrawlDiff:
+    """
+    Détecte les livres ajoutés, retirés et modifiés depuis le passage précédent.
+
+    Seule l'empreinte de chaque livre (UPC → hash de ses champs, catégorie et URL) est conservée d'un passage à
+    l'autre.
+    Les livres du nouveau passage sont comparés au fil de l'eau à ces empreintes, et seuls les
+    changements sont écrits dans un fichier delta au format JSONL (une ligne par changement). La mémoire
+    utilisée ne dépend que du nombre d'empreintes, et le traitement est linéaire en nombre de livres.
+
+    Les livres qui n'ont pas été vus à la fin d'un passage complet sont considérés comme retirés. Un passage
+    partiel (reprise d'un passage interrompu, dont les livres déjà écrits ne sont pas revus) ne signale aucun
+    retrait et conserve l'empreinte précédente des livres qu'il n'a pas vus. Un passage limité à certaines
+    catégories ne signale que les retraits des catégories qu'il a parcourues. Un livre dont la page n'a pas pu
+    être téléchargée (voir `fail`) n'est ni retiré ni modifié : son empreinte précédente est conservée. Les
+    empreintes ne sont
+    enregistrées que si le passage se termine normalement, afin qu'un passage interrompu ne masque pas de
+    changements au suivant.
+
+    Attributs :
+        directory (str): Répertoire des empreintes et des fichiers delta.
+        delta_path (str): Chemin du fichier delta du passage en cours.
+        complete (bool): Indique si le passage voit tous les livres (sinon, aucun retrait n'est signalé).
+        by_category (bool): Indique si le passage ne parcourt que certaines catégories (les retraits sont
+        alors limités aux catégories dont au moins un livre a été vu).
+        stats (dict): Nombre de livres ajoutés ('added'), modifiés ('changed'), retirés ('removed')
+        et inchangés ('unchanged').
+    """
+    def __init__(self, directory='deltas', complete=True, by_category=False):
+        """
+        Prépare la comparaison (le passage est démarré par `start`).
+
+        Paramètres :
+            directory (str): Répertoire des empreintes et des fichiers delta.
+            complete (bool): Indique si le passage voit tous les livres.
+            by_category (bool): Indique si le passage ne parcourt que certaines catégories.
+        """
+        self.directory = directory
+        self.delta_path = None
+        self.complete = complete
+        self.by_category = by_category
+        self.stats = {'added': 0, 'changed': 0, 'removed': 0, 'unchanged': 0}
+        self._fingerprints_path = os.path.join(directory, 'fingerprints.json')
+        self._previous = {}
+        self._current = {}
+        self._categories = set()
+        self._failed_urls = set()
+        self._file = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Charge les empreintes du passage précédent et ouvre le fichier delta du nouveau passage."""
+        os.makedirs(self.directory, exist_ok=True)
+        self._previous = {}
+        if os.path.exists(self._fingerprints_path):
+            with open(self._fingerprints_path, encoding='utf-8') as file:
+                for upc, entry in json.load(file).items():
+                    # Anciennes empreintes : UPC → hash, puis UPC → [hash, catégorie]
+                    entry = entry if isinstance(entry, list) else [entry]
+                    self._previous[upc] = tuple(entry) + (None,) * (3 - len(entry))
+        self._current = {}
+        self._categories = set()
+        self._failed_urls = set()
+        self.stats = dict.fromkeys(self.stats, 0)
+        name = f"delta-{time.strftime('%Y%m%d-%H%M%S')}"
+        self.delta_path = os.path.join(self.directory, f"{name}.jsonl")
+        suffix = 1
+        while os.path.exists(self.delta_path):  # Plusieurs passages dans la même seconde
+            suffix += 1
+            self.delta_path = os.path.join(self.directory, f"{name}-{suffix}.jsonl")
+        self._file = open(self.delta_path, 'w', encoding='utf-8')
+
+    def add(self, book):
+        """
+        Compare un livre du nouveau passage à son empreinte précédente (les livres sans UPC sont ignorés).
+
+        Args:
+            book (Book): Le livre extrait.
+        """
+        if not book.upc:
+            return  # Page produit non téléchargée
+        digest = fingerprint(book)
+        with self._lock:
+            previous, _, _ = self._previous.pop(book.upc, (None, None, None))
+            self._current[book.upc] = (digest, book.category, book.product_book_url)
+            self._categories.add(book.category)
+            if previous is None:
+                self._write('added', book.upc, book.to_dict())
+            elif previous != digest:
+                self._write('changed', book.upc, book.to_dict())
+            else:
+                self.stats['unchanged'] += 1
+
+    def fail(self, book_url):
+        """
+        Signale un livre dont la page n'a pas pu être téléchargée : il n'est pas considéré comme retiré.
+
+        Args:
+            book_url (str): URL de la page du livre.
+        """
+        with self._lock:
+            self._failed_urls.add(book_url)
+
+    def finish(self):
+        """Écrit les livres retirés, ferme le fichier delta et enregistre les nouvelles empreintes."""
+        with self._lock:
+            for upc, (digest, category, url) in self._previous.items():
+                # Sans URL enregistrée (anciennes empreintes), un livre en échec ne peut pas être reconnu
+                failed = url in self._failed_urls if url is not None else bool(self._failed_urls)
+                if self.complete and not failed and (not self.by_category or category in self._categories):
+                    self._write('removed', upc, None)
+                else:  # Livre non revu (passage partiel ou page en échec) : son empreinte précédente reste valable
+                    self._current[upc] = (digest, category, url)
+            self._file.close()
+            temp_path = f"{self._fingerprints_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(self._current, file)
+            os.replace(temp_path, self._fingerprints_path)
+            self._previous, self._current, self._categories, self._failed_urls = {}, {}, set(), set()
+
+    def abort(self):
+        """Ferme le fichier delta d'un passage interrompu, sans modifier les empreintes enregistrées."""
+        with self._lock:
+            self._file.close()
+            self._previous, self._current, self._categories, self._failed_urls = {}, {}, set(), set()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.finish()
+        else:
+            self.abort()
+
+    def _write(self, change, upc, book):
+        """Écrit une ligne du fichier delta (verrou déjà acquis)."""
+        self._file.write(json.dumps({'change': change, 'upc': upc, 'book': book}, ensure_ascii=False) + '\n')
+        self.stats[change] += 1
@@ -0,0 +1,204 @@
+import json
+import os
+import threading
+
+
+class CrawlJournal:
+    """
+    Journal de progression d'un crawl, qui permet de le reprendre là où il s'est arrêté.
+
+    Le journal est un fichier JSONL auquel les événements sont seulement ajoutés : URLs des catégories
+    découvertes sur la page d'accueil, nom et URLs des livres de chaque catégorie, pages de liste en échec,
+    livres écrits ou en échec, catégories terminées. Les lignes sont écrites par lots (vidées sur disque toutes
+    les `flush_every` lignes et à la fin de chaque catégorie) : tenir le journal ne coûte presque rien, même
+    pour des milliers de livres.
+
+    En reprise, le journal est relu : la page d'accueil et les pages de liste déjà parcourues ne sont pas
+    retéléchargées, les catégories terminées sont ignorées et, dans les autres, seuls les livres en attente
+    ou en échec sont retéléchargés. Une dernière ligne incomplète (arrêt pendant l'écriture) est ignorée.
+    Une catégorie n'est terminée que si tous ses livres ont été écrits ; celle dont une page de liste n'a pas
+    pu être téléchargée n'a pas de liste de livres enregistrée et est reparcourue en reprise.
+
+    Attributs :
+        path (str): Chemin du fichier journal.
+        resume (bool): Reprendre le crawl enregistré dans le journal (sinon, le journal est remis à zéro).
+        flush_every (int): Nombre de lignes écrites avant de vider le tampon sur disque.
+        category_urls (list): URLs des catégories découvertes, ou None si elles ne l'ont pas encore été.
+        failed_books (set): URLs des livres dont la page n'a pas pu être téléchargée (et pas encore écrits).
+        failed_listings (dict): URLs des pages de liste non téléchargées, par URL de catégorie (tant que la
+        liste complète de ses livres n'a pas été enregistrée).
+    """
+    def __init__(self, path='crawl_journal.jsonl', resume=False, flush_every=100):
+        """
+        Prépare le journal (il est ouvert par `start`).
+
+        Paramètres :
+            path (str): Chemin du fichier journal.
+            resume (bool): Reprendre le crawl enregistré dans le journal.
+            flush_every (int): Nombre de lignes écrites avant de vider le tampon sur disque.
+        """
+        self.path = path
+        self.resume = resume
+        self.flush_every = flush_every
+        self.category_urls = None
+        self._categories = {}  # URL de la catégorie -> (nom, URLs des livres)
+        self._done_categories = set()
+        self._done_books = set()
+        self.failed_books = set()
+        self.failed_listings = {}
+        self._file = None
+        self._unflushed = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Relit le journal en mode reprise (ou le remet à zéro) et l'ouvre en ajout."""
+        if self.resume and os.path.exists(self.path):
+            self._load()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'a' if self.resume else 'w', encoding='utf-8')
+
+    def close(self):
+        """Vide le tampon et ferme le journal."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def record_categories(self, category_urls):
+        """
+        Enregistre les URLs des catégories découvertes sur la page d'accueil.
+
+        Args:
+            category_urls (list): URLs des premières pages des catégories.
+        """
+        self._append({'event': 'categories', 'urls': list(category_urls)}, flush=True)
+
+    def record_category(self, category_url, name, book_urls):
+        """
+        Enregistre le nom et les URLs des livres d'une catégorie.
+
+        Args:
+            category_url (str): URL de la première page de la catégorie.
+            name (str): Nom de la catégorie (qui détermine son fichier CSV).
+            book_urls (list): URLs des pages des livres de la catégorie.
+        """
+        self._append({'event': 'category', 'url': category_url, 'name': name, 'books': list(book_urls)}, flush=True)
+
+    def record_listing_failure(self, category_url, page_urls):
+        """
+        Enregistre les pages de liste d'une catégorie qui n'ont pas pu être téléchargées. La liste des livres
+        de la catégorie, incomplète, n'est pas enregistrée : ses pages de liste seront retéléchargées en reprise.
+
+        Args:
+            category_url (str): URL de la première page de la catégorie.
+            page_urls (list): URLs des pages de liste en échec.
+        """
+        self._append({'event': 'listing_failed', 'url': category_url, 'pages': list(page_urls)}, flush=True)
+
+    def record_book(self, book_url):
+        """
+        Enregistre un livre écrit.
+
+        Args:
+            book_url (str): URL de la page du livre.
+        """
+        self._append({'event': 'book', 'url': book_url})
+
+    def record_failure(self, book_url):
+        """
+        Enregistre un livre dont la page n'a pas pu être téléchargée (il sera retenté en reprise).
+
+        Args:
+            book_url (str): URL de la page du livre.
+        """
+        self._append({'event': 'failed', 'url': book_url})
+
+    def finish_category(self, category_url):
+        """
+        Enregistre la fin d'une catégorie dont tous les livres ont été écrits, et vide le tampon sur disque.
+
+        Args:
+            category_url (str): URL de la première page de la catégorie.
+        """
+        self._append({'event': 'category_done', 'url': category_url}, flush=True)
+
+    def category(self, category_url):
+        """
+        Retourne ce que le journal sait d'une catégorie.
+
+        Args:
+            category_url (str): URL de la première page de la catégorie.
+
+        Returns:
+            tuple: Le nom de la catégorie et les URLs de ses livres, ou None si elle n'a pas été parcourue.
+        """
+        with self._lock:
+            return self._categories.get(category_url)
+
+    def is_category_done(self, category_url):
+        """Indique si tous les livres d'une catégorie ont été écrits lors d'un passage précédent."""
+        with self._lock:
+            return category_url in self._done_categories
+
+    def progress(self):
+        """
+        Résume l'état enregistré dans le journal.
+
+        Returns:
+            dict: Nombre de catégories terminées ('categories_done'), de livres écrits ('books_done'), de
+            livres en échec à retenter ('books_failed') et de catégories dont une page de liste est en échec
+            ('listings_failed').
+        """
+        with self._lock:
+            return {'categories_done': len(self._done_categories), 'books_done': len(self._done_books),
+                    'books_failed': len(self.failed_books), 'listings_failed': len(self.failed_listings)}
+
+    def _append(self, record, flush=False):
+        """Ajoute une ligne au journal et tient à jour l'état en mémoire."""
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._apply(record)
+            self._file.write(line)
+            self._unflushed += 1
+            if flush or self._unflushed >= self.flush_every:
+                self._file.flush()
+                self._unflushed = 0
+
+    def _apply(self, record):
+        """Met à jour l'état en mémoire avec un événement du journal (verrou déjà acquis)."""
+        event, url = record['event'], record.get('url')
+        if event == 'categories':
+            self.category_urls = record['urls']
+        elif event == 'category':
+            self._categories[url] = (record['name'], record['books'])
+            self._done_categories.discard(url)
+            self.failed_listings.pop(url, None)
+        elif event == 'listing_failed':
+            self.failed_listings[url] = record['pages']
+        elif event == 'book':
+            self._done_books.add(url)
+            self.failed_books.discard(url)
+        elif event == 'failed':
+            self.failed_books.add(url)
+            self._done_books.discard(url)
+        elif event == 'category_done':
+            self._done_categories.add(url)
+
+    def _load(self):
+        """Relit les événements du journal, en ignorant une dernière ligne incomplète."""
+        with open(self.path, 'rb+') as file:
+            content = file.read()
+            if content and not content.endswith(b'\n'):
+                file.truncate(content.rfind(b'\n') + 1)  # Écriture interrompue par un arrêt du programme
+        with open(self.path, encoding='utf-8') as file:
+            for line in file:
+                self._apply(json.loads(line))
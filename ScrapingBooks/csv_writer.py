@@ -0,0 +1,147 @@
+import csv
+import os
+from books import Book
+from utils import clean_filename
+
+
+def csv_columns(fields):
+    """
+    Valide une sélection de colonnes CSV et la remet dans l'ordre de Book.CSV_FIELDNAMES.
+
+    Args:
+        fields (iterable): Noms des colonnes demandées. 'product_book_url', qui identifie le livre (reprise,
+        suivi des prix), est toujours ajoutée.
+
+    Returns:
+        tuple: Les colonnes sélectionnées, dans l'ordre des fichiers CSV complets.
+
+    Raises:
+        ValueError: Si une colonne est inconnue.
+    """
+    selected = set(fields) | {'product_book_url'}
+    unknown = selected - set(Book.CSV_FIELDNAMES)
+    if unknown:
+        raise ValueError(f"Colonnes inconnues : {', '.join(sorted(unknown))} "
+                         f"(colonnes possibles : {', '.join(Book.CSV_FIELDNAMES)})")
+    return tuple(name for name in Book.CSV_FIELDNAMES if name in selected)
+
+
+class BookCsvWriter:
+    """
+    Écrit au fil de l'eau les livres d'une catégorie dans un fichier CSV.
+
+    Chaque ligne est écrite et vidée sur disque dès que le livre est extrait : un arrêt du programme
+    ne fait perdre que le livre en cours, et la mémoire utilisée ne dépend pas de la taille de la
+    catégorie. En mode reprise, le fichier existant est complété au lieu d'être écrasé (avec ses propres
+    colonnes), et les livres déjà écrits sont connus grâce à `has_book`.
+
+    Attributs :
+        filename (str): Chemin du fichier CSV.
+        fieldnames (tuple): Colonnes du fichier.
+        written_urls (set): URLs des livres déjà présents dans le fichier.
+    """
+    def __init__(self, category, directory='datas_csv', resume=False, fields=None):
+        """
+        Ouvre le fichier CSV d'une catégorie.
+
+        Paramètres :
+            category (str): La catégorie des livres, utilisée pour nommer le fichier CSV.
+            directory (str): Répertoire des fichiers CSV.
+            resume (bool): Compléter le fichier existant au lieu de l'écraser.
+            fields (iterable, optionnel): Colonnes à écrire (voir csv_columns). Par défaut, toutes.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.filename = os.path.join(directory, f"{clean_filename(category)}.csv")
+        self.fieldnames = csv_columns(fields) if fields is not None else Book.CSV_FIELDNAMES
+        self.written_urls = set()
+        if resume and os.path.exists(self.filename):
+            self._load_written_rows()
+            self._file = open(self.filename, mode='a', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._file)
+            if not self.written_urls and self._file.tell() == 0:
+                self._writer.writerow(self.fieldnames)
+        else:
+            self._file = open(self.filename, mode='w', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(self.fieldnames)
+        self._file.flush()
+        # Position de chaque colonne dans Book.to_row(), ou None si toutes les colonnes sont écrites
+        self._indexes = None
+        if self.fieldnames != Book.CSV_FIELDNAMES:
+            self._indexes = [Book.CSV_FIELDNAMES.index(name) for name in self.fieldnames]
+
+    def has_book(self, book_url):
+        """
+        Indique si un livre a déjà été écrit dans le fichier.
+
+        Args:
+            book_url (str): URL de la page du livre.
+
+        Returns:
+            bool: True si le livre est déjà présent.
+        """
+        return book_url in self.written_urls
+
+    def write(self, book):
+        """
+        Écrit un livre dans le fichier et vide le tampon sur disque.
+
+        Args:
+            book (Book): Le livre à écrire.
+        """
+        row = book.to_row()
+        self._writer.writerow(row if self._indexes is None else [row[index] for index in self._indexes])
+        self._file.flush()
+        self.written_urls.add(book.product_book_url)
+
+    def close(self):
+        """Ferme le fichier CSV."""
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _load_written_rows(self):
+        """
+        Relit les URLs des livres déjà écrits, en supprimant une éventuelle dernière ligne incomplète
+        (écriture interrompue par un arrêt du programme).
+        """
+        with open(self.filename, mode='rb+') as file:
+            content = file.read()
+            if content and not content.endswith(b'\n'):
+                file.truncate(content.rfind(b'\n') + 1)
+        with open(self.filename, mode='r', newline='', encoding='utf-8') as file:
+            reader = csv.DictReader(file)
+            for row in reader:
+                self.written_urls.add(row['product_book_url'])
+            if reader.fieldnames:
+                self.fieldnames = tuple(reader.fieldnames)  # Les lignes ajoutées suivent les colonnes du fichier
+
+
+def read_books(category, directory='datas_csv'):
+    """
+    Relit les livres d'une catégorie écrits lors d'un précédent passage.
+
+    Args:
+        category (str): La catégorie des livres, utilisée pour nommer le fichier CSV.
+        directory (str): Répertoire des fichiers CSV.
+
+    Returns:
+        dict: Les livres du fichier (Book), indexés par URL de leur page. Vide si le fichier n'existe pas.
+        Les champs des colonnes absentes du fichier (sélection de colonnes) valent None.
+    """
+    filename = os.path.join(directory, f"{clean_filename(category)}.csv")
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, mode='r', newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if not header or 'product_book_url' not in header:
+            return {}
+        positions = [header.index(name) if name in header else None for name in Book.CSV_FIELDNAMES]
+        books = (Book.from_row([row[position] if position is not None else '' for position in positions])
+                 for row in reader if len(row) == len(header))
+        return {book.product_book_url: book for book in books}
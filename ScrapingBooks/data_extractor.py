@@ -1,8 +1,60 @@
-import requests
-from bs4 import BeautifulSoup
-from unidecode import unidecode
+import functools
 import re
-from urllib.parse import urljoin
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+from http_client import get_default_client
+from books import Book
+from book_parser import RATING_WORDS, parse_html
+
+# Un livre tel qu'affiché sur une page de liste : Book partiel (URL, titre, prix TTC, notation, catégorie)
+# et présence en stock, la page de liste n'indiquant pas le nombre d'exemplaires
+ListingEntry = namedtuple('ListingEntry', ['book', 'in_stock'])
+
+
+def category_slug(category_url):
+    """
+    Retourne l'identifiant d'une catégorie d'après son URL ('.../books/sequential-art_5/index.html' donne
+    'sequential-art').
+    """
+    segments = urlparse(category_url).path.rstrip('/').split('/')
+    slug = segments[-2] if segments[-1].endswith('.html') and len(segments) > 1 else segments[-1]
+    return re.sub(r'_\d+$', '', slug)
+
+
+def select_category_urls(category_urls, categories):
+    """
+    Filtre les URLs des catégories sur une liste de noms.
+
+    Args:
+        category_urls (list): URLs des premières pages des catégories.
+        categories (iterable): Noms des catégories voulues, tels qu'affichés sur le site ('Sequential Art')
+        ou tels qu'écrits dans leur URL ('sequential-art'), sans distinction de casse.
+
+    Returns:
+        tuple: Les URLs des catégories retenues, dans l'ordre du site, et les noms qui ne correspondent à
+        aucune catégorie.
+    """
+    wanted = {'-'.join(name.lower().split()): name for name in categories}
+    selected = [url for url in category_urls if category_slug(url) in wanted]
+    unknown = sorted(set(wanted) - {category_slug(url) for url in selected})
+    return selected, [wanted[slug] for slug in unknown]
+
+
+def memoized_field(extract):
+    """
+    Décorateur des méthodes extract_* : si l'extracteur dispose d'un PageCache, le champ n'est extrait
+    qu'une fois par version de la page, puis relu dans le cache.
+    """
+    @functools.wraps(extract)
+    def wrapper(self):
+        if self.page_cache is None:
+            return extract(self)
+        soup = self.fetch_soup()
+        if soup is None:
+            return extract(self)
+        return self.page_cache.field(self.url, soup, extract.__name__, lambda: extract(self))
+    return wrapper
 
 
 class Scraper:
@@ -12,6 +64,8 @@ class Scraper:
     Attributs :
         url (str): URL cible pour le scraping.
         headers (dict): En-têtes HTTP à utiliser pour les requêtes.
+        client (HttpClient): Client HTTP partagé (session avec pool de connexions).
+        page_cache (PageCache): Cache des pages parsées et des champs extraits, ou None.
         soup (BeautifulSoup): Objet BeautifulSoup pour le parsing HTML.
 
     Méthodes :
@@ -19,16 +73,21 @@ class Scraper:
         set_url: Met à jour l'URL cible du scraper.
         fetch_soup: Récupère et parse le contenu HTML de l'URL cible.
     """
-    def __init__(self, url=None, headers=None):
+    def __init__(self, url=None, headers=None, client=None, page_cache=None):
         """
         Initialise un nouvel objet Scraper avec une URL et des en-têtes optionnels.
 
         Paramètres :
             url (str, optionnel): URL cible pour le scraping.
             headers (dict, optionnel): En-têtes HTTP à utiliser pour les requêtes.
+            client (HttpClient, optionnel): Client HTTP à utiliser. Par défaut, le client partagé.
+            page_cache (PageCache, optionnel): Cache des pages parsées, partagé entre extracteurs : une page
+            revisitée n'est pas reparsée et ses champs déjà extraits sont réutilisés.
         """
         self.url = url
         self.headers = headers if headers else {'User-Agent': 'Mozilla/5.0'}
+        self.client = client if client else get_default_client()
+        self.page_cache = page_cache
         self.soup = None  # Initialiser la propriété soup à None
 
     def set_url(self, url):
@@ -49,16 +108,44 @@ class Scraper:
         self.url = url
         self.soup = None
 
+    def fetch_content(self):
+        """
+        Télécharge le contenu brut de l'URL cible, sans le parser.
+
+        Si le client HTTP dispose d'un cache, une requête conditionnelle est envoyée et le contenu
+        conservé dans le cache est réutilisé lorsque la page n'a pas changé. Les erreurs temporaires sont
+        retentées par le scheduler du client ; une page abandonnée figure dans ses dead letters.
+
+        Returns:
+            bytes: Le contenu HTML de la page, ou None en cas d'échec.
+        """
+        response = self.client.fetch(self.url, headers=self.headers)
+        return response.content if response is not None else None
+
+    def load_soup(self, content):
+        """
+        Parse un contenu HTML déjà téléchargé et le définit comme page courante.
+
+        Args:
+            content (bytes): Contenu HTML de la page, ou None si le téléchargement a échoué.
+
+        Returns:
+            BeautifulSoup: L'objet soup de la page, ou None si aucun contenu n'est fourni.
+        """
+        self.soup = parse_html(content) if content is not None else None
+        return self.soup
+
     def fetch_soup(self):
-        """ Récupère et parse le contenu HTML de l'URL cible en utilisant BeautifulSoup."""
+        """
+        Récupère et parse le contenu HTML de l'URL cible en utilisant BeautifulSoup.
+
+        Avec un PageCache, une page inchangée depuis sa dernière visite n'est pas reparsée.
+        """
         if not self.soup:  # Si soup n'est pas déjà défini
-            try:
-                response = requests.get(self.url, headers=self.headers)
-                response.raise_for_status()
-                self.soup = BeautifulSoup(response.content, 'html.parser')
-            except requests.RequestException as e:
-                print(f"Error retrieving content: {e}")
-                self.soup = None  # Assurez-vous que soup est None en cas d'échec
+            if self.page_cache is not None:
+                self.soup = self.page_cache.soup(self.url, self.fetch_content, parse_html)
+            else:
+                self.load_soup(self.fetch_content())  # soup reste None en cas d'échec
         return self.soup
 
 
@@ -82,8 +169,10 @@ class DataExtractor(Scraper):
         extract_category_urls: Extrait les URLs de toutes les catégories à partir de la page principale.
         extract_book_urls_from_category: Extrait et retourne les URLs
         de tous les livres d'une catégorie donnée, en gérant la pagination si nécessaire.
+        iter_category_pages: Télécharge les pages d'une catégorie, en parallèle si leur nombre est connu.
     """
 
+    @memoized_field
     def extract_title(self):
         """Extrait et transforme la casse titre"""
         soup = self.fetch_soup()
@@ -95,6 +184,7 @@ class DataExtractor(Scraper):
                 return None  # Retourne None si une erreur survient (par exemple, élément non trouvé)
         return None  # Retourne None si `soup` n'est pas défini (page non chargée)
 
+    @memoized_field
     def extract_upc(self):
         """ Extrait le code produit universel (UPC) de la page du produit."""
         soup = self.fetch_soup()
@@ -105,6 +195,7 @@ class DataExtractor(Scraper):
                 return None
         return None
 
+    @memoized_field
     def extract_price_including_tax(self):
         """
         Extrait le prix du livre taxes incluses
@@ -121,6 +212,7 @@ class DataExtractor(Scraper):
                 return None
         return None
 
+    @memoized_field
     def extract_price_excluding_tax(self):
         """
             Extrait le prix du livre hors taxes.
@@ -137,6 +229,7 @@ class DataExtractor(Scraper):
                 return None
         return None
 
+    @memoized_field
     def extract_review_rating(self):
         """
         Extrait la notation en étoiles du produit à partir de la page actuellement chargée.
@@ -161,6 +254,7 @@ class DataExtractor(Scraper):
                 return None
         return None
 
+    @memoized_field
     def extract_category(self):
         """
         Extrait la catégorie du produit depuis la page chargée.
@@ -177,6 +271,7 @@ class DataExtractor(Scraper):
                 return None
         return None
 
+    @memoized_field
     def extract_availability(self):
         """
         Extrait la disponibilité du produit (availability).
@@ -198,6 +293,7 @@ class DataExtractor(Scraper):
                 return None
         return None
 
+    @memoized_field
     def extract_image_url(self):
         """
         Extrait l'URL absolue de l'image principale du produit sur la page web courante.
@@ -206,17 +302,17 @@ class DataExtractor(Scraper):
             str: L'URL absolue de l'image du produit si trouvée, sinon None si une erreur survient
             ou si l'élément n'est pas trouvé dans le document HTML.
         """
-        base_url = 'https://books.toscrape.com/'
         soup = self.fetch_soup()
         if soup:
             try:
                 image_url_relative = soup.find('img')['src']
-                image_url_absolute = urljoin(base_url, image_url_relative.replace('../', ''))
+                image_url_absolute = urljoin(self.url, image_url_relative)
                 return image_url_absolute
             except Exception:
                 return None
         return None
 
+    @memoized_field
     def extrac_product_description(self):
         """
         Extrait le texte de description du produit sur la page web courante.
@@ -230,6 +326,7 @@ class DataExtractor(Scraper):
             try:
                 description_tag = soup.find('div', id='product_description')
                 if description_tag:
+                    from unidecode import unidecode  # Importé seulement si une description est extraite
                     description = description_tag.find_next_sibling('p').text
                     description = description.replace('/', '')
                     description = description.replace('&amp;', '&')
@@ -254,29 +351,165 @@ class DataExtractor(Scraper):
         else:
             return []
 
-    def extract_book_urls_from_category(self):
+    @memoized_field
+    def extract_book_urls_from_page(self):
+        """Extrait et retourne les URLs des livres listés sur la page de catégorie courante."""
+        soup = self.fetch_soup()
+        if soup:
+            return [
+                urljoin(self.url, book.find('a')['href'])
+                for book in soup.find_all('h3')
+            ]
+        return []
+
+    @memoized_field
+    def extract_category_name(self):
+        """Extrait et retourne le nom de la catégorie depuis le titre de la page de catégorie courante."""
+        soup = self.fetch_soup()
+        if soup:
+            title = soup.find('h1')
+            if title:
+                return title.text.strip()
+        return None
+
+    def extract_listing_entries_from_page(self):
+        """
+        Extrait les livres listés sur la page de catégorie courante, avec les données affichées dans la liste.
+
+        Returns:
+            list: Un ListingEntry par article de la page (prix ou notation à None s'ils sont introuvables).
+        """
+        soup = self.fetch_soup()
+        if not soup:
+            return []
+        category = self.extract_category_name()
+        entries = []
+        for article in soup.find_all('article', class_='product_pod'):
+            link = article.find('h3').find('a')
+            price = article.find('p', class_='price_color')
+            rating = article.find('p', class_='star-rating')
+            availability = article.find('p', class_='availability')
+            try:
+                price_incl_tax = float(price.text.strip()[1:])
+            except (AttributeError, ValueError):
+                price_incl_tax = None
+            book = Book(
+                product_book_url=urljoin(self.url, link['href']),
+                title=link.get('title', link.text).strip().lower(),
+                price_incl_tax=price_incl_tax,
+                review_rating=RATING_WORDS.get(rating['class'][1], 0) if rating else None,
+                category=category,
+            )
+            entries.append(ListingEntry(book, availability is not None and 'In stock' in availability.text))
+        return entries
+
+    def extract_listing_entries_from_category(self, page_workers=4):
+        """
+        Extrait les livres de toutes les pages d'une catégorie, avec les données affichées dans la liste.
+
+        Args:
+            page_workers (int): Nombre de pages de la catégorie téléchargées simultanément (voir iter_category_pages).
+
+        Returns:
+            list: Les ListingEntry de tous les livres de la catégorie (des pages téléchargées, listées à défaut
+            dans `failed_page_urls`).
+        """
+        entries = []
+        for page in self.iter_category_pages(page_workers):
+            entries.extend(page.extract_listing_entries_from_page())
+        self.soup = None
+        return entries
+
+    @memoized_field
+    def extract_page_count(self):
+        """
+        Extrait le nombre de pages d'une catégorie depuis la pagination ("Page 1 of N").
+
+        Returns:
+            int: Le nombre de pages de la catégorie, 1 si elle n'est pas paginée, ou None si la pagination
+            est illisible.
+        """
+        soup = self.fetch_soup()
+        if not soup:
+            return None
+        current = soup.find('li', class_='current')
+        if current is None:
+            return None if soup.find('li', class_='next') else 1
+        match = re.search(r'Page\s+\d+\s+of\s+(\d+)', current.text)
+        return int(match.group(1)) if match else None
+
+    def iter_category_pages(self, page_workers=4):
+        """
+        Télécharge les pages d'une catégorie, à partir de la page courante (la première).
+
+        Si le nombre de pages N est lisible sur la première page, les pages page-2.html à page-N.html sont
+        téléchargées en parallèle, au lieu d'attendre le parsing de chaque page pour trouver la suivante.
+        Sinon, ou si page_workers vaut 1, les liens "next" sont suivis un par un.
+
+        Les URLs des pages qui n'ont pas pu être téléchargées sont listées dans `failed_page_urls` : la liste
+        des livres de la catégorie est alors incomplète.
+
+        Args:
+            page_workers (int): Nombre de pages téléchargées simultanément.
+
+        Yields:
+            DataExtractor: Un extracteur par page chargée, dans l'ordre des pages (la première est l'instance
+            courante).
+        """
+        self.failed_page_urls = []
+        if not self.fetch_soup():
+            self.failed_page_urls.append(self.url)
+            return
+        yield self
+        page_count = self.extract_page_count() if page_workers > 1 else None
+        if page_count is not None:
+            page_urls = [urljoin(self.url, f"page-{number}.html") for number in range(2, page_count + 1)]
+            if page_urls:
+                with ThreadPoolExecutor(max_workers=min(page_workers, len(page_urls))) as executor:
+                    for page in executor.map(self._fetch_page, page_urls):
+                        if page.soup:
+                            yield page
+                        else:
+                            self.failed_page_urls.append(page.url)
+            return
+        next_page_url = self.extract_next_page_url()
+        while next_page_url:
+            page = self._fetch_page(next_page_url)
+            if not page.soup:
+                self.failed_page_urls.append(next_page_url)
+                break  # Sortie de la boucle en cas d'erreur lors du fetching
+            yield page
+            next_page_url = page.extract_next_page_url()
+
+    def _fetch_page(self, url):
+        """Retourne un nouvel extracteur (même client, mêmes en-têtes et même cache) dont la page est chargée."""
+        page = DataExtractor(url, headers=self.headers, client=self.client, page_cache=self.page_cache)
+        page.fetch_soup()
+        return page
+
+    @memoized_field
+    def extract_next_page_url(self):
+        """
+        Extrait l'URL de la page suivante d'une catégorie paginée.
+
+        Returns:
+            str: L'URL absolue de la page suivante, ou None s'il s'agit de la dernière page.
+        """
+        soup = self.fetch_soup()
+        if soup:
+            next_button = soup.find('li', class_='next')
+            if next_button:
+                return urljoin(self.url, next_button.find('a')['href'])
+        return None
+
+    def extract_book_urls_from_category(self, page_workers=4):
         """Extrait et retourne les URLs des livres d'une catégorie. Gère également la pagination
-        si nécessaire (cas des catégories ayant plusieurs pages de livres)
+        si nécessaire (cas des catégories ayant plusieurs pages de livres), en téléchargeant les pages
+        en parallèle lorsque leur nombre est connu (voir iter_category_pages). Les pages qui n'ont pas pu
+        être téléchargées sont ensuite listées dans `failed_page_urls`.
         """
         all_books_urls = []  # Stocke les URLs de tous les livres trouvés dans la categorie
-        while True:
-            soup = self.fetch_soup()  # Assurez-vous d'avoir le BeautifulSoup de la page de catégorie
-            if soup:
-                book_urls = [
-                    urljoin("https://books.toscrape.com/catalogue/", book.find('a')['href'][9:])
-                    for book in soup.find_all('h3')
-                ]
-                all_books_urls.extend(book_urls)  # Ajoute les URLs extraites à la liste globale
-                # Vérification de l'existence d'une page suivante
-                next_button = soup.find('li', class_='next')
-                if next_button:
-                    next_page_partial_url = next_button.find('a')['href']
-                    # Construction de l'RUL de la page suivante
-                    next_page_url = urljoin(self.url, next_page_partial_url)
-                    self.set_url(next_page_url)  # Mise à jour de l'URL pour charger la page suivante
-                else:
-                    break  # Sortie de la boucle si aucune page n'est trouvée
-            else:
-                break  # Sortie de la boucle en cas d'erreur lors du fetching
+        for page in self.iter_category_pages(page_workers):
+            all_books_urls.extend(page.extract_book_urls_from_page())  # Ajoute les URLs à la liste globale
         self.soup = None  # Réinitialisation de soup après avoir terminé la pagination
         return all_books_urls
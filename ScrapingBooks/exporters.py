@@ -0,0 +1,185 @@
+import time
+import uuid
+from books import Book
+
+# pyarrow est facultatif (seul ParquetExporter en a besoin) et long à importer : il n'est importé qu'à la
+# première utilisation, par _import_pyarrow
+pa = ds = pq = None
+
+
+def _import_pyarrow(usage):
+    """
+    Importe pyarrow s'il ne l'est pas déjà.
+
+    Args:
+        usage (str): Fonctionnalité qui en a besoin, pour le message d'erreur.
+
+    Raises:
+        ImportError: Si pyarrow n'est pas installé.
+    """
+    global pa, ds, pq
+    if pa is not None:
+        return
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(f"{usage} nécessite pyarrow (pip install pyarrow)") from None
+    pa, ds, pq = pyarrow, pyarrow.dataset, pyarrow.parquet
+
+
+class Exporter:
+    """
+    Interface des exports supplémentaires des livres extraits, en plus des fichiers CSV par catégorie.
+
+    Un exporter reçoit chaque livre écrit pendant un passage. `start` est appelée au début du passage,
+    `finish` à sa fin normale et `abort` en cas d'interruption. Les sous-classes implémentent au minimum
+    `write`, et sont enregistrées dans EXPORTERS pour être sélectionnables en ligne de commande.
+    """
+    def start(self):
+        """Prépare l'export d'un nouveau passage."""
+
+    def write(self, book):
+        """
+        Exporte un livre.
+
+        Args:
+            book (Book): Le livre extrait.
+        """
+        raise NotImplementedError
+
+    def finish(self):
+        """Termine l'export du passage."""
+
+    def abort(self):
+        """Termine l'export d'un passage interrompu (par défaut, comme un passage complet)."""
+        self.finish()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.finish()
+        else:
+            self.abort()
+
+
+class ParquetExporter(Exporter):
+    """
+    Exporte les livres dans un unique jeu de données Parquet typé, partitionné par date, passage et catégorie.
+
+    Les prix sont des flottants, la disponibilité et la notation des entiers, et la catégorie est encodée
+    en dictionnaire. Les fichiers sont rangés en partitions Hive (`run_date=.../run_id=.../category=.../`) :
+    tout l'historique se lit comme une seule table avec `load_dataset`, et une requête ne lit que les
+    colonnes et les partitions dont elle a besoin. Chaque passage a sa propre partition : deux passages du
+    même jour se distinguent par leur `run_id` (horodatage du passage), et une requête sur un seul passage
+    ne compte chaque livre qu'une fois. Nécessite pyarrow.
+
+    Attributs :
+        directory (str): Répertoire racine du jeu de données.
+        batch_size (int): Nombre de livres mis en mémoire avant l'écriture d'un lot.
+    """
+    COLUMNS = Book.CSV_FIELDNAMES  # Mêmes noms de colonnes que les fichiers CSV
+
+    def __init__(self, directory='datas_parquet', batch_size=5000):
+        """
+        Prépare l'export (le passage est démarré par `start`).
+
+        Paramètres :
+            directory (str): Répertoire racine du jeu de données.
+            batch_size (int): Nombre de livres mis en mémoire avant l'écriture d'un lot.
+        """
+        _import_pyarrow("l'export Parquet")
+        self.directory = directory
+        self.batch_size = batch_size
+        self._columns = {name: [] for name in self.COLUMNS}
+        self._run_date = None
+        self._run_id = None
+        self._batches = 0
+
+    @staticmethod
+    def schema():
+        """Retourne le schéma Arrow des livres exportés (colonnes de partition comprises)."""
+        return pa.schema([
+            ('product_book_url', pa.string()),
+            ('title', pa.string()),
+            ('upc', pa.string()),
+            ('price_including_tax', pa.float64()),
+            ('price_excluding_tax', pa.float64()),
+            ('availability', pa.int32()),
+            ('review_rating', pa.int8()),
+            ('category', pa.dictionary(pa.int32(), pa.string())),
+            ('image_url', pa.string()),
+            ('product_description', pa.string()),
+            ('run_date', pa.string()),
+            ('run_id', pa.string()),
+        ])
+
+    def start(self):
+        """Fixe la date et l'identifiant du passage, qui déterminent sa partition."""
+        self._run_date = time.strftime('%Y-%m-%d')
+        # Horodatage (triable) et suffixe aléatoire : deux passages lancés dans la même seconde restent distincts
+        self._run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self._batches = 0
+
+    def write(self, book):
+        """
+        Ajoute un livre au lot en cours, écrit sur disque lorsqu'il est complet.
+
+        Args:
+            book (Book): Le livre extrait.
+        """
+        for name, value in zip(self.COLUMNS, book.to_row()):
+            self._columns[name].append(value)
+        if len(self._columns['upc']) >= self.batch_size:
+            self._write_batch()
+
+    def finish(self):
+        """Écrit le dernier lot."""
+        self._write_batch()
+
+    def _write_batch(self):
+        """Écrit les livres en mémoire dans les partitions de leur catégorie."""
+        if not self._columns['upc']:
+            return
+        count = len(self._columns['upc'])
+        table = pa.table(
+            {**self._columns, 'run_date': [self._run_date] * count, 'run_id': [self._run_id] * count},
+            schema=self.schema(),
+        )
+        self._batches += 1
+        pq.write_to_dataset(
+            table, self.directory, partition_cols=['run_date', 'run_id', 'category'],
+            basename_template=f"part-{self._batches}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore',
+        )
+        self._columns = {name: [] for name in self.COLUMNS}
+
+
+def load_dataset(directory='datas_parquet'):
+    """
+    Ouvre le jeu de données Parquet écrit par ParquetExporter, toutes dates, passages et catégories confondus.
+    Un livre y figure une fois par passage : filtrer sur `run_id` (par exemple le plus récent) pour n'en
+    garder qu'un.
+
+    Args:
+        directory (str): Répertoire racine du jeu de données.
+
+    Returns:
+        pyarrow.dataset.Dataset: Le jeu de données (par exemple `.to_table(columns=[...], filter=...)`).
+    """
+    _import_pyarrow("la lecture du jeu de données Parquet")
+    partitioning = ds.HivePartitioning.discover(
+        schema=pa.schema([('run_date', pa.string()), ('run_id', pa.string()),
+                          ('category', pa.dictionary(pa.int32(), pa.string()))]),
+    )
+    return ds.dataset(directory, format='parquet', partitioning=partitioning)
+
+
+# Exporters sélectionnables en ligne de commande (le premier paramètre de chaque classe est le répertoire)
+EXPORTERS = {
+    'parquet': ParquetExporter,
+}
@@ -0,0 +1,270 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import namedtuple
+from email.utils import parsedate_to_datetime
+import requests
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = frozenset((408, 425, 429, 500, 502, 503, 504))  # Erreurs temporaires : nouvelle tentative
+THROTTLE_STATUSES = frozenset((429, 503))  # Le serveur demande de ralentir
+RETRYABLE_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+# URL abandonnée : cause de l'échec, nombre de tentatives et date de l'abandon
+DeadLetter = namedtuple('DeadLetter', ['url', 'reason', 'attempts', 'failed_at'])
+
+
+class AdaptiveRateLimiter:
+    """
+    Limite le débit des requêtes avec un seau à jetons dont le débit s'adapte aux réponses du serveur.
+
+    Chaque requête consomme un jeton ; les jetons se renouvellent au débit courant, dans la limite de
+    `burst`. Le débit augmente progressivement tant que le serveur répond vite et sans erreur, diminue
+    lorsque sa latence dépasse `target_latency` ou qu'il renvoie des erreurs, et est divisé par deux
+    lorsqu'il demande explicitement de ralentir (429, 503), toutes les requêtes étant alors suspendues
+    pendant la durée indiquée par Retry-After.
+
+    Attributs :
+        rate (float): Débit courant, en requêtes par seconde.
+        min_rate (float): Débit minimal.
+        max_rate (float): Débit maximal.
+        burst (float): Nombre maximal de jetons accumulés (requêtes envoyées d'affilée).
+        target_latency (float): Latence au-delà de laquelle le débit est réduit, en secondes.
+    """
+    def __init__(self, rate=50.0, min_rate=1.0, max_rate=500.0, burst=None, target_latency=2.0):
+        """
+        Initialise le seau à jetons, plein.
+
+        Paramètres :
+            rate (float): Débit initial, en requêtes par seconde.
+            min_rate (float): Débit minimal.
+            max_rate (float): Débit maximal.
+            burst (float, optionnel): Nombre maximal de jetons accumulés. Par défaut, le débit initial.
+            target_latency (float): Latence au-delà de laquelle le débit est réduit, en secondes.
+        """
+        if not 0 < min_rate <= rate <= max_rate:
+            raise ValueError("les débits doivent vérifier 0 < min_rate <= rate <= max_rate")
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst if burst else rate
+        self.target_latency = target_latency
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Attend qu'un jeton soit disponible (et la fin d'une éventuelle suspension), puis le consomme."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def record_success(self, latency):
+        """Adapte le débit après une réponse : augmentation additive, ou réduction si le serveur ralentit."""
+        with self._lock:
+            if latency > self.target_latency:
+                self.rate = max(self.min_rate, self.rate * 0.9)
+            else:
+                self.rate = min(self.max_rate, self.rate + 1)
+
+    def record_error(self):
+        """Réduit le débit après une erreur temporaire (connexion, délai dépassé, erreur 5xx)."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * 0.75)
+
+    def record_throttle(self, retry_after=None):
+        """
+        Divise le débit par deux après une demande de ralentissement du serveur.
+
+        Args:
+            retry_after (float, optionnel): Durée pendant laquelle aucune requête n'est envoyée, en secondes.
+        """
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0)
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+
+class FetchScheduler:
+    """
+    Politique commune d'envoi des requêtes : délai maximal, classement des erreurs, nouvelles tentatives
+    et limitation adaptative du débit.
+
+    Les erreurs temporaires (connexion, délai dépassé, 408, 429, 5xx) donnent lieu à de nouvelles tentatives,
+    espacées d'une attente exponentielle tirée au hasard (jitter) ou de la durée indiquée par Retry-After.
+    Les erreurs définitives (404 et autres 4xx) ne sont pas retentées. Toute URL abandonnée est ajoutée à
+    la liste `dead_letters` : aucun échec n'est silencieux.
+
+    Attributs :
+        max_retries (int): Nombre maximal de tentatives par requête.
+        timeout (float ou tuple): Délai maximal de connexion et de lecture, en secondes.
+        backoff_base (float): Attente de référence avant la deuxième tentative, en secondes.
+        backoff_max (float): Attente maximale entre deux tentatives, en secondes.
+        rate_limiter (AdaptiveRateLimiter): Limiteur de débit partagé, ou None pour ne pas limiter le débit.
+        dead_letters (list): Les DeadLetter des URLs abandonnées.
+        stats (dict): Nombre de requêtes réussies ('succeeded'), de nouvelles tentatives ('retried'),
+        de demandes de ralentissement ('throttled') et d'URLs abandonnées ('failed'), et nombre d'octets
+        reçus d'après l'en-tête Content-Length des réponses réussies ('bytes', réponses du cache exclues).
+    """
+    def __init__(self, max_retries=4, timeout=(5, 30), backoff_base=0.5, backoff_max=30.0, rate_limiter=None):
+        """
+        Initialise la politique d'envoi.
+
+        Paramètres :
+            max_retries (int): Nombre maximal de tentatives par requête.
+            timeout (float ou tuple): Délai maximal de connexion et de lecture, en secondes.
+            backoff_base (float): Attente de référence avant la deuxième tentative, en secondes.
+            backoff_max (float): Attente maximale entre deux tentatives, en secondes.
+            rate_limiter (AdaptiveRateLimiter, optionnel): Limiteur de débit partagé par toutes les requêtes.
+        """
+        if max_retries < 1:
+            raise ValueError("max_retries doit être supérieur ou égal à 1")
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = rate_limiter
+        self.dead_letters = []
+        self.stats = {'succeeded': 0, 'retried': 0, 'throttled': 0, 'failed': 0, 'bytes': 0}
+        self._lock = threading.Lock()
+
+    def fetch(self, url, send):
+        """
+        Envoie une requête en appliquant la politique de tentatives et de débit.
+
+        Args:
+            url (str): URL demandée (pour les messages et la liste des échecs).
+            send (callable): Fonction envoyant une tentative ; elle reçoit le délai maximal (timeout) et
+            retourne une requests.Response.
+
+        Returns:
+            requests.Response: La réponse réussie (2xx ou 304), ou None si l'URL a été abandonnée.
+        """
+        reason = None
+        for attempt in range(1, self.max_retries + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            start = time.monotonic()
+            try:
+                response = send(self.timeout)
+            except RETRYABLE_ERRORS as e:
+                reason = f"{type(e).__name__}: {e}"
+                retry_after = None
+                if self.rate_limiter is not None:
+                    self.rate_limiter.record_error()
+            except requests.RequestException as e:
+                return self._give_up(url, f"{type(e).__name__}: {e}", attempt)  # URL invalide, etc.
+            else:
+                status = response.status_code
+                if status < 400:
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.record_success(time.monotonic() - start)
+                    self._count('succeeded')
+                    if not getattr(response, 'from_cache', False):
+                        self._count('bytes', int(response.headers.get('Content-Length') or 0))
+                    return response
+                response.close()
+                reason = f"HTTP {status}"
+                if status not in RETRYABLE_STATUSES:
+                    return self._give_up(url, reason, attempt)
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if status in THROTTLE_STATUSES:
+                    self._count('throttled')
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.record_throttle(retry_after)
+                elif self.rate_limiter is not None:
+                    self.rate_limiter.record_error()
+
+            if attempt < self.max_retries:
+                self._count('retried')
+                logger.warning("Tentative %d/%d échouée pour %s : %s", attempt, self.max_retries, url, reason,
+                               extra={'url': url, 'attempt': attempt, 'reason': reason})
+                time.sleep(self.backoff_delay(attempt, retry_after))
+        return self._give_up(url, reason, self.max_retries)
+
+    def backoff_delay(self, attempt, retry_after=None):
+        """
+        Calcule l'attente avant la tentative suivante.
+
+        Args:
+            attempt (int): Numéro de la tentative qui vient d'échouer (à partir de 1).
+            retry_after (float, optionnel): Attente demandée par le serveur (Retry-After), en secondes.
+
+        Returns:
+            float: L'attente, en secondes : celle demandée par le serveur (plafonnée à backoff_max), sinon
+            une durée tirée au hasard entre 0 et backoff_base x 2^(attempt - 1), plafonnée à backoff_max.
+        """
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def save_dead_letters(self, path):
+        """
+        Écrit les URLs abandonnées dans un fichier JSONL (une ligne par URL), si elles existent.
+
+        Args:
+            path (str): Chemin du fichier.
+
+        Returns:
+            int: Le nombre d'URLs écrites.
+        """
+        with self._lock:
+            dead_letters = list(self.dead_letters)
+        if dead_letters:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as file:
+                for dead_letter in dead_letters:
+                    file.write(json.dumps(dead_letter._asdict(), ensure_ascii=False) + '\n')
+        return len(dead_letters)
+
+    def _give_up(self, url, reason, attempts):
+        """Abandonne une URL : l'ajoute aux échecs et journalise la cause."""
+        logger.error("Abandon de %s après %d tentative(s) : %s", url, attempts, reason,
+                     extra={'url': url, 'attempts': attempts, 'reason': reason})
+        with self._lock:
+            self.dead_letters.append(DeadLetter(url, reason, attempts, time.time()))
+            self.stats['failed'] += 1
+        return None
+
+    def _count(self, name, value=1):
+        """Incrémente un compteur de `stats`."""
+        with self._lock:
+            self.stats[name] += value
+
+
+def parse_retry_after(value):
+    """
+    Convertit la valeur d'un en-tête Retry-After en nombre de secondes.
+
+    Args:
+        value (str): Valeur de l'en-tête : un nombre de secondes ou une date HTTP.
+
+    Returns:
+        float: Le nombre de secondes à attendre (0 si la date est passée), ou None si la valeur est absente
+        ou illisible.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,197 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+CacheEntry = namedtuple('CacheEntry', ['url', 'etag', 'last_modified', 'stored_at', 'size', 'has_body'])
+
+
+class HttpCache:
+    """
+    Cache HTTP persistant sur disque, indexé par URL.
+
+    Pour chaque URL, le cache conserve les validateurs renvoyés par le serveur (ETag, Last-Modified)
+    et, si demandé, le corps de la réponse. Ces validateurs permettent d'envoyer des requêtes
+    conditionnelles : le serveur répond 304 si la ressource n'a pas changé et le corps n'est pas
+    retéléchargé. La taille totale des corps est plafonnée, les entrées les moins récemment utilisées
+    étant supprimées en premier (LRU).
+
+    Attributs :
+        directory (str): Répertoire du cache (index SQLite et corps des réponses).
+        max_size (int): Taille maximale des corps conservés, en octets.
+        max_age (float): Durée en secondes pendant laquelle une entrée est utilisée sans interroger
+        le serveur. None ou 0 pour toujours revalider auprès du serveur.
+        stats (dict): Compteurs 'hits' (servi sans requête), 'revalidated' (304) et 'misses'.
+    """
+    def __init__(self, directory='.http_cache', max_size=500 * 1024 * 1024, max_age=None):
+        """
+        Ouvre (ou crée) le cache dans le répertoire indiqué.
+
+        Paramètres :
+            directory (str): Répertoire du cache.
+            max_size (int): Taille maximale des corps conservés, en octets.
+            max_age (float, optionnel): Durée de fraîcheur des entrées, en secondes.
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.max_age = max_age
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(directory, 'bodies'), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(directory, 'index.sqlite'), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, stored_at REAL, '
+            'last_access REAL, size INTEGER, has_body INTEGER)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)')
+        self._db.commit()
+
+    def lookup(self, url):
+        """
+        Recherche une URL dans le cache et la marque comme récemment utilisée.
+
+        Args:
+            url (str): URL recherchée.
+
+        Returns:
+            CacheEntry: L'entrée du cache, ou None si l'URL n'est pas connue.
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT url, etag, last_modified, stored_at, size, has_body FROM entries WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute('UPDATE entries SET last_access = ? WHERE url = ?', (time.time(), url))
+            self._db.commit()
+        return CacheEntry(*row[:5], bool(row[5]))
+
+    def is_fresh(self, entry):
+        """
+        Indique si une entrée peut être utilisée sans interroger le serveur (politique max_age).
+
+        Args:
+            entry (CacheEntry): Entrée du cache.
+
+        Returns:
+            bool: True si l'entrée a été validée il y a moins de `max_age` secondes.
+        """
+        return bool(self.max_age) and time.time() - entry.stored_at < self.max_age
+
+    @staticmethod
+    def conditional_headers(entry):
+        """
+        Construit les en-têtes d'une requête conditionnelle à partir d'une entrée du cache.
+
+        Args:
+            entry (CacheEntry): Entrée du cache, ou None.
+
+        Returns:
+            dict: En-têtes If-None-Match / If-Modified-Since (vide si aucun validateur n'est connu).
+        """
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def read_body(self, entry):
+        """
+        Lit le corps d'une réponse conservée dans le cache.
+
+        Args:
+            entry (CacheEntry): Entrée du cache.
+
+        Returns:
+            bytes: Le corps de la réponse, ou None s'il n'a pas été conservé ou a disparu du disque.
+        """
+        if not entry.has_body:
+            return None
+        try:
+            with open(self._body_path(entry.url), 'rb') as file:
+                return file.read()
+        except OSError:
+            return None
+
+    def store(self, url, headers, body=None):
+        """
+        Enregistre (ou remplace) la réponse d'une URL dans le cache.
+
+        Args:
+            url (str): URL de la ressource.
+            headers (Mapping): En-têtes de la réponse, d'où sont extraits ETag et Last-Modified.
+            body (bytes, optionnel): Corps de la réponse. Si None, seuls les validateurs sont conservés
+            (cas des images, dont le fichier sauvegardé tient lieu de corps).
+        """
+        if body is not None:
+            body_path = self._body_path(url)
+            temp_path = f"{body_path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as file:
+                file.write(body)
+            os.replace(temp_path, body_path)  # Remplacement atomique, même si deux threads écrivent la même URL
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, headers.get('ETag'), headers.get('Last-Modified'), now, now,
+                 len(body) if body is not None else 0, body is not None)
+            )
+            self._evict()
+            self._db.commit()
+
+    def refresh(self, url, headers):
+        """
+        Marque une entrée comme revalidée après une réponse 304, en mettant à jour ses validateurs.
+
+        Args:
+            url (str): URL de la ressource.
+            headers (Mapping): En-têtes de la réponse 304.
+        """
+        with self._lock:
+            self._db.execute(
+                'UPDATE entries SET stored_at = ?, etag = COALESCE(?, etag), '
+                'last_modified = COALESCE(?, last_modified) WHERE url = ?',
+                (time.time(), headers.get('ETag'), headers.get('Last-Modified'), url)
+            )
+            self._db.commit()
+
+    def count(self, outcome):
+        """
+        Incrémente un compteur de statistiques du cache.
+
+        Args:
+            outcome (str): 'hits', 'revalidated' ou 'misses'.
+        """
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def close(self):
+        """Ferme l'index du cache."""
+        with self._lock:
+            self._db.close()
+
+    def _evict(self):
+        """Supprime les entrées les moins récemment utilisées tant que la taille maximale est dépassée."""
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_size:
+            return
+        rows = self._db.execute('SELECT url, size FROM entries WHERE size > 0 ORDER BY last_access').fetchall()
+        for url, size in rows:
+            self._db.execute('DELETE FROM entries WHERE url = ?', (url,))
+            try:
+                os.remove(self._body_path(url))
+            except OSError:
+                pass
+            total -= size
+            if total <= self.max_size:
+                break
+
+    def _body_path(self, url):
+        """Retourne le chemin du fichier contenant le corps de la réponse d'une URL."""
+        return os.path.join(self.directory, 'bodies', hashlib.sha1(url.encode('utf-8')).hexdigest())
@@ -0,0 +1,212 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from fetch_scheduler import FetchScheduler
+
+DEFAULT_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+class HttpClient:
+    """
+    Couche de transport HTTP partagée par l'extraction des pages et le téléchargement des images.
+
+    Toutes les requêtes passent par une même session `requests` dont les connexions sont conservées
+    (keep-alive) dans un pool, ce qui évite d'ouvrir une nouvelle connexion TCP/TLS à chaque requête.
+
+    Attributs :
+        session (requests.Session): Session HTTP partagée.
+        pool_maxsize (int): Nombre maximal de connexions conservées par hôte.
+        cache (HttpCache): Cache HTTP persistant utilisé par `get_cached`, ou None.
+        scheduler (FetchScheduler): Politique de délai, de nouvelles tentatives et de débit appliquée par `fetch`.
+    """
+    def __init__(self, pool_connections=10, pool_maxsize=10, headers=None, cache=None, scheduler=None):
+        """
+        Initialise la session et son pool de connexions.
+
+        Paramètres :
+            pool_connections (int): Nombre d'hôtes distincts dont les pools de connexions sont conservés.
+            pool_maxsize (int): Nombre maximal de connexions conservées par hôte. À aligner sur le
+            nombre de requêtes simultanées pour que chaque requête puisse réutiliser une connexion.
+            headers (dict, optionnel): En-têtes HTTP envoyés avec chaque requête.
+            cache (HttpCache, optionnel): Cache HTTP persistant permettant les requêtes conditionnelles.
+            scheduler (FetchScheduler, optionnel): Politique appliquée par `fetch`. Par défaut, les réglages
+            par défaut de FetchScheduler, sans limitation de débit.
+        """
+        self.pool_maxsize = pool_maxsize
+        self.cache = cache
+        self.scheduler = scheduler if scheduler is not None else FetchScheduler()
+        self.session = requests.Session()
+        self.session.headers.update(headers if headers else DEFAULT_HEADERS)
+        self._adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', self._adapter)
+        self.session.mount('https://', self._adapter)
+
+    def get(self, url, **kwargs):
+        """
+        Envoie une requête GET en réutilisant une connexion du pool si possible.
+
+        Args:
+            url (str): URL à télécharger.
+            **kwargs: Arguments transmis à `requests.Session.get` (headers, timeout, stream...).
+
+        Returns:
+            requests.Response: La réponse du serveur.
+        """
+        return self.session.get(url, **kwargs)
+
+    def head(self, url, **kwargs):
+        """
+        Envoie une requête HEAD (en-têtes seulement, sans corps).
+
+        Args:
+            url (str): URL de la ressource.
+            **kwargs: Arguments transmis à `requests.Session.head`.
+
+        Returns:
+            requests.Response: La réponse du serveur.
+        """
+        return self.session.head(url, **kwargs)
+
+    def get_cached(self, url, store_body=True, revalidate=True, **kwargs):
+        """
+        Envoie une requête GET en passant par le cache HTTP, s'il est configuré.
+
+        Si l'entrée du cache est encore fraîche (politique max_age), aucune requête n'est envoyée.
+        Sinon, une requête conditionnelle est envoyée ; sur une réponse 304, le corps conservé
+        dans le cache est restitué. Les réponses 200 sont enregistrées dans le cache.
+
+        Args:
+            url (str): URL à télécharger.
+            store_body (bool): Conserver le corps de la réponse dans le cache. Si False, seuls les
+            validateurs sont conservés et une ressource inchangée est signalée par le statut 304.
+            revalidate (bool): Utiliser l'entrée du cache pour cette requête. Si False, la ressource est
+            téléchargée sans condition (par exemple lorsque la copie locale a disparu).
+            **kwargs: Arguments transmis à `requests.Session.get`.
+
+        Returns:
+            requests.Response: La réponse du serveur ou reconstruite depuis le cache
+            (attribut `from_cache` à True dans ce dernier cas).
+        """
+        if self.cache is None:
+            return self.get(url, **kwargs)
+
+        entry = self.cache.lookup(url) if revalidate else None
+        body = self.cache.read_body(entry) if entry is not None and store_body else None
+        usable = entry is not None and (body is not None or not store_body)
+        if usable and self.cache.is_fresh(entry):
+            self.cache.count('hits')
+            return _cached_response(url, body)
+
+        if usable:
+            kwargs['headers'] = {**kwargs.get('headers', {}), **self.cache.conditional_headers(entry)}
+        response = self.get(url, **kwargs)
+        if usable and response.status_code == 304:
+            self.cache.count('revalidated')
+            self.cache.refresh(url, response.headers)
+            return _cached_response(url, body, response.headers)
+
+        self.cache.count('misses')
+        if response.status_code == 200:
+            self.cache.store(url, response.headers, response.content if store_body else None)
+        return response
+
+    def fetch(self, url, **kwargs):
+        """
+        Télécharge une ressource via le cache HTTP, en appliquant la politique du scheduler : délai maximal,
+        nouvelles tentatives sur les erreurs temporaires et limitation du débit.
+
+        Args:
+            url (str): URL à télécharger.
+            **kwargs: Arguments transmis à `get_cached` (store_body, revalidate, headers, stream...).
+
+        Returns:
+            requests.Response: La réponse réussie (2xx ou 304), ou None si l'URL a été abandonnée
+            (elle figure alors dans `scheduler.dead_letters`).
+        """
+        return self.scheduler.fetch(url, lambda timeout: self.get_cached(url, timeout=timeout, **kwargs))
+
+    def connection_stats(self):
+        """
+        Retourne les compteurs de connexions des pools actifs.
+
+        Returns:
+            dict: Nombre de requêtes envoyées ('requests'), de connexions ouvertes ('opened')
+            et de requêtes ayant réutilisé une connexion existante ('reused').
+        """
+        opened = sent = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                sent += pool.num_requests
+        return {'requests': sent, 'opened': opened, 'reused': max(sent - opened, 0)}
+
+    def close(self):
+        """Ferme la session et toutes les connexions du pool, ainsi que le cache."""
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+
+def _cached_response(url, body, headers=None):
+    """
+    Construit une réponse à partir du cache.
+
+    Args:
+        url (str): URL de la ressource.
+        body (bytes): Corps conservé dans le cache, ou None si seuls les validateurs sont conservés.
+        headers (Mapping, optionnel): En-têtes de la réponse 304 du serveur, le cas échéant.
+
+    Returns:
+        requests.Response: Réponse 200 portant le corps du cache, ou 304 sans corps si celui-ci
+        n'est pas conservé.
+    """
+    response = requests.Response()
+    response.url = url
+    response.status_code = 200 if body is not None else 304
+    response._content = body if body is not None else b''
+    response._content_consumed = True  # Le corps est déjà en mémoire (iter_content lit _content)
+    if headers:
+        response.headers.update(headers)
+    response.from_cache = True
+    return response
+
+
+def get_default_client():
+    """
+    Retourne le client HTTP partagé par défaut, en le créant au premier appel.
+
+    Returns:
+        HttpClient: Le client partagé.
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
+
+
+def configure_default_client(pool_connections=10, pool_maxsize=10, headers=None, cache=None, scheduler=None):
+    """
+    Remplace le client HTTP partagé par un client configuré avec la taille de pool souhaitée.
+
+    Args:
+        pool_connections (int): Nombre d'hôtes distincts dont les pools de connexions sont conservés.
+        pool_maxsize (int): Nombre maximal de connexions conservées par hôte.
+        headers (dict, optionnel): En-têtes HTTP envoyés avec chaque requête.
+        cache (HttpCache, optionnel): Cache HTTP persistant permettant les requêtes conditionnelles.
+        scheduler (FetchScheduler, optionnel): Politique de délai, de nouvelles tentatives et de débit.
+
+    Returns:
+        HttpClient: Le nouveau client partagé.
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is not None:
+            _default_client.close()
+        _default_client = HttpClient(pool_connections, pool_maxsize, headers, cache, scheduler)
+        return _default_client
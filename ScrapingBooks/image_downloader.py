@@ -0,0 +1,125 @@
+import queue
+import threading
+import time
+from http_client import get_default_client
+from image_store import ImageStore
+
+_STOP = object()  # Signale aux workers qu'il n'y a plus d'images à télécharger
+
+
+class ImageDownloader:
+    """
+    Étape de téléchargement des images de couverture, découplée de l'extraction des pages.
+
+    Les livres à traiter sont déposés dans une file par `submit` ; un pool de threads les en retire
+    et sauvegarde leur image de couverture. Une image lente ou une attente entre deux tentatives
+    ne bloque donc plus l'extraction des livres suivants.
+
+    Attributs :
+        workers (int): Nombre de téléchargements d'images simultanés.
+        base_directory (str): Répertoire de base des images sauvegardées.
+        client (HttpClient): Client HTTP utilisé pour les téléchargements.
+        store (ImageStore): Stockage adressé par contenu des images (déduplication), ou None.
+        latencies (list): Durée de traitement de chaque image, en secondes.
+        failures (int): Nombre d'images dont le téléchargement a échoué.
+        metrics (Metrics): Mesures du pipeline (étape 'image', par catégorie), ou None.
+    """
+    def __init__(self, workers=4, base_directory='book_images', client=None, deduplicate=True, metrics=None,
+                 reference_directory=None):
+        """
+        Initialise l'étape de téléchargement (les workers sont lancés par `start`).
+
+        Paramètres :
+            workers (int): Nombre de téléchargements d'images simultanés.
+            base_directory (str): Répertoire de base des images sauvegardées.
+            client (HttpClient, optionnel): Client HTTP à utiliser. Par défaut, le client partagé.
+            deduplicate (bool): Enregistrer les images dans un ImageStore (contenus identiques stockés une
+            seule fois, images déjà présentes non retéléchargées).
+            metrics (Metrics, optionnel): Mesures du pipeline auxquelles ajouter la durée de chaque image.
+            reference_directory (str, optionnel): Répertoire d'images déjà téléchargées à ne pas retélécharger
+            (voir ImageStore).
+        """
+        if workers < 1:
+            raise ValueError("workers doit être supérieur ou égal à 1")
+        self.workers = workers
+        self.base_directory = base_directory
+        self.client = client if client else get_default_client()
+        self.store = ImageStore(base_directory, reference_directory=reference_directory) if deduplicate else None
+        self.latencies = []
+        self.failures = 0
+        self.metrics = metrics
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Lance les threads de téléchargement."""
+        self._threads = []
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"image-downloader-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, book):
+        """
+        Ajoute un livre à la file des images à télécharger. Retourne immédiatement.
+
+        Args:
+            book (Book): Le livre dont l'image de couverture doit être sauvegardée.
+        """
+        self._queue.put(book)
+
+    def close(self):
+        """Attend que toutes les images de la file soient traitées, puis arrête les workers."""
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self.store is not None:
+            self.store.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def report(self):
+        """
+        Résume les latences des images traitées.
+
+        Returns:
+            dict: Nombre d'images ('count'), d'échecs ('failures') et latences moyenne, médiane,
+            95e centile et maximale, en secondes.
+        """
+        with self._lock:
+            latencies = sorted(self.latencies)
+            failures = self.failures
+        if not latencies:
+            return {'count': 0, 'failures': failures}
+        return {
+            'count': len(latencies),
+            'failures': failures,
+            'mean': sum(latencies) / len(latencies),
+            'p50': latencies[len(latencies) // 2],
+            'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            'max': latencies[-1],
+        }
+
+    def _work(self):
+        """Boucle d'un worker : télécharge les images de la file jusqu'au signal d'arrêt."""
+        while True:
+            book = self._queue.get()
+            if book is _STOP:
+                return
+            start = time.perf_counter()
+            saved = book.save_cover_image(self.base_directory, client=self.client, store=self.store)
+            latency = time.perf_counter() - start
+            if self.metrics is not None:
+                self.metrics.record('image', latency, book.category)
+            with self._lock:
+                self.latencies.append(latency)
+                if not saved:
+                    self.failures += 1
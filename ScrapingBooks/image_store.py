@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+
+class ImageStore:
+    """
+    Stockage des images de couverture adressé par contenu, avec déduplication.
+
+    Chaque image est enregistrée une seule fois sous `<base>/.objects/`, nommée d'après le hash SHA-256
+    de son contenu. Le fichier attendu `<base>/<catégorie>/<upc>.jpg` est un lien physique (hardlink)
+    vers cet objet, ou une copie si le système de fichiers ne permet pas les liens : des couvertures
+    identiques (images par défaut, livre présent dans plusieurs catégories) n'occupent donc l'espace
+    disque qu'une fois. Un manifeste UPC → hash et taille permet de savoir quelles images sont déjà
+    présentes d'une exécution à l'autre.
+
+    Un stockage de référence (lu seulement) peut compléter le manifeste : c'est le cas d'un worker de
+    crawl partitionné, qui écrit dans le répertoire de son shard mais dont les images déjà présentes
+    dans le répertoire final ne sont pas retéléchargées.
+
+    Attributs :
+        base_directory (str): Répertoire de base des images.
+        reference_directory (str): Répertoire de base du stockage de référence, ou None.
+        manifest (dict): Pour chaque UPC, le hash ('hash') et la taille ('size') de son image.
+    """
+    def __init__(self, base_directory='book_images', save_every=100, reference_directory=None):
+        """
+        Ouvre le stockage et charge son manifeste s'il existe.
+
+        Paramètres :
+            base_directory (str): Répertoire de base des images.
+            save_every (int): Nombre d'images ajoutées entre deux sauvegardes du manifeste.
+            reference_directory (str, optionnel): Répertoire de base d'un autre stockage dont les images
+            présentes sont considérées comme déjà téléchargées. Il n'est jamais modifié.
+        """
+        self.base_directory = base_directory
+        self.save_every = save_every
+        self._objects_directory = os.path.join(base_directory, '.objects')
+        self._manifest_path = os.path.join(base_directory, '.manifest.json')
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        os.makedirs(self._objects_directory, exist_ok=True)
+        self.manifest = self._load_manifest(self._manifest_path)
+        self.reference_directory = reference_directory
+        self._reference_manifest = {}
+        if reference_directory is not None:
+            self._reference_manifest = self._load_manifest(os.path.join(reference_directory, '.manifest.json'))
+
+    def known_size(self, upc, image_path):
+        """
+        Retourne la taille enregistrée de l'image d'un livre, si elle est présente sur disque.
+
+        Une image absente du stockage est recherchée au même chemin relatif dans le stockage de référence.
+
+        Args:
+            upc (str): UPC du livre.
+            image_path (str): Chemin attendu de l'image.
+
+        Returns:
+            int: La taille de l'image enregistrée dans le manifeste, ou None si l'image est inconnue
+            ou absente du disque.
+        """
+        with self._lock:
+            entry = self.manifest.get(upc)
+        if entry is not None and os.path.exists(image_path):
+            return entry['size']
+        entry = self._reference_manifest.get(upc)
+        if entry is None:
+            return None
+        relative_path = os.path.relpath(image_path, self.base_directory)
+        if not os.path.exists(os.path.join(self.reference_directory, relative_path)):
+            return None
+        return entry['size']
+
+    def save(self, upc, chunks, image_path):
+        """
+        Enregistre une image à partir de ses blocs de contenu et la place à son chemin attendu.
+
+        Le contenu est haché pendant l'écriture ; s'il existe déjà dans le stockage, seul un lien
+        vers l'objet existant est créé.
+
+        Args:
+            upc (str): UPC du livre.
+            chunks (iterable): Blocs de contenu de l'image (bytes).
+            image_path (str): Chemin attendu de l'image.
+
+        Returns:
+            bool: True si le contenu était déjà présent dans le stockage (image dédupliquée).
+        """
+        digest = hashlib.sha256()
+        size = 0
+        temp_path = os.path.join(self._objects_directory, f"{upc}.{threading.get_ident()}.part")
+        with open(temp_path, 'wb') as file:
+            for chunk in chunks:
+                file.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        content_hash = digest.hexdigest()
+        object_path = self._object_path(content_hash)
+
+        with self._lock:
+            duplicate = os.path.exists(object_path)
+            if duplicate:
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                os.replace(temp_path, object_path)
+            self._link(object_path, image_path)
+            self.manifest[upc] = {'hash': content_hash, 'size': size}
+            self._unsaved += 1
+            if self._unsaved >= self.save_every:
+                self._save_manifest()
+        return duplicate
+
+    def close(self):
+        """Sauvegarde le manifeste."""
+        with self._lock:
+            self._save_manifest()
+
+    def _object_path(self, content_hash):
+        """Retourne le chemin de l'objet correspondant à un hash de contenu."""
+        return os.path.join(self._objects_directory, content_hash[:2], f"{content_hash}.jpg")
+
+    @staticmethod
+    def _link(object_path, image_path):
+        """Crée (ou remplace) le fichier attendu comme lien physique vers l'objet, ou comme copie."""
+        os.makedirs(os.path.dirname(image_path), exist_ok=True)
+        temp_path = f"{image_path}.link"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)  # Reste d'une exécution interrompue
+        try:
+            os.link(object_path, temp_path)
+        except OSError:
+            shutil.copyfile(object_path, temp_path)  # Liens physiques non pris en charge
+        os.replace(temp_path, image_path)
+
+    @staticmethod
+    def _load_manifest(manifest_path):
+        """Charge un manifeste, ou retourne un manifeste vide s'il n'existe pas."""
+        if not os.path.exists(manifest_path):
+            return {}
+        with open(manifest_path, encoding='utf-8') as file:
+            return json.load(file)
+
+    def _save_manifest(self):
+        """Écrit le manifeste sur disque de manière atomique."""
+        temp_path = f"{self._manifest_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.manifest, file)
+        os.replace(temp_path, self._manifest_path)
+        self._unsaved = 0
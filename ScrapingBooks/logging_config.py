@@ -0,0 +1,44 @@
+import json
+import logging
+import sys
+
+# Attributs présents dans tout LogRecord : les autres proviennent de l'argument `extra` des appels
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formate chaque message en une ligne JSON : date, niveau, logger, message et champs passés par `extra`.
+    """
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(level='INFO', structured=False, stream=None):
+    """
+    Configure la journalisation du programme.
+
+    Args:
+        level (str): Niveau minimal des messages affichés ('DEBUG' affiche aussi chaque livre et chaque image).
+        structured (bool): Écrire une ligne JSON par message (pour une collecte automatique) au lieu de texte.
+        stream (file, optionnel): Flux de sortie. Par défaut, la sortie d'erreur.
+    """
+    handler = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    if structured:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)-7s %(name)s : %(message)s', '%H:%M:%S'))
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
@@ -1,16 +1,280 @@
+import argparse
+import logging
+import os
 from scraper_manager import ScraperManager
+from async_scraper_manager import AsyncScraperManager
+from http_client import configure_default_client
+from fetch_scheduler import AdaptiveRateLimiter, FetchScheduler
+from http_cache import HttpCache
+from price_history import PriceHistory
+from crawl_diff import CrawlDiff
+from crawl_journal import CrawlJournal
+from exporters import EXPORTERS
+from data_extractor import DataExtractor, select_category_urls
+from books import Book
+from sharding import ShardQueue, coordinate, default_worker_id, run_worker
+from logging_config import configure_logging
+from metrics import Metrics, profiling
 
+logger = logging.getLogger(__name__)
 
-def main():
+
+def parse_args(argv=None):
+    """
+    Analyse les arguments de la ligne de commande.
+
+    Args:
+        argv (list, optionnel): Liste des arguments à analyser (par défaut, ceux de sys.argv).
+
+    Returns:
+        argparse.Namespace: Les options choisies par l'utilisateur.
+    """
+    parser = argparse.ArgumentParser(description="Scraping du site Books to Scrape.")
+    parser.add_argument('--base-url', default="https://books.toscrape.com/",
+                        help="URL de base du site à scraper (par exemple celle d'un mock_server.py local).")
+    parser.add_argument('--categories', nargs='+', default=None, metavar='CATÉGORIE',
+                        help="Catégories à extraire, par leur nom affiché sur le site ('Sequential Art') ou tel "
+                             "qu'écrit dans leur URL ('sequential-art'). Par défaut, toutes.")
+    parser.add_argument('--fields', nargs='+', choices=Book.CSV_FIELDNAMES, default=None, metavar='COLONNE',
+                        help="Colonnes à écrire dans les fichiers CSV (product_book_url est toujours écrite) ; "
+                             "les autres champs ne sont pas extraits. Par défaut, toutes. Colonnes possibles : "
+                             + ', '.join(Book.CSV_FIELDNAMES) + '.')
+    parser.add_argument('--output-dir', default='.',
+                        help="Répertoire de sortie, dans lequel sont créés datas_csv et book_images "
+                             "(par défaut, le répertoire courant).")
+    parser.add_argument('--no-images', action='store_true',
+                        help="Ne pas télécharger les images de couverture.")
+    parser.add_argument('--engine', choices=['sync', 'async'], default='sync',
+                        help="Moteur de crawl : séquentiel (sync) ou concurrent (async).")
+    parser.add_argument('--max-per-host', type=int, default=10,
+                        help="Nombre maximal de requêtes simultanées par hôte en mode async.")
+    parser.add_argument('--page-workers', type=int, default=4,
+                        help="Nombre de pages de liste d'une catégorie téléchargées simultanément "
+                             "(1 : suivre les liens de pagination un par un).")
+    parser.add_argument('--image-workers', type=int, default=4,
+                        help="Nombre de téléchargements d'images de couverture simultanés.")
+    parser.add_argument('--pool-size', type=int, default=None,
+                        help="Nombre de connexions HTTP conservées par hôte "
+                             "(par défaut : --max-per-host + --image-workers).")
+    parser.add_argument('--rate-limit', type=float, default=20.0,
+                        help="Débit initial des requêtes, en requêtes par seconde, adapté ensuite à la latence et aux "
+                             "erreurs du serveur (0 : pas de limitation).")
+    parser.add_argument('--max-rate', type=float, default=100.0,
+                        help="Débit maximal atteint par la limitation adaptative, en requêtes par seconde.")
+    parser.add_argument('--max-retries', type=int, default=4,
+                        help="Nombre maximal de tentatives par requête (erreurs temporaires : connexion, 429, 5xx).")
+    parser.add_argument('--timeout', type=float, default=30.0,
+                        help="Délai maximal de connexion et de lecture de chaque requête, en secondes.")
+    parser.add_argument('--dead-letters', default=None,
+                        help="Fichier JSONL listant les URLs abandonnées (écrit seulement s'il y en a). Par défaut, "
+                             "dead_letters.jsonl (voir --role pour un worker).")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Répertoire du cache HTTP persistant (requêtes conditionnelles). Désactivé par défaut.")
+    parser.add_argument('--max-age', type=float, default=None,
+                        help="Durée en secondes pendant laquelle une réponse en cache est réutilisée sans requête.")
+    parser.add_argument('--cache-size', type=int, default=500,
+                        help="Taille maximale du cache HTTP, en Mo (les entrées les moins utilisées sont supprimées).")
+    parser.add_argument('--resume', action='store_true',
+                        help="Reprendre un crawl interrompu : les catégories terminées d'après le journal sont "
+                             "ignorées et seuls les livres absents des fichiers CSV sont téléchargés.")
+    parser.add_argument('--journal', default=None,
+                        help="Journal de progression du crawl complet (URLs découvertes, livres écrits, catégories "
+                             "terminées), relu par --resume. Par défaut, crawl_journal.jsonl.")
+    parser.add_argument('--history', default=None,
+                        help="Base SQLite dans laquelle l'instantané des prix de chaque passage est ajouté "
+                             "(voir price_history.py pour l'interroger). Désactivé par défaut.")
+    parser.add_argument('--diff-dir', default=None,
+                        help="Répertoire des empreintes et des fichiers delta (JSONL) listant les livres ajoutés, "
+                             "retirés et modifiés depuis le passage précédent. Désactivé par défaut.")
+    parser.add_argument('--export', action='append', choices=sorted(EXPORTERS), default=[],
+                        help="Export supplémentaire des livres, en plus des fichiers CSV (répétable). "
+                             "parquet : jeu de données typé partitionné par date et catégorie (nécessite pyarrow).")
+    parser.add_argument('--export-dir', default=None,
+                        help="Répertoire des exports supplémentaires (par défaut, celui de chaque export).")
+    parser.add_argument('--listing-only', action='store_true',
+                        help="Suivi des prix : ne télécharge la page produit que des livres nouveaux ou dont le "
+                             "prix, la notation ou le stock affichés dans les pages de liste ont changé depuis le "
+                             "dernier CSV.")
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help="Nombre de processus dédiés au parsing des pages produit (0 : pas de processus dédié).")
+    parser.add_argument('--parse-batch-size', type=int, default=16,
+                        help="Nombre de pages envoyées à un processus de parsing en une fois.")
+    parser.add_argument('--parser', choices=['lxml', 'html.parser'], default=None,
+                        help="Backend de parsing des pages produit (par défaut : lxml s'il est installé).")
+    parser.add_argument('--role', choices=['coordinator', 'worker'], default=None,
+                        help="Crawl réparti : le coordinateur répartit les catégories en shards et fusionne les "
+                             "sorties, les workers (un ou plusieurs par machine) extraient les shards. Par défaut, "
+                             "le rapport et les dead letters de chaque rôle sont écrits dans "
+                             "<shard-dir>/coordinator ou <shard-dir>/worker-<id>.")
+    parser.add_argument('--queue', default='shards.sqlite',
+                        help="File de travail SQLite du crawl réparti, partagée par le coordinateur et les workers.")
+    parser.add_argument('--shard-dir', default='shards',
+                        help="Répertoire des sorties des shards, partagé par le coordinateur et les workers.")
+    parser.add_argument('--worker-id', default=None,
+                        help="Identifiant du worker (par défaut, nom de la machine et numéro de processus).")
+    parser.add_argument('--lease', type=float, default=600.0,
+                        help="Durée du bail d'un shard, en secondes : un shard dont le worker s'est arrêté est "
+                             "repris par un autre worker après ce délai.")
+    parser.add_argument('--poll-interval', type=float, default=5.0,
+                        help="Attente entre deux consultations de la file de travail, en secondes.")
+    parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], default='INFO',
+                        help="Niveau minimal des messages (DEBUG : chaque livre et chaque image).")
+    parser.add_argument('--log-json', action='store_true',
+                        help="Journaliser une ligne JSON par message (journalisation structurée).")
+    parser.add_argument('--report', default=None,
+                        help="Rapport JSON du passage : durées par étape et par catégorie, compteurs, requêtes, "
+                             "cache et images. Par défaut, run_report.json ('' pour ne pas l'écrire).")
+    parser.add_argument('--profile', choices=['cprofile', 'pyinstrument'], default=None,
+                        help="Profiler le passage (pyinstrument doit être installé séparément).")
+    parser.add_argument('--profile-output', default=None,
+                        help="Fichier du profil : statistiques cProfile (.prof) ou page HTML pyinstrument.")
+    return resolve_output_paths(parser.parse_args(argv))
+
+
+def resolve_output_paths(args):
+    """
+    Complète les chemins du rapport, des dead letters et du journal qui n'ont pas été donnés.
+
+    Ils sont écrits dans le répertoire courant, sauf en crawl réparti : le coordinateur écrit les siens dans
+    `<shard-dir>/coordinator` et chaque worker dans `<shard-dir>/worker-<id>`, afin que des workers lancés
+    depuis le même répertoire ne s'écrasent pas mutuellement. L'identifiant du worker est alors fixé.
+
+    Args:
+        args (argparse.Namespace): Les options de la ligne de commande.
+
+    Returns:
+        argparse.Namespace: Les mêmes options, chemins complétés.
+    """
+    directory = ''
+    if args.role == 'coordinator':
+        directory = os.path.join(args.shard_dir, 'coordinator')
+    elif args.role == 'worker':
+        args.worker_id = args.worker_id or default_worker_id()
+        directory = os.path.join(args.shard_dir, f"worker-{args.worker_id}")
+    for name, filename in (('report', 'run_report.json'), ('dead_letters', 'dead_letters.jsonl'),
+                           ('journal', 'crawl_journal.jsonl')):
+        if getattr(args, name) is None:
+            setattr(args, name, os.path.join(directory, filename))
+    return args
+
+
+def main(argv=None):
     """
     Point d'entrée principal du script de scraping.
 
     Initialise le gestionnaire de scraping avec l'URL de base du site à scraper,
-    puis lance l'extraction de toutes les données des livres disponibles sur le site.
+    puis lance l'extraction des livres des catégories choisies (par défaut, de tout le site).
+
+    Args:
+        argv (list, optionnel): Arguments de la ligne de commande (par défaut, ceux de sys.argv).
     """
-    base_url = "https://books.toscrape.com/"
-    scraper_manager = ScraperManager(base_url)
-    scraper_manager.extract_all_books()
+    args = parse_args(argv)
+    configure_logging(args.log_level, args.log_json)
+    cache = HttpCache(args.cache_dir, args.cache_size * 1024 * 1024, args.max_age) if args.cache_dir else None
+    pool_size = args.pool_size if args.pool_size else args.max_per_host + args.image_workers
+    rate_limiter = None
+    if args.rate_limit > 0:
+        rate_limiter = AdaptiveRateLimiter(args.rate_limit, min_rate=min(1.0, args.rate_limit),
+                                           max_rate=max(args.max_rate, args.rate_limit))
+    scheduler = FetchScheduler(args.max_retries, args.timeout, rate_limiter=rate_limiter)
+    configure_default_client(pool_maxsize=pool_size, cache=cache, scheduler=scheduler)
+    if args.role is not None:
+        run_sharded(args, scheduler)
+        return
+    price_history = PriceHistory(args.history) if args.history else None
+    crawl_diff = CrawlDiff(args.diff_dir) if args.diff_dir else None
+    journal = CrawlJournal(args.journal, resume=args.resume) if not args.listing_only else None
+    exporters = [EXPORTERS[name](args.export_dir) if args.export_dir else EXPORTERS[name]() for name in args.export]
+    scraper_manager = build_manager(args, resume=args.resume, price_history=price_history, crawl_diff=crawl_diff,
+                                    exporters=exporters, journal=journal)
+    try:
+        with profiling(args.profile, args.profile_output):
+            if args.listing_only:
+                scraper_manager.track_prices()
+            else:
+                scraper_manager.extract_all_books()
+    finally:
+        if price_history is not None:
+            price_history.close()
+        if scheduler.save_dead_letters(args.dead_letters):
+            logger.warning("URLs abandonnées enregistrées dans %s", args.dead_letters)
+        if args.report:
+            scraper_manager.metrics.save_report(args.report, scraper_manager.run_report())
+            logger.info("Rapport du passage enregistré dans %s", args.report)
+
+
+def build_manager(args, **options):
+    """
+    Crée le gestionnaire de scraping du moteur choisi (séquentiel ou asynchrone).
+
+    Args:
+        args (argparse.Namespace): Les options de la ligne de commande.
+        **options: Arguments supplémentaires du gestionnaire (répertoires, historique, journal, etc.).
+
+    Returns:
+        ScraperManager: Le gestionnaire de scraping.
+    """
+    options.setdefault('csv_directory', os.path.join(args.output_dir, 'datas_csv'))
+    options.setdefault('image_directory', os.path.join(args.output_dir, 'book_images'))
+    options.update(parser_backend=args.parser, image_workers=args.image_workers, parse_workers=args.parse_workers,
+                   parse_batch_size=args.parse_batch_size, page_workers=args.page_workers,
+                   categories=args.categories, fields=args.fields, download_images=not args.no_images)
+    if args.engine == 'async':
+        return AsyncScraperManager(args.base_url, max_per_host=args.max_per_host, **options)
+    return ScraperManager(args.base_url, **options)
+
+
+def run_sharded(args, scheduler):
+    """
+    Lance le rôle de coordinateur ou de worker d'un crawl réparti par catégories (voir sharding.py).
+
+    Le coordinateur répartit les catégories de la page d'accueil en shards dans la file de travail, attend que
+    les workers les aient extraites, puis fusionne leurs sorties dans `datas_csv` et `book_images` (sous
+    `--output-dir`). Chaque worker extrait des shards jusqu'à ce qu'il n'en reste plus, sans retélécharger les
+    images déjà présentes dans le `book_images` de son `--output-dir` (le même que celui du coordinateur) ;
+    l'historique des prix, la détection des changements, les exports et le journal de reprise ne sont pas
+    utilisés en mode réparti.
+    Chaque rôle écrit ses dead letters (et, pour un worker, son rapport) à part : voir resolve_output_paths.
+
+    Args:
+        args (argparse.Namespace): Les options de la ligne de commande.
+        scheduler (FetchScheduler): La politique de requêtes du client HTTP partagé.
+    """
+    with ShardQueue(args.queue) as queue:
+        if args.role == 'coordinator':
+            try:
+                category_urls = DataExtractor(args.base_url).extract_category_urls()
+                if args.categories:
+                    category_urls, unknown = select_category_urls(category_urls, args.categories)
+                    if unknown:
+                        logger.error("Catégories introuvables sur le site : %s", ', '.join(unknown))
+                progress = coordinate(queue, category_urls, os.path.join(args.output_dir, 'datas_csv'),
+                                      os.path.join(args.output_dir, 'book_images'), args.poll_interval,
+                                      args.shard_dir)
+            finally:
+                if scheduler.save_dead_letters(args.dead_letters):
+                    logger.warning("URLs abandonnées enregistrées dans %s", args.dead_letters)
+            logger.info("Crawl réparti terminé : %d shards fusionnés, %d en échec", progress['merged'],
+                        progress['failed'], extra=progress)
+            return
+
+        metrics = Metrics()  # Mesures communes à tous les shards du worker
+        # Images déjà fusionnées par le coordinateur : elles ne sont pas retéléchargées dans les shards
+        final_image_directory = os.path.join(args.output_dir, 'book_images')
+
+        def make_manager(csv_directory, image_directory):
+            return build_manager(args, csv_directory=csv_directory, image_directory=image_directory, metrics=metrics,
+                                 reference_image_directory=final_image_directory)
+
+        try:
+            with profiling(args.profile, args.profile_output):
+                run_worker(queue, make_manager, args.shard_dir, args.worker_id, args.lease, args.poll_interval)
+        finally:
+            if scheduler.save_dead_letters(args.dead_letters):
+                logger.warning("URLs abandonnées enregistrées dans %s", args.dead_letters)
+            if args.report:
+                metrics.save_report(args.report, {'fetch': dict(scheduler.stats)})
+                logger.info("Rapport du worker enregistré dans %s", args.report)
 
 
 if __name__ == "__main__":
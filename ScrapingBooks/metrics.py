@@ -0,0 +1,234 @@
+import bisect
+import contextlib
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # pyinstrument est facultatif : seul le profilage --profile pyinstrument en a besoin
+    Profiler = None
+
+logger = logging.getLogger(__name__)
+
+# Bornes supérieures des seaux des histogrammes de latence, en secondes
+LATENCY_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+
+
+class LatencyHistogram:
+    """
+    Histogramme de latences à seaux fixes.
+
+    La mémoire utilisée ne dépend pas du nombre de mesures : seuls le nombre de mesures de chaque seau,
+    leur somme et leur maximum sont conservés. Les centiles sont estimés par la borne supérieure du seau
+    qui les contient.
+
+    Attributs :
+        buckets (tuple): Bornes supérieures des seaux, en secondes (un dernier seau reçoit les mesures au-delà).
+        counts (list): Nombre de mesures de chaque seau.
+        count (int): Nombre total de mesures.
+        total (float): Somme des mesures, en secondes.
+        max (float): Mesure maximale, en secondes.
+    """
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        Initialise un histogramme vide.
+
+        Paramètres :
+            buckets (tuple): Bornes supérieures des seaux, en secondes, par ordre croissant.
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        """
+        Ajoute une mesure.
+
+        Args:
+            seconds (float): La durée mesurée, en secondes.
+        """
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """
+        Estime un centile.
+
+        Args:
+            q (float): Le centile, entre 0 et 1 (0.95 pour le 95e centile).
+
+        Returns:
+            float: La borne supérieure du seau contenant le centile (le maximum pour le dernier seau),
+            ou None s'il n'y a aucune mesure.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        """Résume l'histogramme (nombre, moyenne, centiles, maximum et seaux non vides)."""
+        labels = [f"<={bound:g}" for bound in self.buckets] + [f">{self.buckets[-1]:g}"]
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'max': self.max,
+            'buckets': {label: count for label, count in zip(labels, self.counts) if count},
+        }
+
+
+class Metrics:
+    """
+    Compteurs et durées des étapes du pipeline de scraping, globalement et par catégorie.
+
+    Les étapes (extraction des URLs d'une catégorie, téléchargement et parsing des pages produit, écriture
+    CSV, sauvegarde des images) sont mesurées par `timer` ou `record`. Chaque mesure alimente l'histogramme
+    global de son étape et, si la catégorie est connue, celui de l'étape dans la catégorie. Les mesures
+    peuvent provenir de plusieurs threads.
+
+    Attributs :
+        counters (dict): Compteurs nommés (livres écrits, livres en échec, etc.).
+        stages (dict): Histogramme de latence de chaque étape.
+        categories (dict): Pour chaque catégorie, l'histogramme de latence de chaque étape.
+        started_at (float): Date de création (timestamp).
+    """
+    def __init__(self):
+        """Initialise des compteurs et des histogrammes vides."""
+        self.counters = {}
+        self.stages = {}
+        self.categories = {}
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def timer(self, stage, category=None):
+        """
+        Mesure la durée d'un bloc `with` et l'ajoute à l'histogramme d'une étape.
+
+        Args:
+            stage (str): Nom de l'étape.
+            category (str, optionnel): Catégorie concernée.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start, category)
+
+    def record(self, stage, seconds, category=None):
+        """
+        Ajoute une durée à l'histogramme d'une étape.
+
+        Args:
+            stage (str): Nom de l'étape.
+            seconds (float): La durée mesurée, en secondes.
+            category (str, optionnel): Catégorie concernée.
+        """
+        with self._lock:
+            self.stages.setdefault(stage, LatencyHistogram()).record(seconds)
+            if category:
+                self.categories.setdefault(category, {}).setdefault(stage, LatencyHistogram()).record(seconds)
+
+    def count(self, name, value=1):
+        """
+        Incrémente un compteur.
+
+        Args:
+            name (str): Nom du compteur.
+            value (int): Valeur ajoutée.
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self):
+        """
+        Résume les mesures.
+
+        Returns:
+            dict: Durée écoulée ('duration_sec'), compteurs ('counters'), histogramme de chaque étape
+            ('stages') et de chaque étape par catégorie ('categories').
+        """
+        with self._lock:
+            return {
+                'started_at': self.started_at,
+                'duration_sec': time.perf_counter() - self._start,
+                'counters': dict(self.counters),
+                'stages': {stage: histogram.to_dict() for stage, histogram in self.stages.items()},
+                'categories': {
+                    category: {stage: histogram.to_dict() for stage, histogram in stages.items()}
+                    for category, stages in sorted(self.categories.items())
+                },
+            }
+
+    def save_report(self, path, extra=None):
+        """
+        Écrit le rapport JSON du passage.
+
+        Args:
+            path (str): Chemin du fichier.
+            extra (dict, optionnel): Sections ajoutées au rapport (statistiques HTTP, images, etc.).
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({**self.report(), **(extra or {})}, file, indent=2, ensure_ascii=False)
+
+
+@contextlib.contextmanager
+def profiling(profiler=None, output=None):
+    """
+    Profile le bloc `with` avec cProfile ou pyinstrument (sans effet si `profiler` est None).
+
+    Args:
+        profiler (str, optionnel): 'cprofile' ou 'pyinstrument' (à installer séparément).
+        output (str, optionnel): Fichier de sortie : statistiques cProfile (à ouvrir avec pstats ou snakeviz)
+        ou page HTML pyinstrument. Sans fichier, le résumé est seulement journalisé.
+    """
+    if profiler is None:
+        yield
+        return
+    if profiler == 'pyinstrument':
+        if Profiler is None:
+            raise ImportError("le profilage pyinstrument nécessite pyinstrument (pip install pyinstrument)")
+        session = Profiler()
+        session.start()
+        try:
+            yield
+        finally:
+            session.stop()
+            if output:
+                with open(output, 'w', encoding='utf-8') as file:
+                    file.write(session.output_html())
+            logger.info("Profil pyinstrument :\n%s", session.output_text())
+        return
+    session = cProfile.Profile()
+    session.enable()
+    try:
+        yield
+    finally:
+        session.disable()
+        if output:
+            session.dump_stats(output)
+        summary = io.StringIO()
+        pstats.Stats(session, stream=summary).sort_stats('cumulative').print_stats(20)
+        logger.info("Profil cProfile (20 fonctions les plus coûteuses) :\n%s", summary.getvalue())
@@ -0,0 +1,335 @@
+"""
+Serveur local imitant books.toscrape.com, pour mesurer le scraper sans accès au réseau.
+
+Le catalogue (catégories, pages de liste, pages produit et images) est généré de manière déterministe
+à partir d'une graine ; une latence et un taux d'erreurs peuvent être injectés sur chaque requête.
+
+Utilisation :
+    python mock_server.py --port 8000 --categories 5 --books 40
+    python main.py --base-url http://127.0.0.1:8000/
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RATING_WORDS = ['One', 'Two', 'Three', 'Four', 'Five']
+STATS_PATH = '/__stats__'  # Chemin renvoyant les compteurs du serveur au format JSON
+
+
+class MockCatalogue:
+    """
+    Catalogue de livres généré, rendu avec la structure HTML des pages de books.toscrape.com.
+
+    Toutes les réponses sont produites à la création du catalogue, afin que le coût de génération
+    ne fausse pas les mesures. Une image sur dix est l'image par défaut du site, partagée par
+    plusieurs livres, comme sur le site réel.
+
+    Attributs :
+        categories (int): Nombre de catégories.
+        books_per_category (int): Nombre de livres par catégorie.
+        books_per_page (int): Nombre de livres par page de liste.
+        image_size (int): Taille des images de couverture, en octets.
+        resources (dict): Pour chaque chemin, le type de contenu et le contenu de la réponse.
+    """
+    def __init__(self, categories=5, books_per_category=40, books_per_page=20, image_size=8192, seed=0):
+        """
+        Génère le catalogue.
+
+        Paramètres :
+            categories (int): Nombre de catégories.
+            books_per_category (int): Nombre de livres par catégorie.
+            books_per_page (int): Nombre de livres par page de liste.
+            image_size (int): Taille des images de couverture, en octets.
+            seed (int): Graine du générateur (même graine, même catalogue).
+        """
+        if categories < 1 or books_per_category < 1 or books_per_page < 1:
+            raise ValueError("le catalogue doit contenir au moins une catégorie, un livre et un livre par page")
+        self.categories = categories
+        self.books_per_category = books_per_category
+        self.books_per_page = books_per_page
+        self.image_size = image_size
+        self._random = random.Random(seed)
+        self._placeholder = self._image_content()
+        self.resources = {}
+        self._build()
+
+    @property
+    def book_count(self):
+        """Nombre total de livres du catalogue."""
+        return self.categories * self.books_per_category
+
+    @property
+    def page_count(self):
+        """Nombre total de pages HTML du catalogue (accueil, pages de liste et pages produit)."""
+        return sum(1 for content_type, _ in self.resources.values() if content_type.startswith('text/html'))
+
+    def _build(self):
+        """Génère toutes les pages et les images du catalogue."""
+        names = [(f"Category {index}", f"category-{index}_{index + 2}") for index in range(self.categories)]
+        self._add_page('/index.html', _home_page(names))
+        self.resources['/'] = self.resources['/index.html']
+        book_id = 0
+        for category_index, (category, slug) in enumerate(names):
+            books = []
+            for position in range(self.books_per_category):
+                book_id += 1
+                book = {
+                    'title': f"Book {book_id} of {category}",
+                    'slug': f"book-{book_id}_{book_id}",
+                    'upc': hashlib.md5(f"book-{book_id}".encode()).hexdigest()[:16],
+                    'price': round(10 + self._random.random() * 50, 2),
+                    'available': self._random.randint(0, 22),
+                    'rating': RATING_WORDS[self._random.randrange(5)],
+                    'image': f"/media/cache/{hashlib.md5(str(book_id).encode()).hexdigest()}.jpg",
+                }
+                books.append(book)
+                self._add_page(f"/catalogue/{book['slug']}/index.html", _product_page(book, category, slug))
+                image = self._placeholder if book_id % 10 == 0 else self._image_content()
+                self.resources[book['image']] = ('image/jpeg', image)
+
+            pages = [books[start:start + self.books_per_page]
+                     for start in range(0, len(books), self.books_per_page)]
+            for number, page_books in enumerate(pages, start=1):
+                filename = 'index.html' if number == 1 else f"page-{number}.html"
+                self._add_page(f"/catalogue/category/books/{slug}/{filename}",
+                               _category_page(category, page_books, number, len(pages)))
+
+    def _add_page(self, path, html):
+        """Enregistre une page HTML du catalogue."""
+        self.resources[path] = ('text/html; charset=utf-8', html.encode('utf-8'))
+
+    def _image_content(self):
+        """Génère le contenu d'une image de couverture (en-tête JPEG suivi d'octets aléatoires)."""
+        return b'\xff\xd8\xff\xe0' + self._random.randbytes(max(0, self.image_size - 4))
+
+
+def _home_page(names):
+    """Rend la page d'accueil et la liste des catégories."""
+    items = ''.join(f'<li><a href="catalogue/category/books/{slug}/index.html">{name}</a></li>'
+                    for name, slug in names)
+    return ('<html><head><title>All products | Books to Scrape</title></head><body>'
+            '<ul class="nav nav-list"><li><a href="catalogue/category/books_1/index.html">Books</a>'
+            f'<ul>{items}</ul></li></ul></body></html>')
+
+
+def _category_page(category, books, number, page_total):
+    """Rend une page de liste d'une catégorie, avec sa pagination."""
+    articles = ''.join(
+        '<li><article class="product_pod"><div class="image_container">'
+        f'<a href="../../../{book["slug"]}/index.html"><img src="../../../..{book["image"]}" '
+        f'alt="{book["title"]}" class="thumbnail"></a></div>'
+        f'<p class="star-rating {book["rating"]}"></p>'
+        f'<h3><a href="../../../{book["slug"]}/index.html" title="{book["title"]}">{book["title"]}</a></h3>'
+        f'<div class="product_price"><p class="price_color">£{book["price"]:.2f}</p>'
+        f'{_listing_availability(book)}</div></article></li>'
+        for book in books
+    )
+    pager = ''
+    if page_total > 1:
+        pager = f'<ul class="pager"><li class="current">Page {number} of {page_total}</li>'
+        if number < page_total:
+            pager += f'<li class="next"><a href="page-{number + 1}.html">next</a></li>'
+        pager += '</ul>'
+    return (f'<html><head><title>{category} | Books to Scrape</title></head><body>'
+            f'<div class="page-header"><h1>{category}</h1></div><ol class="row">{articles}</ol>{pager}'
+            '</body></html>')
+
+
+def _listing_availability(book):
+    """Rend la présence en stock d'un livre sur une page de liste, d'après son nombre d'exemplaires."""
+    if book['available']:
+        return '<p class="instock availability"><i class="icon-ok"></i> In stock</p>'
+    return '<p class="availability"><i class="icon-remove"></i> Out of stock</p>'
+
+
+def _product_page(book, category, category_slug):
+    """Rend la page produit d'un livre."""
+    price = f"£{book['price']:.2f}"
+    return (
+        f'<html><head><title>{book["title"]} | Books to Scrape</title></head><body>'
+        '<ul class="breadcrumb"><li><a href="../../index.html">Home</a></li>'
+        '<li><a href="../category/books_1/index.html">Books</a></li>'
+        f'<li><a href="../category/books/{category_slug}/index.html">{category}</a></li>'
+        f'<li class="active">{book["title"]}</li></ul>'
+        f'<div class="item active"><img src="../..{book["image"]}" alt="{book["title"]}"></div>'
+        f'<div class="product_main"><h1>{book["title"]}</h1><p class="price_color">{price}</p>'
+        f'<p class="instock availability"><i class="icon-ok"></i> In stock ({book["available"]} available)</p>'
+        f'<p class="star-rating {book["rating"]}"></p></div>'
+        '<div id="product_description" class="sub-header"><h2>Product Description</h2></div>'
+        f'<p>A generated description for {book["title"]}, long enough to look like a real one.</p>'
+        '<table class="table table-striped">'
+        f'<tr><th>UPC</th><td>{book["upc"]}</td></tr><tr><th>Product Type</th><td>Books</td></tr>'
+        f'<tr><th>Price (excl. tax)</th><td>{price}</td></tr><tr><th>Price (incl. tax)</th><td>{price}</td></tr>'
+        '<tr><th>Tax</th><td>£0.00</td></tr>'
+        f'<tr><th>Availability</th><td>In stock ({book["available"]} available)</td></tr>'
+        '<tr><th>Number of reviews</th><td>0</td></tr></table></body></html>'
+    )
+
+
+class MockServer:
+    """
+    Serveur HTTP local servant un MockCatalogue dans un thread d'arrière-plan.
+
+    Le serveur gère les requêtes GET et HEAD, les ETag (réponses 304) et les connexions keep-alive.
+    Il compte les réponses servies par type, accessibles via l'attribut `stats` ou le chemin
+    `/__stats__` (utile lorsque le serveur tourne dans un autre processus).
+
+    Attributs :
+        catalogue (MockCatalogue): Le catalogue servi.
+        latency (float): Délai ajouté à chaque requête, en secondes.
+        error_rate (float): Proportion de requêtes répondant par une erreur 503.
+        stats (dict): Nombre de pages ('pages'), d'images ('images'), de réponses 304 ('not_modified'),
+        d'erreurs injectées ('errors') et de chemins inconnus ('not_found').
+    """
+    def __init__(self, catalogue, latency=0.0, error_rate=0.0, host='127.0.0.1', port=0, seed=0):
+        """
+        Prépare le serveur (il est lancé par `start`).
+
+        Paramètres :
+            catalogue (MockCatalogue): Le catalogue à servir.
+            latency (float): Délai ajouté à chaque requête, en secondes.
+            error_rate (float): Proportion de requêtes répondant par une erreur 503 (entre 0 et 1).
+            host (str): Adresse d'écoute.
+            port (int): Port d'écoute (0 : port libre choisi par le système).
+            seed (int): Graine du tirage des erreurs injectées.
+        """
+        if not 0 <= error_rate <= 1:
+            raise ValueError("error_rate doit être compris entre 0 et 1")
+        self.catalogue = catalogue
+        self.latency = latency
+        self.error_rate = error_rate
+        self.host = host
+        self.port = port
+        self.stats = {'pages': 0, 'images': 0, 'not_modified': 0, 'errors': 0, 'not_found': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        """URL de base du site servi (avec la barre oblique finale)."""
+        return f"http://{self.host}:{self.port}/"
+
+    def start(self):
+        """Lance le serveur dans un thread d'arrière-plan."""
+        self._server = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='mock-server', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arrête le serveur."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def respond(self, path, method='GET', etag=None):
+        """
+        Calcule la réponse à une requête et met à jour les compteurs.
+
+        Args:
+            path (str): Chemin demandé (sans la chaîne de requête).
+            method (str): 'GET' ou 'HEAD'.
+            etag (str, optionnel): Valeur de l'en-tête If-None-Match.
+
+        Returns:
+            tuple: Code HTTP, en-têtes (dict) et contenu (bytes) de la réponse.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        if path == STATS_PATH:
+            with self._lock:
+                body = json.dumps(self.stats).encode()
+            return 200, {'Content-Type': 'application/json'}, body
+        with self._lock:
+            failed = self.error_rate and self._random.random() < self.error_rate
+            if failed:
+                self.stats['errors'] += 1
+        if failed:
+            return 503, {'Content-Type': 'text/plain', 'Retry-After': '1'}, b'Service Unavailable'
+
+        resource = self.catalogue.resources.get(path)
+        if resource is None:
+            with self._lock:
+                self.stats['not_found'] += 1
+            return 404, {'Content-Type': 'text/plain'}, b'Not Found'
+        content_type, content = resource
+        headers = {'Content-Type': content_type, 'ETag': f'"{hashlib.md5(content).hexdigest()}"'}
+        with self._lock:
+            if etag == headers['ETag']:
+                self.stats['not_modified'] += 1
+                return 304, headers, b''
+            if method == 'GET':
+                self.stats['images' if content_type == 'image/jpeg' else 'pages'] += 1
+        return 200, headers, content
+
+
+def _make_handler(server):
+    """Construit la classe de gestionnaire de requêtes liée à un MockServer."""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Connexions keep-alive, comme le site réel
+        disable_nagle_algorithm = True  # En-têtes et contenu sont envoyés séparément
+
+        def do_GET(self):
+            self._reply('GET')
+
+        def do_HEAD(self):
+            self._reply('HEAD')
+
+        def _reply(self, method):
+            status, headers, content = server.respond(self.path.split('?')[0], method,
+                                                      self.headers.get('If-None-Match'))
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            if method == 'GET' and content:
+                self.wfile.write(content)
+
+        def log_message(self, format, *args):
+            pass  # Pas de journal par requête
+
+    return Handler
+
+
+def main():
+    """Lance le serveur au premier plan jusqu'à interruption (Ctrl+C)."""
+    parser = argparse.ArgumentParser(description="Serveur local imitant books.toscrape.com.")
+    parser.add_argument('--port', type=int, default=8000, help="Port d'écoute.")
+    parser.add_argument('--categories', type=int, default=5, help="Nombre de catégories.")
+    parser.add_argument('--books', type=int, default=40, help="Nombre de livres par catégorie.")
+    parser.add_argument('--per-page', type=int, default=20, help="Nombre de livres par page de liste.")
+    parser.add_argument('--latency', type=float, default=0.0, help="Délai ajouté à chaque requête, en secondes.")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Proportion de requêtes en erreur 503.")
+    parser.add_argument('--seed', type=int, default=0, help="Graine du catalogue et des erreurs injectées.")
+    args = parser.parse_args()
+
+    catalogue = MockCatalogue(args.categories, args.books, args.per_page, seed=args.seed)
+    server = MockServer(catalogue, args.latency, args.error_rate, port=args.port, seed=args.seed)
+    server.start()
+    print(f"Catalogue de {catalogue.book_count} livres servi sur {server.url} (Ctrl+C pour arrêter)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
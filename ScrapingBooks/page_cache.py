@@ -0,0 +1,157 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class _PageEntry:
+    """Page parsée conservée dans le cache, avec les champs déjà extraits de cette page."""
+    __slots__ = ('soup', 'digest', 'size', 'stored_at', 'fields')
+
+    def __init__(self, soup, digest, size):
+        self.soup = soup
+        self.digest = digest
+        self.size = size
+        self.stored_at = time.time()
+        self.fields = {}
+
+
+class PageCache:
+    """
+    Cache en mémoire des pages parsées et des champs extraits, indexé par URL.
+
+    Revisiter une URL (page d'accueil, pages de liste d'un suivi des prix, même livre listé plusieurs fois)
+    ne reparse pas la page : si le contenu téléchargé est identique à celui de la page conservée (même
+    empreinte), l'arbre BeautifulSoup et les champs déjà extraits sont réutilisés. Une page conservée
+    depuis moins de `max_age` secondes est réutilisée sans même être retéléchargée. Le nombre de pages et
+    leur taille cumulée sont plafonnés, les pages les moins récemment utilisées étant retirées en premier (LRU).
+
+    Attributs :
+        max_entries (int): Nombre maximal de pages conservées.
+        max_bytes (int): Taille cumulée maximale des pages HTML conservées, en octets (l'arbre BeautifulSoup
+        d'une page occupe en mémoire plusieurs fois la taille de son HTML).
+        max_age (float): Durée en secondes pendant laquelle une page est réutilisée sans être retéléchargée.
+        None ou 0 pour toujours la retélécharger (seul le parsing est alors évité).
+        stats (dict): Compteurs 'hits' (page réutilisée), 'misses' (page parsée), 'evictions',
+        'field_hits' (champ réutilisé) et 'field_misses' (champ extrait).
+    """
+    def __init__(self, max_entries=256, max_bytes=32 * 1024 * 1024, max_age=None):
+        """
+        Initialise un cache vide.
+
+        Paramètres :
+            max_entries (int): Nombre maximal de pages conservées.
+            max_bytes (int): Taille cumulée maximale des pages HTML conservées, en octets.
+            max_age (float, optionnel): Durée de fraîcheur des pages, en secondes.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries doit être supérieur ou égal à 1")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'field_hits': 0, 'field_misses': 0}
+        self._entries = OrderedDict()  # URL -> _PageEntry, de la moins récemment utilisée à la plus récente
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def soup(self, url, fetch_content, parse):
+        """
+        Retourne la page parsée d'une URL, en la téléchargeant et en la parsant seulement si nécessaire.
+
+        Args:
+            url (str): URL de la page.
+            fetch_content (callable): Fonction sans argument qui télécharge le contenu de la page (None en
+            cas d'échec).
+            parse (callable): Fonction qui parse un contenu HTML et retourne l'objet BeautifulSoup.
+
+        Returns:
+            BeautifulSoup: La page parsée, ou None si elle n'a pas pu être téléchargée.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None and self.max_age and time.time() - entry.stored_at < self.max_age:
+                return self._hit(url, entry)
+        content = fetch_content()
+        if content is None:
+            return None
+        digest = hashlib.blake2b(content, digest_size=16).digest()
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None and entry.digest == digest:  # Page inchangée : ni parsing, ni extraction
+                entry.stored_at = time.time()
+                return self._hit(url, entry)
+        soup = parse(content)
+        with self._lock:
+            self.stats['misses'] += 1
+            self._remove(url)
+            self._entries[url] = _PageEntry(soup, digest, len(content))
+            self._bytes += len(content)
+            self._evict()
+        return soup
+
+    def field(self, url, soup, name, extract):
+        """
+        Retourne un champ extrait d'une page, en ne l'extrayant qu'une fois par version de la page.
+
+        Args:
+            url (str): URL de la page.
+            soup (BeautifulSoup): La page parsée dont le champ est extrait.
+            name (str): Nom du champ.
+            extract (callable): Fonction sans argument qui extrait le champ.
+
+        Returns:
+            La valeur du champ. Elle n'est mémorisée que si `soup` est la page conservée pour cette URL.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None or entry.soup is not soup:
+                entry = None
+            elif name in entry.fields:
+                self.stats['field_hits'] += 1
+                return entry.fields[name]
+            self.stats['field_misses'] += 1
+        value = extract()
+        if entry is not None:
+            with self._lock:
+                entry.fields[name] = value
+        return value
+
+    def invalidate(self, url):
+        """Retire une page du cache."""
+        with self._lock:
+            self._remove(url)
+
+    def clear(self):
+        """Vide le cache."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def report(self):
+        """
+        Résume l'état du cache.
+
+        Returns:
+            dict: Compteurs (voir `stats`), nombre de pages conservées ('entries') et leur taille ('bytes').
+        """
+        with self._lock:
+            return {**self.stats, 'entries': len(self._entries), 'bytes': self._bytes}
+
+    def _hit(self, url, entry):
+        """Compte une page réutilisée et la marque comme récemment utilisée (verrou déjà acquis)."""
+        self.stats['hits'] += 1
+        self._entries.move_to_end(url)
+        return entry.soup
+
+    def _remove(self, url):
+        """Retire une page du cache (verrou déjà acquis)."""
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _evict(self):
+        """Retire les pages les moins récemment utilisées tant qu'une limite est dépassée (verrou déjà acquis)."""
+        while len(self._entries) > self.max_entries or (self._bytes > self.max_bytes and len(self._entries) > 1):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.stats['evictions'] += 1
@@ -0,0 +1,144 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from book_parser import BookPageParser
+from books import Book
+
+_worker_parser = None  # Parser propre à chaque processus worker
+
+
+def _init_worker(backend, fields):
+    """Crée le parser du processus worker (appelée une fois au démarrage du processus)."""
+    global _worker_parser
+    _worker_parser = BookPageParser(backend, fields)
+
+
+def _parse_batch(pages):
+    """
+    Parse un lot de pages produit dans un processus worker.
+
+    Args:
+        pages (list): Couples (URL du livre, contenu HTML).
+
+    Returns:
+        list: Pour chaque livre, un tuple compact (voir Book.to_row), moins coûteux à transmettre qu'un objet,
+        et la durée de son parsing en secondes.
+    """
+    results = []
+    for book_url, content in pages:
+        start = time.perf_counter()
+        row = _worker_parser.parse(content, book_url).to_row()
+        results.append((row, time.perf_counter() - start))
+    return results
+
+
+class ParsePool:
+    """
+    Étape de parsing des pages produit répartie sur plusieurs processus.
+
+    Le parsing HTML est limité à un seul cœur dans un processus Python (GIL). Ce pool envoie les pages
+    brutes, par lots, à des processus workers qui renvoient des enregistrements compacts, convertis
+    en objets Book dans le processus principal. Le résultat est identique au parsing en processus.
+
+    Attributs :
+        workers (int): Nombre de processus workers (None : un par cœur).
+        batch_size (int): Nombre de pages envoyées à un worker en une fois.
+        backend (str): Backend de parsing utilisé par les workers.
+        fields (frozenset): Champs extraits par les workers (voir BookPageParser), ou None pour tous.
+        metrics (Metrics): Mesures du pipeline (étape 'parse', par catégorie), ou None.
+    """
+    def __init__(self, workers=None, batch_size=16, backend=None, fields=None, metrics=None):
+        """
+        Initialise le pool (les processus sont lancés par `start`).
+
+        Paramètres :
+            workers (int, optionnel): Nombre de processus workers. Par défaut, un par cœur.
+            batch_size (int): Nombre de pages envoyées à un worker en une fois.
+            backend (str, optionnel): Backend de parsing ('lxml' ou 'html.parser').
+            fields (iterable, optionnel): Champs à extraire (voir BookPageParser). Par défaut, tous.
+            metrics (Metrics, optionnel): Mesures du pipeline auxquelles ajouter la durée de parsing de chaque
+            page, mesurée dans les workers.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size doit être supérieur ou égal à 1")
+        self.workers = workers
+        self.batch_size = batch_size
+        parser = BookPageParser(backend, fields)
+        self.backend = parser.backend
+        self.fields = parser.fields
+        self.metrics = metrics
+        self._executor = None
+
+    def start(self):
+        """Lance les processus workers."""
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             initargs=(self.backend, self.fields))
+
+    def close(self):
+        """Attend la fin des lots en cours et arrête les processus workers."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def submit_batch(self, pages):
+        """
+        Envoie un lot de pages à parser à un worker.
+
+        Args:
+            pages (list): Couples (URL du livre, contenu HTML).
+
+        Returns:
+            concurrent.futures.Future: Future dont le résultat est passé à `books_from_result`.
+        """
+        return self._executor.submit(_parse_batch, pages)
+
+    def books_from_result(self, results):
+        """
+        Reconstruit les objets Book à partir du résultat d'un lot et enregistre la durée de leur parsing.
+
+        Args:
+            results (list): Résultat d'un lot (un tuple et une durée par livre).
+
+        Returns:
+            list: Les livres du lot, dans l'ordre des pages envoyées.
+        """
+        books = []
+        for row, parse_seconds in results:
+            book = Book(*row)
+            if self.metrics is not None:
+                self.metrics.record('parse', parse_seconds, book.category)
+            books.append(book)
+        return books
+
+    def parse_many(self, pages):
+        """
+        Parse une suite de pages par lots et restitue les livres dans l'ordre des pages.
+
+        Les lots sont envoyés aux workers au fur et à mesure de la lecture de `pages` : si `pages`
+        est un générateur qui télécharge les pages, téléchargement et parsing se recouvrent.
+
+        Args:
+            pages (iterable): Couples (URL du livre, contenu HTML).
+
+        Yields:
+            Book: Les livres extraits, dans l'ordre des pages.
+        """
+        pending = []  # Lots envoyés aux workers, dans l'ordre
+        batch = []
+        for page in pages:
+            batch.append(page)
+            if len(batch) == self.batch_size:
+                pending.append(self.submit_batch(batch))
+                batch = []
+                while pending and pending[0].done():
+                    yield from self.books_from_result(pending.pop(0).result())
+        if batch:
+            pending.append(self.submit_batch(batch))
+        for future in pending:
+            yield from self.books_from_result(future.result())
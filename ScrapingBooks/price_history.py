@@ -0,0 +1,280 @@
+"""
+Historique des prix des livres, conservé d'un passage à l'autre dans une base SQLite.
+
+Utilisation :
+    python price_history.py price_history.sqlite --changes
+    python price_history.py price_history.sqlite --series a897fe39b1053632
+    python price_history.py price_history.sqlite --top-movers --limit 5
+"""
+import argparse
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+# Évolution du prix (taxes incluses) d'un livre entre deux passages
+PriceChange = namedtuple('PriceChange', ['upc', 'title', 'category', 'old_price', 'new_price', 'change'])
+# Prix et disponibilité d'un livre lors d'un passage
+PricePoint = namedtuple('PricePoint', ['run_id', 'started_at', 'price_incl_tax', 'price_excl_tax', 'availability'])
+
+
+class PriceHistory:
+    """
+    Enregistre à chaque passage un instantané des livres extraits dans une base SQLite.
+
+    Chaque passage (run) reçoit un identifiant et une date. Les livres sont ajoutés par lots, chaque lot
+    étant inséré en une seule transaction : l'écriture de milliers de livres ne coûte que quelques
+    validations sur disque. Les instantanés sont indexés par UPC et par passage, ce qui permet de retrouver
+    rapidement l'évolution d'un prix, les changements depuis le dernier passage ou les plus fortes
+    variations d'une catégorie, sans relire les fichiers CSV.
+
+    Attributs :
+        path (str): Chemin de la base SQLite.
+        batch_size (int): Nombre de livres mis en attente avant une insertion groupée.
+        run_id (int): Identifiant du passage en cours d'enregistrement, ou None.
+    """
+    def __init__(self, path='price_history.sqlite', batch_size=500):
+        """
+        Ouvre (ou crée) la base d'historique.
+
+        Paramètres :
+            path (str): Chemin de la base SQLite.
+            batch_size (int): Nombre de livres mis en attente avant une insertion groupée.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.run_id = None
+        self._pending = []
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS runs (run_id INTEGER PRIMARY KEY, started_at REAL)')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS prices ('
+            'upc TEXT, run_id INTEGER, product_book_url TEXT, title TEXT, category TEXT, '
+            'price_incl_tax REAL, price_excl_tax REAL, availability INTEGER, review_rating INTEGER, '
+            'PRIMARY KEY (upc, run_id)) WITHOUT ROWID'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS prices_run_category ON prices (run_id, category)')
+        self._db.commit()
+
+    def start_run(self, started_at=None, resume=False):
+        """
+        Démarre l'enregistrement d'un nouveau passage.
+
+        Args:
+            started_at (float, optionnel): Date du passage (timestamp). Par défaut, maintenant.
+            resume (bool): Poursuivre le dernier passage enregistré (reprise d'un passage interrompu) au lieu
+            d'en créer un nouveau. S'il n'y en a aucun, un nouveau passage est créé.
+
+        Returns:
+            int: L'identifiant du passage.
+        """
+        with self._lock:
+            self._flush()
+            if resume:
+                row = self._db.execute('SELECT MAX(run_id) FROM runs').fetchone()
+                if row[0] is not None:
+                    self.run_id = row[0]
+                    return self.run_id
+            cursor = self._db.execute('INSERT INTO runs (started_at) VALUES (?)', (started_at or time.time(),))
+            self._db.commit()
+            self.run_id = cursor.lastrowid
+        return self.run_id
+
+    def add(self, book):
+        """
+        Ajoute un livre à l'instantané du passage en cours (les livres sans UPC sont ignorés).
+
+        Args:
+            book (Book): Le livre extrait.
+        """
+        if self.run_id is None:
+            raise RuntimeError("aucun passage en cours : appelez start_run() avant add()")
+        if not book.upc:
+            return  # Page produit non téléchargée
+        with self._lock:
+            self._pending.append((
+                book.upc, self.run_id, book.product_book_url, book.title, book.category, book.price_incl_tax,
+                book.price_excl_tax, book.availability, book.review_rating,
+            ))
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def record_run(self, books, started_at=None):
+        """
+        Enregistre un passage complet à partir d'une suite de livres.
+
+        Args:
+            books (iterable): Les livres du passage.
+            started_at (float, optionnel): Date du passage (timestamp). Par défaut, maintenant.
+
+        Returns:
+            int: L'identifiant du passage.
+        """
+        run_id = self.start_run(started_at)
+        for book in books:
+            self.add(book)
+        self.flush()
+        return run_id
+
+    def flush(self):
+        """Insère les livres en attente."""
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        """Insère les livres en attente et ferme la base."""
+        self.flush()
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def runs(self):
+        """
+        Liste les passages enregistrés.
+
+        Returns:
+            list: Couples (identifiant, date) des passages, du plus ancien au plus récent.
+        """
+        with self._lock:
+            return self._db.execute('SELECT run_id, started_at FROM runs ORDER BY run_id').fetchall()
+
+    def price_changes(self, previous_run=None, current_run=None):
+        """
+        Liste les livres dont le prix a changé entre deux passages.
+
+        Args:
+            previous_run (int, optionnel): Passage de référence. Par défaut, l'avant-dernier.
+            current_run (int, optionnel): Passage comparé. Par défaut, le dernier.
+
+        Returns:
+            list: Un PriceChange par livre dont le prix taxes incluses a changé, par variation décroissante.
+        """
+        previous_run, current_run = self._resolve_runs(previous_run, current_run)
+        if current_run is None:
+            return []
+        return self._changes(previous_run, current_run, '', ())
+
+    def price_series(self, upc):
+        """
+        Retourne l'évolution du prix d'un livre.
+
+        Args:
+            upc (str): UPC du livre.
+
+        Returns:
+            list: Un PricePoint par passage où le livre a été extrait, du plus ancien au plus récent.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT p.run_id, r.started_at, p.price_incl_tax, p.price_excl_tax, p.availability '
+                'FROM prices p JOIN runs r ON r.run_id = p.run_id WHERE p.upc = ? ORDER BY p.run_id', (upc,)
+            ).fetchall()
+        return [PricePoint(*row) for row in rows]
+
+    def top_movers(self, category=None, limit=10, previous_run=None, current_run=None):
+        """
+        Retourne, pour chaque catégorie, les livres dont le prix a le plus varié entre deux passages.
+
+        Args:
+            category (str, optionnel): Limiter le résultat à cette catégorie.
+            limit (int): Nombre maximal de livres par catégorie.
+            previous_run (int, optionnel): Passage de référence. Par défaut, l'avant-dernier.
+            current_run (int, optionnel): Passage comparé. Par défaut, le dernier.
+
+        Returns:
+            dict: Pour chaque catégorie, les PriceChange classés par variation relative décroissante
+            (en valeur absolue).
+        """
+        previous_run, current_run = self._resolve_runs(previous_run, current_run)
+        if current_run is None:
+            return {}
+        condition, parameters = ('AND cur.category = ?', (category,)) if category else ('', ())
+        movers = {}
+        for change in self._changes(previous_run, current_run, condition, parameters):
+            category_movers = movers.setdefault(change.category, [])
+            if len(category_movers) < limit:
+                category_movers.append(change)
+        return movers
+
+    def _changes(self, previous_run, current_run, condition, parameters):
+        """Compare les prix de deux passages, triés par variation relative décroissante."""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT cur.upc, cur.title, cur.category, prev.price_incl_tax, cur.price_incl_tax '
+                'FROM prices cur JOIN prices prev ON prev.upc = cur.upc AND prev.run_id = ? '
+                f'WHERE cur.run_id = ? AND cur.price_incl_tax != prev.price_incl_tax {condition} '
+                'ORDER BY ABS(cur.price_incl_tax - prev.price_incl_tax) / prev.price_incl_tax DESC',
+                (previous_run, current_run) + parameters,
+            ).fetchall()
+        return [PriceChange(upc, title, category, old, new, new - old) for upc, title, category, old, new in rows]
+
+    def _resolve_runs(self, previous_run, current_run):
+        """Complète les passages à comparer par défaut avec les deux derniers passages enregistrés."""
+        run_ids = [run_id for run_id, _ in self.runs()]
+        if current_run is None:
+            current_run = run_ids[-1] if run_ids else None
+        if previous_run is None:
+            earlier = [run_id for run_id in run_ids if current_run is not None and run_id < current_run]
+            previous_run = earlier[-1] if earlier else None
+        if previous_run is None:
+            return None, None
+        return previous_run, current_run
+
+    def _flush(self):
+        """Insère en une transaction les livres en attente (verrou déjà acquis)."""
+        if not self._pending:
+            return
+        with self._db:  # Transaction validée en une fois
+            self._db.executemany('INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', self._pending)
+        self._pending = []
+
+
+def _format_date(timestamp):
+    """Formate une date de passage pour l'affichage."""
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M')
+
+
+def _print_change(change):
+    """Affiche une variation de prix."""
+    print(f"  {change.upc}  {change.old_price:8.2f} -> {change.new_price:8.2f}  ({change.change:+.2f})  {change.title}")
+
+
+def main():
+    """Affiche les requêtes d'historique demandées en ligne de commande."""
+    parser = argparse.ArgumentParser(description="Interroge l'historique des prix.")
+    parser.add_argument('database', help="Base SQLite d'historique des prix.")
+    parser.add_argument('--changes', action='store_true', help="Prix modifiés depuis le passage précédent.")
+    parser.add_argument('--series', metavar='UPC', help="Évolution du prix d'un livre.")
+    parser.add_argument('--top-movers', action='store_true', help="Plus fortes variations par catégorie.")
+    parser.add_argument('--category', help="Limiter --top-movers à une catégorie.")
+    parser.add_argument('--limit', type=int, default=5, help="Nombre de livres par catégorie pour --top-movers.")
+    args = parser.parse_args()
+
+    with PriceHistory(args.database) as history:
+        runs = history.runs()
+        print(f"{len(runs)} passages enregistrés" + (f", dernier le {_format_date(runs[-1][1])}" if runs else ''))
+        if args.changes:
+            changes = history.price_changes()
+            print(f"{len(changes)} prix modifiés depuis le passage précédent")
+            for change in changes:
+                _print_change(change)
+        if args.series:
+            for point in history.price_series(args.series):
+                print(f"  {_format_date(point.started_at)}  {point.price_incl_tax:8.2f}  "
+                      f"{point.availability} disponibles")
+        if args.top_movers:
+            for category, changes in history.top_movers(args.category, args.limit).items():
+                print(category)
+                for change in changes:
+                    _print_change(change)
+
+
+if __name__ == "__main__":
+    main()
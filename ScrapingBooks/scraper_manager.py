@@ -1,9 +1,18 @@
 # scraper_manager.py
-from data_extractor import DataExtractor
+import contextlib
+import itertools
+import logging
+import time
+from data_extractor import DataExtractor, select_category_urls
+from book_parser import BookPageParser, parse_html
 from books import Book
-import os
-import csv
-from utils import clean_filename
+from http_client import get_default_client
+from csv_writer import BookCsvWriter, csv_columns, read_books
+from image_downloader import ImageDownloader
+from parse_pool import ParsePool
+from metrics import Metrics
+
+logger = logging.getLogger(__name__)
 
 
 class ScraperManager:
@@ -13,17 +22,98 @@ class ScraperManager:
     Attributes:
         base_url (str): URL de base du site web à scraper.
         data_extractor (DataExtractor): Instance de DataExtractor utilisée pour extraire les données.
+        book_parser (BookPageParser): Parser extrayant en une seule passe les données des pages produit.
+        http_client (HttpClient): Client HTTP partagé par les pages et les images.
+        csv_directory (str): Répertoire des fichiers CSV.
+        resume (bool): Reprendre un crawl interrompu en complétant les fichiers CSV existants.
+        image_downloader (ImageDownloader): Étape de téléchargement des images de couverture, ou None si les
+        images ne sont pas téléchargées.
+        parse_pool (ParsePool): Étape de parsing multi-processus des pages produit, ou None pour parser
+        dans le processus principal.
+        page_workers (int): Nombre de pages de liste d'une catégorie téléchargées simultanément.
+        price_history (PriceHistory): Historique des prix, ou None pour ne conserver que les fichiers CSV.
+        crawl_diff (CrawlDiff): Détection des changements entre passages, ou None.
+        exporters (list): Exports supplémentaires des livres (Parquet, etc.), en plus des fichiers CSV.
+        journal (CrawlJournal): Journal de progression du crawl, ou None.
+        metrics (Metrics): Compteurs et durées des étapes du pipeline (voir `run_report`).
+        page_cache (PageCache): Cache des pages parsées (page d'accueil, pages de liste et pages produit), ou None.
+        categories (list): Noms des catégories à extraire, ou None pour toutes.
+        fields (tuple): Colonnes écrites dans les fichiers CSV, ou None pour toutes.
+        listing_stats (dict): Livres inchangés et pages produit téléchargées du dernier suivi des prix, ou None.
 
     """
-    def __init__(self, base_url):
+    def __init__(self, base_url, parser_backend=None, http_client=None, csv_directory='datas_csv', resume=False,
+                 image_workers=4, image_directory='book_images', parse_workers=0, parse_batch_size=16,
+                 page_workers=4, price_history=None, crawl_diff=None, exporters=(), journal=None,
+                 metrics=None, page_cache=None, categories=None, fields=None, download_images=True,
+                 reference_image_directory=None):
         """
         Initialise ScraperManager avec une URL de base pour le scraping.
 
         Parameters:
             base_url (str): L'URL de base du site web à scraper.
+            parser_backend (str, optionnel): Backend de parsing des pages produit ('lxml' ou 'html.parser').
+            Par défaut, lxml s'il est installé.
+            http_client (HttpClient, optionnel): Client HTTP à utiliser. Par défaut, le client partagé.
+            csv_directory (str): Répertoire des fichiers CSV.
+            resume (bool): Reprendre un crawl interrompu : les livres déjà écrits dans les fichiers CSV
+            ne sont pas retéléchargés.
+            image_workers (int): Nombre de téléchargements d'images simultanés.
+            image_directory (str): Répertoire de base des images sauvegardées.
+            parse_workers (int): Nombre de processus dédiés au parsing des pages produit
+            (0 pour parser dans le processus principal).
+            parse_batch_size (int): Nombre de pages envoyées à un processus de parsing en une fois.
+            page_workers (int): Nombre de pages de liste d'une catégorie téléchargées simultanément
+            (1 pour suivre les liens de pagination un par un).
+            price_history (PriceHistory, optionnel): Historique des prix dans lequel chaque passage est enregistré.
+            crawl_diff (CrawlDiff, optionnel): Détection des livres ajoutés, retirés et modifiés depuis le
+            passage précédent.
+            exporters (iterable): Exports supplémentaires (voir exporters.Exporter) recevant chaque livre écrit.
+            journal (CrawlJournal, optionnel): Journal de progression du crawl complet. En reprise, les
+            catégories terminées et les pages de liste déjà parcourues ne sont pas retéléchargées.
+            metrics (Metrics, optionnel): Mesures du pipeline. Par défaut, de nouvelles mesures.
+            page_cache (PageCache, optionnel): Cache des pages parsées : une page revisitée (page d'accueil,
+            pages de liste et pages produit d'un suivi des prix répété) n'est pas reparsée si elle n'a pas
+            changé, et le livre extrait d'une page produit inchangée est réutilisé. Les pages produit parsées
+            par un ParsePool ne passent pas par le cache.
+            categories (iterable, optionnel): Noms des catégories à extraire (voir select_category_urls).
+            Par défaut, toutes les catégories du site.
+            fields (iterable, optionnel): Colonnes à écrire dans les fichiers CSV (voir csv_columns) ; les
+            autres champs ne sont pas extraits des pages produit. Par défaut, toutes.
+            download_images (bool): Télécharger les images de couverture.
+            reference_image_directory (str, optionnel): Répertoire d'images déjà téléchargées (par exemple le
+            répertoire final d'un crawl réparti) : une image présente et inchangée n'y est pas retéléchargée.
         """
+        if page_workers < 1:
+            raise ValueError("page_workers doit être supérieur ou égal à 1")
         self.base_url = base_url
-        self.data_extractor = DataExtractor(self.base_url)
+        self.csv_directory = csv_directory
+        self.resume = resume
+        self.http_client = http_client if http_client else get_default_client()
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.page_cache = page_cache
+        self.data_extractor = DataExtractor(self.base_url, client=self.http_client, page_cache=page_cache)
+        self.categories = list(categories) if categories is not None else None
+        self.fields = csv_columns(fields) if fields is not None else None
+        # Champs extraits des pages produit : colonnes écrites et, si les images sont téléchargées, leur URL
+        parsed_fields = None
+        if self.fields is not None:
+            parsed_fields = set(self.fields) | ({'image_url'} if download_images else set())
+        self.book_parser = BookPageParser(parser_backend, parsed_fields)
+        self.image_downloader = None
+        if download_images:
+            self.image_downloader = ImageDownloader(image_workers, image_directory, self.http_client,
+                                                    metrics=self.metrics,
+                                                    reference_directory=reference_image_directory)
+        self.parse_pool = None
+        if parse_workers:
+            self.parse_pool = ParsePool(parse_workers, parse_batch_size, parser_backend, parsed_fields, self.metrics)
+        self.page_workers = page_workers
+        self.price_history = price_history
+        self.crawl_diff = crawl_diff
+        self.exporters = list(exporters)
+        self.journal = journal
+        self.listing_stats = None
 
     def extract_all_books(self):
         """
@@ -31,54 +121,504 @@ class ScraperManager:
 
         Pour chaque catégorie trouvée sur le site, cette méthode extrait les URLs des livres et
         collecte les données essentielles de chaque livre, y compris l'URL de l'image de couverture.
-        Chaque livre est ensuite instancié en tant qu'objet Book, ses données étant collectées dans une
-        liste. Pour chaque catégorie, les images de couverture des livres sont sauvegardées localement,
-        et les données des livres sont exportées dans un fichier CSV spécifique à la catégorie.
+        Chaque livre est ensuite instancié en tant qu'objet Book, son image de couverture est confiée à
+        l'ImageDownloader, qui la sauvegarde localement en arrière-plan, et ses données sont aussitôt
+        écrites dans le fichier CSV de sa catégorie : aucune liste de livres n'est conservée en mémoire.
+        En mode reprise, les livres déjà présents dans les fichiers CSV ne sont pas retéléchargés et, si un
+        journal est configuré, les catégories terminées ne sont pas reparcourues.
 
         Cette méthode s'appuie sur DataExtractor pour l'extraction des URLs des catégories, des URLs des livres
         par catégorie, et des données détaillées pour chaque livre. Elle utilise également la fonctionnalité de
-        Book pour sauvegarder les images de couverture et utilise une méthode interne pour exporter les données
+        ImageDownloader pour sauvegarder les images de couverture et BookCsvWriter pour exporter les données
         des livres en CSV.
 
-        Les fichiers CSV sont sauvegardés dans un répertoire 'datas_csv', et les images sont sauvegardées dans
-        un répertoire 'book_images', tous deux créés à la racine du projet s'ils n'existent pas déjà.
+        Les fichiers CSV sont sauvegardés dans un répertoire 'datas_csv' (par défaut), et les images sont
+        sauvegardées dans un répertoire 'book_images', tous deux créés à la racine du projet s'ils n'existent pas déjà.
         Les sous-répertoires
         pour les images suivent la structure de catégorisation des livres,
         permettant une organisation claire des fichiers.
         """
-        # Étape 1: Extraire les URLs de toutes les catégories
-        category_urls = self.data_extractor.extract_category_urls()
+        with self.journal or contextlib.nullcontext():
+            # Étape 1: Extraire les URLs de toutes les catégories
+            category_urls = self.extract_category_urls()
+
+            # Étape 2: Pour chaque catégorie, extraire et sauvegarder les livres
+            self.extract_categories(category_urls)
+
+    def extract_categories(self, category_urls):
+        """
+        Extrait et sauvegarde les livres d'une liste de catégories (toutes celles du site, ou celles d'un
+        shard d'un crawl réparti, voir sharding.py), puis journalise le résumé du passage.
+
+        Parameters:
+            category_urls (list): URLs des premières pages des catégories.
+        """
+        # Les images sont téléchargées en parallèle par l'ImageDownloader, sans bloquer l'extraction.
+        with self.image_downloader or contextlib.nullcontext(), self.parse_pool or contextlib.nullcontext(), \
+                self.recording_run():
+            for category_url in category_urls:
+                if self.journal is None or not self.journal.is_category_done(category_url):
+                    self.extract_category(category_url)
+
+        self.log_run_stats()
+
+    def extract_category(self, category_url):
+        """
+        Extrait tous les livres d'une catégorie, les écrit dans son fichier CSV et confie leurs images
+        de couverture à l'ImageDownloader (qui doit être démarré).
 
-        # Étape 2: Pour chaque catégorie, extraire les URLs des livres
-        for category_url in category_urls:
+        Le premier livre est extrait seul : sa catégorie détermine le fichier CSV et, en mode reprise,
+        les livres déjà écrits qui ne seront pas retéléchargés. Si le journal connaît déjà la catégorie,
+        son nom et ses URLs de livres sont repris du journal, sans retélécharger les pages de liste. Si une
+        page de liste n'a pas pu être téléchargée, les livres des autres pages sont extraits mais la catégorie
+        n'est ni enregistrée ni terminée dans le journal (voir record_listing_failure).
+
+        Parameters:
+            category_url (str): URL de la première page de la catégorie.
+        """
+        known = self.journal.category(category_url) if self.journal is not None else None
+        failed_pages = []
+        if known is not None:
+            category, book_urls = known
+            first_index, first_book = -1, None
+        else:
+            start = time.perf_counter()
             self.data_extractor.set_url(category_url)
-            book_urls = self.data_extractor.extract_book_urls_from_category()
-            books = []  # Liste pour stocker les données des livres
+            book_urls = self.data_extractor.extract_book_urls_from_category(self.page_workers)
+            failed_pages = self.data_extractor.failed_page_urls
+            listing_seconds = time.perf_counter() - start
+            if failed_pages:
+                self.record_listing_failure(category_url, failed_pages)
+            first_index, first_book = self.extract_first_book(book_urls)
+            if first_book is None:
+                return
+            category = first_book.category
+            self.metrics.record('extract', listing_seconds, category)
+            if self.journal is not None and not failed_pages:
+                self.journal.record_category(category_url, category, book_urls)
+
+        with self.open_csv_writer(category) as writer:
+            self.resume_history(category)
+            books = self.extract_books((url for url in book_urls[first_index + 1:] if not writer.has_book(url)),
+                                       category)
+            if first_book is not None and not writer.has_book(first_book.product_book_url):
+                books = itertools.chain([first_book], books)
+            # Chaque livre est écrit dans le CSV dès qu'il est extrait
+            for book in books:
+                self.save_book(book, writer)
+            self.finish_category(category_url, book_urls, writer, listing_complete=not failed_pages)
+
+    def extract_category_urls(self):
+        """
+        Retourne les URLs des catégories du site : celles du journal en reprise, sinon celles de la page
+        d'accueil (enregistrées dans le journal, s'il est configuré), restreintes aux catégories choisies.
+
+        Returns:
+            list: URLs des premières pages des catégories.
+        """
+        if self.journal is not None and self.journal.category_urls is not None:
+            progress = self.journal.progress()
+            logger.info("Reprise : %d catégories terminées, %d livres écrits, %d livres et %d catégories (pages "
+                        "de liste) en échec à retenter", progress['categories_done'], progress['books_done'],
+                        progress['books_failed'], progress['listings_failed'], extra=progress)
+            return self.select_categories(self.journal.category_urls)
+        self.data_extractor.set_url(self.base_url)  # L'extracteur a pu servir aux pages d'un passage précédent
+        category_urls = self.select_categories(self.data_extractor.extract_category_urls())
+        if self.journal is not None and category_urls:
+            self.journal.record_categories(category_urls)
+        return category_urls
+
+    def select_categories(self, category_urls):
+        """
+        Restreint les URLs des catégories à celles choisies (`categories`), en signalant les noms inconnus.
+
+        Parameters:
+            category_urls (list): URLs des premières pages des catégories.
+
+        Returns:
+            list: Les URLs des catégories choisies, ou toutes si aucune catégorie n'a été choisie.
+        """
+        if self.categories is None or not category_urls:
+            return category_urls
+        selected, unknown = select_category_urls(category_urls, self.categories)
+        if unknown:
+            logger.error("Catégories introuvables sur le site : %s", ', '.join(unknown), extra={'unknown': unknown})
+        return selected
+
+    def record_listing_failure(self, category_url, page_urls):
+        """
+        Signale les pages de liste d'une catégorie qui n'ont pas pu être téléchargées.
+
+        La liste des livres de la catégorie est incomplète : elle n'est pas enregistrée dans le journal, qui
+        reparcourra la catégorie en reprise, et le passage n'est plus complet pour la détection des
+        changements (les livres des pages manquantes ne sont pas signalés comme retirés).
+
+        Parameters:
+            category_url (str): URL de la première page de la catégorie.
+            page_urls (list): URLs des pages de liste en échec.
+        """
+        logger.warning("Pages de liste non téléchargées (%s) : %s", category_url, ', '.join(page_urls),
+                       extra={'category_url': category_url, 'pages': page_urls})
+        if self.journal is not None:
+            self.journal.record_listing_failure(category_url, page_urls)
+        if self.crawl_diff is not None:
+            self.crawl_diff.complete = False
+
+    def finish_category(self, category_url, book_urls, writer, listing_complete=True):
+        """
+        Termine une catégorie : les livres en attente de l'historique des prix sont enregistrés, et la fin de
+        la catégorie est notée dans le journal si toutes ses pages de liste ont été téléchargées et tous ses
+        livres écrits.
+
+        Parameters:
+            category_url (str): URL de la première page de la catégorie.
+            book_urls (list): URLs des pages des livres de la catégorie.
+            writer (BookCsvWriter): Le writer du fichier CSV de la catégorie.
+            listing_complete (bool): Toutes les pages de liste de la catégorie ont été téléchargées.
+        """
+        if self.price_history is not None:
+            self.price_history.flush()  # Un arrêt du programme ne perd au plus que la catégorie en cours
+        if (self.journal is not None and listing_complete
+                and all(writer.has_book(book_url) for book_url in book_urls)):
+            self.journal.finish_category(category_url)
+
+    def resume_history(self, category):
+        """
+        En reprise, ajoute au passage repris de l'historique des prix les livres déjà écrits dans le fichier
+        CSV d'une catégorie : ils ne sont pas retéléchargés, et ceux qui étaient encore en attente lors de
+        l'arrêt manqueraient sinon à l'historique.
+
+        Parameters:
+            category (str): La catégorie des livres.
+        """
+        if self.resume and self.price_history is not None:
+            for book in read_books(category, self.csv_directory).values():
+                self.price_history.add(book)
+
+    def extract_first_book(self, book_urls):
+        """
+        Extrait le premier livre d'une liste dont la page produit a pu être téléchargée.
+
+        Parameters:
+            book_urls (list): URLs des pages des livres.
+
+        Returns:
+            tuple: L'index de ce livre dans la liste et le livre, ou (None, None) si aucune page n'a pu
+            être téléchargée.
+        """
+        for index, book_url in enumerate(book_urls):
+            book = self.extract_book(book_url)
+            if book.category:
+                return index, book
+            self.record_book_failure(book_url)
+        return None, None
+
+    def save_book(self, book, writer):
+        """
+        Écrit un livre extrait dans le CSV de sa catégorie et confie son image de couverture à
+        l'ImageDownloader.
+
+        Un livre dont la page produit n'a pas pu être téléchargée n'est pas écrit : son URL figure dans
+        les dead letters du client HTTP, et un passage en mode reprise le retéléchargera.
+
+        Parameters:
+            book (Book): Le livre extrait.
+            writer (BookCsvWriter): Le writer du fichier CSV de la catégorie.
+        """
+        if not book.upc:
+            logger.warning("Livre non écrit, page indisponible : %s", book.product_book_url)
+            self.metrics.count('books_failed')
+            self.record_book_failure(book.product_book_url)
+            return
+        if self.image_downloader is not None:
+            self.image_downloader.submit(book)  # Sauvegarde l'image de couverture en arrière-plan
+        if logger.isEnabledFor(logging.DEBUG):  # to_dict() n'est construit que s'il est affiché
+            logger.debug("Livre extrait : %s", book.to_dict(), extra={'upc': book.upc, 'category': book.category})
+        self.write_book(book, writer)
+        self.metrics.count('books_written')
+        if self.journal is not None:
+            self.journal.record_book(book.product_book_url)
+
+    def record_book_failure(self, book_url):
+        """
+        Enregistre un livre dont la page produit n'a pas pu être téléchargée : il sera retenté en reprise
+        (journal) et n'est pas signalé comme retiré par la détection des changements.
+
+        Parameters:
+            book_url (str): URL de la page du livre.
+        """
+        if self.journal is not None:
+            self.journal.record_failure(book_url)
+        if self.crawl_diff is not None:
+            self.crawl_diff.fail(book_url)
+
+    def write_book(self, book, writer):
+        """
+        Écrit un livre dans le CSV de sa catégorie, l'ajoute au passage en cours de l'historique des prix
+        et le compare au passage précédent.
 
-            # Étape 3: Pour chaque URL de livre, extraire les données du livre et créer une instance de Book
+        Parameters:
+            book (Book): Le livre à écrire.
+            writer (BookCsvWriter): Le writer du fichier CSV de la catégorie.
+        """
+        with self.metrics.timer('csv', book.category):
+            writer.write(book)
+        if self.price_history is not None:
+            self.price_history.add(book)
+        if self.crawl_diff is not None:
+            self.crawl_diff.add(book)
+        for exporter in self.exporters:
+            exporter.write(book)
+
+    @contextlib.contextmanager
+    def recording_run(self):
+        """
+        Enregistre un nouveau passage dans l'historique des prix et la détection des changements le temps
+        d'un bloc `with` (sans effet si ni l'un ni l'autre n'est configuré). En reprise, le passage interrompu
+        de l'historique des prix est poursuivi.
+        """
+        if self.price_history is not None:
+            self.price_history.start_run(resume=self.resume)
+        if self.crawl_diff is not None:
+            self.crawl_diff.complete = not self.resume  # Les livres déjà écrits ne sont pas revus à la reprise
+            self.crawl_diff.by_category = self.categories is not None
+        try:
+            with contextlib.ExitStack() as stack:
+                for recorder in [self.crawl_diff, *self.exporters]:
+                    if recorder is not None:
+                        stack.enter_context(recorder)
+                yield
+        finally:
+            if self.price_history is not None:
+                self.price_history.flush()
+        if self.crawl_diff is not None:
+            stats = self.crawl_diff.stats
+            logger.info("Changements : %d ajoutés, %d modifiés, %d retirés (%s)", stats['added'], stats['changed'],
+                        stats['removed'], self.crawl_diff.delta_path, extra={'changes': stats})
+
+    def extract_books(self, book_urls, category=None):
+        """
+        Télécharge et extrait une suite de livres, dans l'ordre des URLs.
+
+        Si un ParsePool est configuré, les pages téléchargées sont parsées par lots dans des processus
+        workers pendant que les pages suivantes sont téléchargées.
+
+        Parameters:
+            book_urls (iterable): URLs des pages des livres.
+            category (str, optionnel): Catégorie des livres, pour les mesures par catégorie.
+
+        Yields:
+            Book: Les livres extraits.
+        """
+        if self.parse_pool is None:
             for book_url in book_urls:
-                self.data_extractor.set_url(book_url)
-                book_data = {
-                    'product_book_url': book_url,
-                    'title': self.data_extractor.extract_title(),
-                    'upc': self.data_extractor.extract_upc(),
-                    'price_incl_tax': self.data_extractor.extract_price_including_tax(),
-                    'price_excl_tax': self.data_extractor.extract_price_excluding_tax(),
-                    'availability': self.data_extractor.extract_availability(),
-                    'review_rating': self.data_extractor.extract_review_rating(),
-                    'category': self.data_extractor.extract_category(),
-                    'image_url': self.data_extractor.extract_image_url(),
-                    'product_description': self.data_extractor.extrac_product_description(),
-                }
-                book = Book(**book_data)
-                books.append(book)
-                book.save_cover_image()  # Sauvegarde l'image de couverture pour chaque livre
-                print(book_data)
-
-            # À ce point, tous les livres d'une catégorie ont été traités
-            # Sauvegarde les données des livres dans un fichier CSV
-            if books:
-                self.save_books_to_csv(books, book_data['category'])
+                yield self.extract_book(book_url, category)
+        else:
+            yield from self.parse_pool.parse_many(
+                (book_url, self.fetch_page(book_url, category)) for book_url in book_urls
+            )
+
+    def track_prices(self):
+        """
+        Met à jour les fichiers CSV à partir des seules pages de liste des catégories (suivi des prix).
+
+        Les pages de liste affichent déjà le prix, la notation et la présence en stock de chaque livre.
+        Ces données sont comparées à celles du fichier CSV du précédent passage : la page produit n'est
+        téléchargée que pour les livres nouveaux ou dont l'une de ces données a changé, les autres livres
+        sont réécrits tels qu'ils avaient été extraits. Un passage sans changement ne demande ainsi
+        qu'une requête par page de liste (environ 20 livres), au lieu d'une par livre.
+        """
+        category_urls = self.extract_category_urls()
+        self.listing_stats = {'unchanged': 0, 'fetched': 0}
+        with self.image_downloader or contextlib.nullcontext(), self.recording_run():
+            for category_url in category_urls:
+                self.track_category_prices(category_url)
+        logger.info("Suivi des prix : %d livres inchangés, %d pages produit téléchargées",
+                    self.listing_stats['unchanged'], self.listing_stats['fetched'],
+                    extra={'listing': self.listing_stats})
+        self.log_run_stats()
+
+    def track_category_prices(self, category_url):
+        """
+        Met à jour le fichier CSV d'une catégorie à partir de ses pages de liste.
+
+        Parameters:
+            category_url (str): URL de la première page de la catégorie.
+        """
+        self.data_extractor.set_url(category_url)
+        entries = self.data_extractor.extract_listing_entries_from_category(self.page_workers)
+        failed_pages = self.data_extractor.failed_page_urls
+        if failed_pages:
+            self.record_listing_failure(category_url, failed_pages)
+        if not entries:
+            return
+        category = entries[0].book.category
+        previous_books = read_books(category, self.csv_directory)  # Relu avant que le fichier soit réécrit
+        with BookCsvWriter(category, self.csv_directory, fields=self.fields) as writer:
+            for entry in entries:
+                previous = previous_books.get(entry.book.product_book_url)
+                if previous is not None and not listing_changed(previous, entry, self.fields):
+                    self.write_book(previous, writer)
+                    self.listing_stats['unchanged'] += 1
+                else:
+                    self.save_book(self.extract_book(entry.book.product_book_url, category), writer)
+                    self.listing_stats['fetched'] += 1
+            if failed_pages:  # Livres des pages manquantes : conservés tels qu'au passage précédent
+                listed = {entry.book.product_book_url for entry in entries}
+                for book_url, previous in previous_books.items():
+                    if book_url not in listed:
+                        self.write_book(previous, writer)
+        if self.price_history is not None:
+            self.price_history.flush()
+
+    def run_report(self):
+        """
+        Rassemble les statistiques du passage qui ne proviennent pas des mesures du pipeline.
+
+        Returns:
+            dict: Connexions HTTP ('http'), nouvelles tentatives et URLs abandonnées ('fetch'), cache HTTP
+            ('cache'), cache des pages parsées ('page_cache'), images ('images') et, selon le mode, changements
+            ('changes') et suivi des prix ('listing').
+        """
+        scheduler = self.http_client.scheduler
+        report = {
+            'http': self.http_client.connection_stats(),
+            'fetch': dict(scheduler.stats),
+        }
+        if self.image_downloader is not None:
+            report['images'] = self.image_downloader.report()
+        if scheduler.rate_limiter is not None:
+            report['fetch']['final_rate'] = scheduler.rate_limiter.rate
+        if self.http_client.cache is not None:
+            report['cache'] = dict(self.http_client.cache.stats)
+        if self.page_cache is not None:
+            report['page_cache'] = self.page_cache.report()
+        if self.crawl_diff is not None:
+            report['changes'] = dict(self.crawl_diff.stats)
+        if self.listing_stats is not None:
+            report['listing'] = dict(self.listing_stats)
+        return report
+
+    def log_run_stats(self):
+        """Journalise le résumé du passage : requêtes HTTP, cache, tentatives, images et durées des étapes."""
+        report = self.run_report()
+        http, fetch = report['http'], report['fetch']
+        logger.info("Requêtes HTTP : %d, connexions ouvertes : %d, connexions réutilisées : %d, %.1f Mo reçus",
+                    http['requests'], http['opened'], http['reused'], fetch['bytes'] / (1024 * 1024), extra=http)
+        if 'cache' in report:
+            cache = report['cache']
+            logger.info("Cache HTTP : %d servies sans requête, %d inchangées (304), %d téléchargées",
+                        cache['hits'], cache['revalidated'], cache['misses'], extra={'cache': cache})
+        if 'page_cache' in report:
+            pages = report['page_cache']
+            logger.info("Cache des pages : %d pages réutilisées, %d parsées, %d champs réutilisés, %d pages "
+                        "conservées (%.1f Mo)", pages['hits'], pages['misses'], pages['field_hits'],
+                        pages['entries'], pages['bytes'] / (1024 * 1024), extra={'page_cache': pages})
+        message = "Requêtes : %d nouvelles tentatives, %d demandes de ralentissement, %d URLs abandonnées"
+        arguments = [fetch['retried'], fetch['throttled'], fetch['failed']]
+        if 'final_rate' in fetch:
+            message += ", débit final %.1f requêtes/s"
+            arguments.append(fetch['final_rate'])
+        logger.info(message, *arguments, extra={'fetch': fetch})
+        images = report.get('images')
+        if images and images['count']:
+            logger.info("Images : %d traitées, %d échecs, latence moyenne %.3f s, p95 %.3f s, max %.3f s",
+                        images['count'], images['failures'], images['mean'], images['p95'], images['max'],
+                        extra={'images': images})
+        for stage, histogram in self.metrics.report()['stages'].items():
+            logger.info("Étape %s : %d mesures, moyenne %.4f s, p95 <= %.4f s, max %.4f s", stage,
+                        histogram['count'], histogram['mean'], histogram['p95'], histogram['max'],
+                        extra={'stage': stage})
+
+    def extract_book(self, book_url, category=None):
+        """
+        Télécharge la page d'un livre et en extrait toutes les données en une seule passe.
+
+        Parameters:
+            book_url (str): URL de la page du livre.
+            category (str, optionnel): Catégorie du livre si elle est déjà connue, pour les mesures par catégorie.
+
+        Returns:
+            Book: Le livre extrait (seule l'URL est renseignée si la page n'a pas pu être téléchargée).
+        """
+        if self.page_cache is not None:
+            return self.extract_cached_book(book_url, lambda: self.fetch_page(book_url, category))
+        return self.parse_book(self.fetch_page(book_url, category), book_url)
+
+    def extract_cached_book(self, book_url, fetch_content):
+        """
+        Extrait un livre en passant par le PageCache : une page produit inchangée depuis sa dernière visite
+        n'est pas reparsée et le livre qui en a été extrait est réutilisé (sans requête si la page est
+        encore fraîche).
+
+        Parameters:
+            book_url (str): URL de la page du livre.
+            fetch_content (callable): Fonction sans argument qui télécharge la page (None en cas d'erreur).
+
+        Returns:
+            Book: Le livre extrait (seule l'URL est renseignée si la page n'a pas pu être téléchargée).
+        """
+        parse_seconds = {'html': 0.0}  # Durée du parsing HTML, ajoutée à celle de l'extraction
+
+        def parse(content):
+            start = time.perf_counter()
+            soup = parse_html(content, self.book_parser.backend)
+            parse_seconds['html'] = time.perf_counter() - start
+            return soup
+
+        def extract():
+            start = time.perf_counter()
+            book = self.book_parser.parse_soup(soup, book_url)
+            self.metrics.record('parse', parse_seconds['html'] + time.perf_counter() - start, book.category)
+            return book
+
+        soup = self.page_cache.soup(book_url, fetch_content, parse)
+        if soup is None:
+            return Book(product_book_url=book_url)
+        return self.page_cache.field(book_url, soup, 'book', extract)
+
+    def parse_book(self, content, book_url):
+        """
+        Extrait les données d'une page produit déjà téléchargée, en mesurant la durée du parsing.
+
+        Parameters:
+            content (bytes): Contenu HTML de la page, ou None si elle n'a pas pu être téléchargée.
+            book_url (str): URL de la page du livre.
+
+        Returns:
+            Book: Le livre extrait.
+        """
+        start = time.perf_counter()
+        book = self.book_parser.parse(content, book_url)
+        self.metrics.record('parse', time.perf_counter() - start, book.category)
+        return book
+
+    def fetch_page(self, url, category=None):
+        """
+        Télécharge le contenu brut d'une page, sans le parser.
+
+        Parameters:
+            url (str): URL de la page.
+            category (str, optionnel): Catégorie de la page, pour les mesures par catégorie.
+
+        Returns:
+            bytes: Le contenu HTML de la page, ou None en cas d'erreur.
+        """
+        with self.metrics.timer('fetch', category):
+            self.data_extractor.set_url(url)
+            return self.data_extractor.fetch_content()
+
+    def open_csv_writer(self, category):
+        """
+        Ouvre le fichier CSV d'une catégorie pour y écrire les livres au fil de l'eau.
+
+        Parameters:
+            category (str): La catégorie des livres, utilisée pour nommer le fichier CSV.
+
+        Returns:
+            BookCsvWriter: Le writer de la catégorie (en mode reprise, le fichier existant est complété).
+        """
+        return BookCsvWriter(category, self.csv_directory, resume=self.resume, fields=self.fields)
 
     def save_books_to_csv(self, books, category):
         """
@@ -89,14 +629,27 @@ class ScraperManager:
             category (str): La catégorie des livres, utilisée pour nommer le fichier CSV.
 
         """
-        directory = 'datas_csv'
-        category_cleaned = clean_filename(category)
-        os.makedirs(directory, exist_ok=True)
-        filename = os.path.join(directory, f"{category_cleaned}.csv")
-
-        with open(filename, mode='w', newline='', encoding='utf-8') as file:
-            fieldnames = books[0].to_dict().keys()  # Utilise to_dict() pour obtenir les noms de champs
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-            writer.writeheader()
+        with BookCsvWriter(category, self.csv_directory, fields=self.fields) as writer:
             for book in books:
-                writer.writerow(book.to_dict())
+                writer.write(book)
+
+
+def listing_changed(book, entry, fields=None):
+    """
+    Indique si les données affichées sur la page de liste diffèrent de celles d'un livre déjà extrait.
+
+    Parameters:
+        book (Book): Le livre tel qu'extrait lors du précédent passage.
+        entry (ListingEntry): Le même livre tel qu'affiché sur la page de liste.
+        fields (tuple, optionnel): Colonnes écrites dans les fichiers CSV : seules ces données sont comparées.
+        Par défaut, toutes.
+
+    Returns:
+        bool: True si le prix, la notation ou la présence en stock ont changé (ou sont inconnus).
+    """
+    if fields is None or 'availability' in fields:
+        if book.availability is None or (book.availability > 0) != entry.in_stock:
+            return True
+    if (fields is None or 'price_including_tax' in fields) and book.price_incl_tax != entry.book.price_incl_tax:
+        return True
+    return (fields is None or 'review_rating' in fields) and book.review_rating != entry.book.review_rating
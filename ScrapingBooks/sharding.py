@@ -0,0 +1,426 @@
+import logging
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from image_store import ImageStore
+
+logger = logging.getLogger(__name__)
+
+# Partie du crawl confiée à un worker : une catégorie, et le numéro de la tentative en cours
+Shard = namedtuple('Shard', ['shard_id', 'category_url', 'attempt'])
+
+
+class ShardQueue:
+    """
+    File de travail partagée entre un coordinateur et des workers, stockée dans une base SQLite.
+
+    Chaque shard est une catégorie du site. La file d'un tour de crawl est remplie par le coordinateur, puis
+    vidée une fois toutes les sorties fusionnées : une file vide signifie qu'aucun tour n'est en cours.
+    Un worker réserve (claim) un shard pour une durée limitée (bail) qu'il prolonge tant qu'il y travaille ;
+    si le worker s'arrête, le bail expire et le shard est réservé par un autre worker. Un shard dont les
+    tentatives échouent `max_attempts` fois est marqué en échec. Les réservations se font dans des
+    transactions exclusives : plusieurs processus, sur une ou plusieurs machines partageant la base, ne
+    réservent jamais le même shard en même temps.
+
+    États d'un shard : 'pending' (à faire), 'leased' (réservé), 'done' (terminé, sortie à fusionner),
+    'merged' (sortie fusionnée) et 'failed' (abandonné).
+
+    Attributs :
+        path (str): Chemin de la base SQLite.
+        max_attempts (int): Nombre maximal de tentatives par shard.
+    """
+    def __init__(self, path='shards.sqlite', max_attempts=3):
+        """
+        Ouvre (ou crée) la file.
+
+        Paramètres :
+            path (str): Chemin de la base SQLite (sur un stockage partagé pour des workers sur plusieurs machines).
+            max_attempts (int): Nombre maximal de tentatives par shard.
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS shards ('
+            'shard_id INTEGER PRIMARY KEY, category_url TEXT UNIQUE, status TEXT, worker TEXT, '
+            'lease_expires REAL, attempts INTEGER, output_directory TEXT, error TEXT)'
+        )
+
+    def add(self, category_urls):
+        """
+        Ajoute les catégories à traiter. Les catégories déjà présentes (tour interrompu repris par un nouveau
+        coordinateur) sont conservées dans leur état.
+
+        Args:
+            category_urls (iterable): URLs des premières pages des catégories.
+        """
+        with self._transaction() as db:
+            db.executemany("INSERT OR IGNORE INTO shards (category_url, status, attempts) VALUES (?, 'pending', 0)",
+                           [(url,) for url in category_urls])
+
+    def claim(self, worker_id, lease_seconds=600):
+        """
+        Réserve le prochain shard à faire, ou un shard dont le bail a expiré.
+
+        Args:
+            worker_id (str): Identifiant du worker.
+            lease_seconds (float): Durée du bail, en secondes.
+
+        Returns:
+            Shard: Le shard réservé, ou None si aucun n'est disponible.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT shard_id, category_url, attempts FROM shards WHERE status = 'pending' "
+                "OR (status = 'leased' AND lease_expires < ?) ORDER BY shard_id LIMIT 1", (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            shard_id, category_url, attempts = row
+            db.execute(
+                "UPDATE shards SET status = 'leased', worker = ?, lease_expires = ?, attempts = ? WHERE shard_id = ?",
+                (worker_id, now + lease_seconds, attempts + 1, shard_id),
+            )
+        return Shard(shard_id, category_url, attempts + 1)
+
+    def renew(self, shard, worker_id, lease_seconds=600):
+        """
+        Prolonge le bail d'un shard réservé.
+
+        Args:
+            shard (Shard): Le shard réservé.
+            worker_id (str): Identifiant du worker.
+            lease_seconds (float): Nouvelle durée du bail, à partir de maintenant.
+
+        Returns:
+            bool: False si le worker a perdu le shard (bail expiré et shard réservé par un autre worker).
+        """
+        return self._update_owned(shard, worker_id, 'lease_expires = ?', (time.time() + lease_seconds,))
+
+    def complete(self, shard, worker_id, output_directory):
+        """
+        Marque un shard comme terminé.
+
+        Args:
+            shard (Shard): Le shard réservé.
+            worker_id (str): Identifiant du worker.
+            output_directory (str): Répertoire de sortie du shard (fichiers CSV et images), à fusionner.
+
+        Returns:
+            bool: False si le worker a perdu le shard : sa sortie doit alors être ignorée.
+        """
+        return self._update_owned(shard, worker_id, "status = 'done', lease_expires = NULL, output_directory = ?",
+                                  (output_directory,))
+
+    def release(self, shard, worker_id, error):
+        """
+        Rend un shard après un échec : il sera retenté, ou abandonné après `max_attempts` tentatives.
+
+        Args:
+            shard (Shard): Le shard réservé.
+            worker_id (str): Identifiant du worker.
+            error (str): Description de l'échec.
+        """
+        status = 'failed' if shard.attempt >= self.max_attempts else 'pending'
+        self._update_owned(shard, worker_id, 'status = ?, lease_expires = NULL, error = ?', (status, error))
+
+    def mark_merged(self, shard_id):
+        """Marque un shard terminé comme fusionné."""
+        with self._transaction() as db:
+            db.execute("UPDATE shards SET status = 'merged' WHERE shard_id = ? AND status = 'done'", (shard_id,))
+
+    def clear(self):
+        """Vide la file à la fin d'un tour."""
+        with self._transaction() as db:
+            db.execute('DELETE FROM shards')
+
+    def failures(self):
+        """
+        Liste les shards abandonnés.
+
+        Returns:
+            list: Couples (URL de la catégorie, description du dernier échec).
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT category_url, error FROM shards WHERE status = 'failed' ORDER BY shard_id"
+            ).fetchall()
+
+    def completed(self):
+        """
+        Liste les shards terminés dont la sortie n'a pas encore été fusionnée.
+
+        Returns:
+            list: Couples (identifiant, répertoire de sortie), dans l'ordre des shards.
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT shard_id, output_directory FROM shards WHERE status = 'done' ORDER BY shard_id"
+            ).fetchall()
+
+    def progress(self):
+        """
+        Compte les shards par état.
+
+        Returns:
+            dict: Nombre de shards de chaque état ('pending', 'leased', 'done', 'merged', 'failed').
+        """
+        counts = dict.fromkeys(('pending', 'leased', 'done', 'merged', 'failed'), 0)
+        with self._lock:
+            for status, count in self._db.execute('SELECT status, COUNT(*) FROM shards GROUP BY status'):
+                counts[status] = count
+        return counts
+
+    def is_finished(self):
+        """Indique s'il ne reste aucun shard à faire ou en cours."""
+        progress = self.progress()
+        return progress['pending'] == 0 and progress['leased'] == 0
+
+    def close(self):
+        """Ferme la base."""
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _update_owned(self, shard, worker_id, assignments, parameters):
+        """Met à jour un shard s'il est toujours réservé par ce worker pour cette tentative."""
+        with self._transaction() as db:
+            cursor = db.execute(
+                f"UPDATE shards SET {assignments} WHERE shard_id = ? AND status = 'leased' AND worker = ? "
+                "AND attempts = ?", parameters + (shard.shard_id, worker_id, shard.attempt),
+            )
+            return cursor.rowcount == 1
+
+    def _transaction(self):
+        """Ouvre une transaction exclusive (BEGIN IMMEDIATE), validée à la sortie du bloc `with`."""
+        return _Transaction(self._db, self._lock)
+
+
+class _Transaction:
+    """Transaction SQLite exclusive, qui verrouille la base en écriture dès son ouverture."""
+    def __init__(self, db, lock):
+        self._db = db
+        self._lock = lock
+
+    def __enter__(self):
+        self._lock.acquire()
+        self._db.execute('BEGIN IMMEDIATE')
+        return self._db
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self._db.execute('COMMIT' if exc_type is None else 'ROLLBACK')
+        finally:
+            self._lock.release()
+
+
+class LeaseKeeper:
+    """
+    Prolonge en arrière-plan le bail d'un shard le temps d'un bloc `with`.
+
+    Attributs :
+        lost (bool): True si le bail n'a pas pu être prolongé (shard réservé par un autre worker).
+    """
+    def __init__(self, queue, shard, worker_id, lease_seconds):
+        """
+        Paramètres :
+            queue (ShardQueue): La file de travail.
+            shard (Shard): Le shard réservé.
+            worker_id (str): Identifiant du worker.
+            lease_seconds (float): Durée du bail ; il est prolongé toutes les `lease_seconds / 3` secondes.
+        """
+        self.queue = queue
+        self.shard = shard
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._renew, name='lease-keeper', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop.set()
+        self._thread.join()
+
+    def _renew(self):
+        """Prolonge le bail à intervalles réguliers jusqu'à la fin du bloc `with`."""
+        while not self._stop.wait(self.lease_seconds / 3):
+            if not self.queue.renew(self.shard, self.worker_id, self.lease_seconds):
+                logger.warning("Bail perdu pour le shard %d (%s)", self.shard.shard_id, self.shard.category_url)
+                self.lost = True
+                return
+
+
+def default_worker_id():
+    """Retourne un identifiant de worker unique : nom de la machine et numéro de processus."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def run_worker(queue, make_manager, shard_directory='shards', worker_id=None, lease_seconds=600, poll_interval=5.0):
+    """
+    Traite les shards de la file jusqu'à ce qu'il n'en reste plus.
+
+    Chaque tentative écrit ses fichiers CSV et ses images dans son propre répertoire
+    (`<shard_directory>/shard-<id>-<tentative>`), fusionné ensuite par le coordinateur : deux workers
+    traitant le même shard (bail expiré) n'écrivent jamais dans les mêmes fichiers.
+
+    Args:
+        queue (ShardQueue): La file de travail.
+        make_manager (callable): Fonction recevant le répertoire des CSV et celui des images d'un shard, et
+        retournant le ScraperManager qui le traite.
+        shard_directory (str): Répertoire des sorties des shards (partagé avec le coordinateur).
+        worker_id (str, optionnel): Identifiant du worker. Par défaut, machine et numéro de processus.
+        lease_seconds (float): Durée du bail des shards réservés, en secondes.
+        poll_interval (float): Attente entre deux consultations de la file lorsque tous les shards restants
+        sont réservés par d'autres workers, en secondes.
+
+    Tant que la file est vide, le worker attend que le coordinateur la remplisse ; il s'arrête lorsque le tour
+    auquel il a participé est terminé.
+
+    Returns:
+        int: Le nombre de shards terminés par ce worker.
+    """
+    worker_id = worker_id or default_worker_id()
+    completed = 0
+    started = False  # Le tour a commencé (file remplie par le coordinateur)
+    while True:
+        shard = queue.claim(worker_id, lease_seconds)
+        if shard is None:
+            progress = queue.progress()
+            started = started or any(progress.values())
+            if started and progress['pending'] == 0 and progress['leased'] == 0:
+                logger.info("Worker %s : plus de shard à traiter (%d terminés)", worker_id, completed)
+                return completed
+            time.sleep(poll_interval)  # File pas encore remplie, ou shards réservés pouvant encore expirer
+            continue
+
+        output_directory = os.path.join(shard_directory, f"shard-{shard.shard_id}-{shard.attempt}")
+        logger.info("Worker %s : shard %d (%s), tentative %d", worker_id, shard.shard_id, shard.category_url,
+                    shard.attempt, extra={'shard_id': shard.shard_id, 'worker': worker_id})
+        manager = make_manager(os.path.join(output_directory, 'datas_csv'),
+                               os.path.join(output_directory, 'book_images'))
+        with LeaseKeeper(queue, shard, worker_id, lease_seconds) as lease:
+            try:
+                manager.extract_categories([shard.category_url])
+            except Exception as e:
+                logger.exception("Échec du shard %d : %s", shard.shard_id, e)
+                queue.release(shard, worker_id, repr(e))
+                continue
+        if lease.lost or not queue.complete(shard, worker_id, output_directory):
+            logger.warning("Shard %d perdu, sa sortie est ignorée : %s", shard.shard_id, output_directory)
+            continue
+        completed += 1
+
+
+def coordinate(queue, category_urls, csv_directory='datas_csv', image_directory='book_images', poll_interval=5.0,
+               shard_directory=None):
+    """
+    Répartit les catégories en shards, attend que les workers les aient traitées, puis fusionne leurs sorties.
+
+    Relancer le coordinateur d'un tour interrompu reprend ce tour (les shards existants sont conservés) ;
+    une fois les sorties fusionnées, la file est vidée et le relancer démarre un nouveau tour.
+
+    Args:
+        queue (ShardQueue): La file de travail.
+        category_urls (list): URLs des premières pages des catégories.
+        csv_directory (str): Répertoire final des fichiers CSV.
+        image_directory (str): Répertoire final des images.
+        poll_interval (float): Attente entre deux consultations de l'avancement, en secondes.
+        shard_directory (str, optionnel): Répertoire des sorties des shards, dont les sorties abandonnées
+        (worker arrêté ou bail perdu) sont supprimées à la fin du tour.
+
+    Returns:
+        dict: L'avancement final (nombre de shards par état).
+    """
+    queue.add(category_urls)
+    logger.info("%d catégories réparties en shards dans %s", len(category_urls), queue.path)
+    while not queue.is_finished():
+        merge_shards(queue, csv_directory, image_directory)  # Fusionne au fil de l'eau les shards terminés
+        progress = queue.progress()
+        logger.info("Shards : %d à faire, %d en cours, %d terminés, %d en échec", progress['pending'],
+                    progress['leased'], progress['done'] + progress['merged'], progress['failed'], extra=progress)
+        time.sleep(poll_interval)
+    merge_shards(queue, csv_directory, image_directory)
+    if shard_directory and os.path.isdir(shard_directory):
+        for name in os.listdir(shard_directory):
+            if name.startswith('shard-'):
+                shutil.rmtree(os.path.join(shard_directory, name), ignore_errors=True)
+    progress = queue.progress()
+    for category_url, error in queue.failures():
+        logger.error("Shard abandonné après %d tentatives : %s (%s)", queue.max_attempts, category_url, error)
+    queue.clear()
+    return progress
+
+
+def merge_shards(queue, csv_directory='datas_csv', image_directory='book_images'):
+    """
+    Fusionne les sorties des shards terminés dans l'arborescence finale, puis les supprime.
+
+    Chaque shard étant une catégorie, ses fichiers CSV remplacent ceux de la catégorie ; les images sont
+    ajoutées à l'ImageStore final, qui déduplique les contenus identiques entre shards.
+
+    Args:
+        queue (ShardQueue): La file de travail.
+        csv_directory (str): Répertoire final des fichiers CSV.
+        image_directory (str): Répertoire final des images.
+
+    Returns:
+        int: Le nombre de shards fusionnés.
+    """
+    shards = queue.completed()
+    if not shards:
+        return 0
+    os.makedirs(csv_directory, exist_ok=True)
+    store = ImageStore(image_directory)
+    try:
+        for shard_id, output_directory in shards:
+            _merge_csv_files(os.path.join(output_directory, 'datas_csv'), csv_directory)
+            _merge_images(os.path.join(output_directory, 'book_images'), image_directory, store)
+            queue.mark_merged(shard_id)
+            shutil.rmtree(output_directory, ignore_errors=True)
+    finally:
+        store.close()
+    logger.info("%d shards fusionnés dans %s et %s", len(shards), csv_directory, image_directory)
+    return len(shards)
+
+
+def _merge_csv_files(source_directory, csv_directory):
+    """Déplace les fichiers CSV d'un shard dans le répertoire final, à la place de ceux du passage précédent."""
+    if not os.path.isdir(source_directory):
+        return
+    for filename in os.listdir(source_directory):
+        if filename.endswith('.csv'):
+            shutil.move(os.path.join(source_directory, filename), os.path.join(csv_directory, filename))
+
+
+def _merge_images(source_directory, image_directory, store):
+    """Ajoute les images d'un shard (`<catégorie>/<upc>.jpg`) à l'ImageStore final."""
+    if not os.path.isdir(source_directory):
+        return
+    for category in sorted(os.listdir(source_directory)):
+        category_directory = os.path.join(source_directory, category)
+        if category.startswith('.') or not os.path.isdir(category_directory):
+            continue  # Objets et manifeste de l'ImageStore du shard
+        for filename in os.listdir(category_directory):
+            upc, extension = os.path.splitext(filename)
+            if extension != '.jpg':
+                continue
+            with open(os.path.join(category_directory, filename), 'rb') as image:
+                store.save(upc, iter(lambda: image.read(64 * 1024), b''),
+                           os.path.join(image_directory, category, filename))